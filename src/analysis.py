@@ -1,18 +1,55 @@
+import hashlib
 import numpy as np
 import pandas as pd
 
 # Sklearn (K-Means için) varsa import et, yoksa hata vermesin
 try:
-    from sklearn.cluster import KMeans
+    from sklearn.cluster import KMeans, MiniBatchKMeans
     from sklearn.preprocessing import StandardScaler
     _HAS_SKLEARN = True
 except ImportError:
     _HAS_SKLEARN = False
 
-def calculate_kmeans_labels(df_in, x_col, k=3):
+# --- Analytics Önbelleği ---
+# Aynı filtreli görünüm için K-Means / Pareto sonucunu tekrar hesaplamamak için.
+# Anahtar: (analiz türü, veri parmak izi, parametreler)
+_ANALYTICS_CACHE = {}
+_ANALYTICS_CACHE_MAX = 16
+
+# --- K-Means Ayarları ---
+# "auto": küçük veride tam KMeans, büyük veride MiniBatchKMeans
+KMEANS_BACKENDS = ("auto", "full", "minibatch")
+KMEANS_K_RANGE = (2, 8)
+MINIBATCH_AUTO_ROWS = 10000
+MINIBATCH_BATCH_SIZE = 2048
+
+# Warm start: (k, x_col) -> son merkezler (orijinal birimde).
+# Filtre değişince yeni fit önceki merkezlerden başlar, tek init yeterli olur.
+_KMEANS_WARM_START = {}
+
+def _data_fingerprint(X):
+    """DataFrame'in index + değerlerinden kısa bir parmak izi üretir."""
+    row_hashes = pd.util.hash_pandas_object(X, index=True).to_numpy()
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()
+
+def _memoize(key, compute_func):
+    """Sonucu önbellekten döndürür, yoksa hesaplayıp saklar."""
+    if key in _ANALYTICS_CACHE:
+        return _ANALYTICS_CACHE[key]
+    value = compute_func()
+    if len(_ANALYTICS_CACHE) >= _ANALYTICS_CACHE_MAX:
+        # En eski kaydı at (dict ekleme sırasını korur)
+        _ANALYTICS_CACHE.pop(next(iter(_ANALYTICS_CACHE)))
+    _ANALYTICS_CACHE[key] = value
+    return value
+
+def calculate_kmeans_labels(df_in, x_col, k=3, backend="auto"):
     """
     Verilen DataFrame için K-Means kümeleme yapar.
-    Geriye etiketleri (0, 1, 2...) döndürür.
+    Geriye df_in.index'e hizalı etiket Series'i (0, 1, 2...) döndürür.
+    backend: "full" (KMeans), "minibatch" (MiniBatchKMeans, warm start)
+    veya "auto" (MINIBATCH_AUTO_ROWS üstünde minibatch).
+    Aynı veri, k ve backend için sonuç önbellekten gelir.
     """
     if not _HAS_SKLEARN or len(df_in) < k:
         return None
@@ -21,48 +58,125 @@ def calculate_kmeans_labels(df_in, x_col, k=3):
         # Sadece sayısal verileri al
         # x_col: Grafikte X ekseninde hangi veri varsa (MRR veya License MRR)
         X = df_in[[x_col, 'MRR Growth (%)']].copy().fillna(0)
-        
-        # Ölçekleme (Normalization) şart
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X)
-        
-        kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-        labels = kmeans.fit_predict(X_scaled)
-        return labels
     except Exception as e:
         print(f"KMeans Error: {e}")
         return None
 
+    if backend == "auto":
+        backend = "minibatch" if len(X) > MINIBATCH_AUTO_ROWS else "full"
+
+    def _fit():
+        try:
+            # Ölçekleme (Normalization) şart
+            scaler = StandardScaler()
+            X_scaled = scaler.fit_transform(X)
+            
+            if backend == "minibatch":
+                warm = _KMEANS_WARM_START.get((k, x_col))
+                if warm is not None:
+                    # Merkezler zaten yakın: tek init ve erken durma yeterli
+                    init, n_init, patience = scaler.transform(pd.DataFrame(warm, columns=X.columns)), 1, 3
+                else:
+                    init, n_init, patience = "k-means++", 3, 10
+                kmeans = MiniBatchKMeans(n_clusters=k, init=init, n_init=n_init,
+                                         batch_size=MINIBATCH_BATCH_SIZE,
+                                         max_no_improvement=patience, random_state=42)
+            else:
+                kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
+            labels = kmeans.fit_predict(X_scaled)
+
+            _KMEANS_WARM_START[(k, x_col)] = scaler.inverse_transform(kmeans.cluster_centers_)
+            return pd.Series(labels, index=X.index)
+        except Exception as e:
+            print(f"KMeans Error: {e}")
+            return None
+
+    return _memoize(("kmeans", _data_fingerprint(X), k, backend), _fit)
+
 def calculate_pareto_mask(df_in, x_col):
     """
     MRR'ın %80'ini oluşturan müşterileri (True/False) işaretler.
     (Pareto Prensibi: Gelirin %80'i müşterilerin %20'sinden gelir)
     """
     try:
-        # Büyükten küçüğe sırala
-        df_sorted = df_in.sort_values(by=x_col, ascending=False)
-        total_revenue = df_sorted[x_col].sum()
-        
-        # Kümülatif toplam
-        cumsum = df_sorted[x_col].cumsum()
-        
-        # %80 sınırını belirle
-        cutoff = total_revenue * 0.80
-        
-        # Maskeyi oluştur
-        pareto_mask_sorted = cumsum <= cutoff
-        
-        # Maskeyi orijinal sıraya göre geri döndür
-        return pareto_mask_sorted.reindex(df_in.index, fill_value=False)
+        X = df_in[[x_col]]
     except Exception:
         return None
 
+    def _mask():
+        try:
+            # Büyükten küçüğe sırala
+            df_sorted = X.sort_values(by=x_col, ascending=False)
+            total_revenue = df_sorted[x_col].sum()
+            
+            # Kümülatif toplam
+            cumsum = df_sorted[x_col].cumsum()
+            
+            # %80 sınırını belirle
+            cutoff = total_revenue * 0.80
+            
+            # Maskeyi oluştur
+            pareto_mask_sorted = cumsum <= cutoff
+            
+            # Maskeyi orijinal sıraya göre geri döndür
+            return pareto_mask_sorted.reindex(df_in.index, fill_value=False)
+        except Exception:
+            return None
+
+    return _memoize(("pareto", _data_fingerprint(X)), _mask)
+
+def grouped_regression_from_sums(n, sx, sy, sxy, sxx, syy, x0=0.0, y0=0.0):
+    """
+    Yeterli istatistiklerden (n, Σx, Σy, Σxy, Σx², Σy²) en küçük kareler doğruları;
+    her argüman grup başına bir değer içeren dizi olabilir (tüm gruplar tek seferde).
+    Toplamlar (x - x0, y - y0) kaydırılmış değerlerden alınmışsa x0 / y0 verilir
+    (büyük MRR değerlerinde Σx² - (Σx)²/n farkında hassasiyet kaybı olmasın diye).
+    Geriye {'m', 'b', 'r2', 'se', 'n'} dizileri döndürür; tanımsız değerler NaN.
+    se: eğimin standart hatası.
+    """
+    n, sx, sy, sxy, sxx, syy = (np.asarray(v, dtype=float) for v in (n, sx, sy, sxy, sxx, syy))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mx, my = sx / n, sy / n
+        sxx_c = sxx - sx * mx
+        syy_c = syy - sy * my
+        sxy_c = sxy - sx * my
+        ok = (n >= 2) & (sxx_c > 0)
+
+        m = np.where(ok, sxy_c / sxx_c, np.nan)
+        b = (y0 + my) - m * (x0 + mx)
+
+        # Artık kareler toplamı: Syy - m * Sxy
+        sse = np.maximum(syy_c - m * sxy_c, 0.0)
+        r2 = np.where(ok & (syy_c > 0), np.clip(1.0 - sse / syy_c, 0.0, 1.0), np.nan)
+        se = np.where(ok & (n > 2), np.sqrt(sse / (n - 2) / sxx_c), np.nan)
+    return {'m': m, 'b': b, 'r2': r2, 'se': se, 'n': n}
+
+def _line_at(lines, i=None):
+    """grouped_regression_from_sums sonucundan tek doğru: {'m', 'b', 'r2', 'se', 'n'} (NaN -> None)."""
+    out = {}
+    for key, arr in lines.items():
+        v = float(arr if i is None else arr[i])
+        out[key] = None if np.isnan(v) else v
+    out['n'] = int(out['n'] or 0)
+    return out
+
+def regression_lines_by_sector(lines, sectors):
+    """grouped_regression_from_sums sonucu -> {sektör: doğru}; doğrusu tanımsız sektörler atlanır."""
+    return {sec: _line_at(lines, i) for i, sec in enumerate(sectors) if not np.isnan(lines['m'][i])}
+
+def regression_from_sums(n, sx, sy, sxy, sxx, syy, x0=0.0, y0=0.0):
+    """
+    Tek grup için grouped_regression_from_sums.
+    Geriye {'m', 'b', 'r2', 'se', 'n'} döndürür (tanımsızsa None).
+    """
+    return _line_at(grouped_regression_from_sums(n, sx, sy, sxy, sxx, syy, x0, y0))
+
 def calculate_regression_line(df_in, x_col, swap_axes=False):
     """
     Verilen veri için Lineer Regresyon (Eğim ve Kesişim) hesaplar.
-    Geriye {'m': eğim, 'b': kesişim} sözlüğü döndürür.
+    Geriye {'m': eğim, 'b': kesişim, 'r2', 'se', 'n'} sözlüğü döndürür.
     """
-    result = {'m': None, 'b': None}
+    result = {'m': None, 'b': None, 'r2': None, 'se': None}
     
     if len(df_in) < 2:
         return result
@@ -84,60 +198,147 @@ def calculate_regression_line(df_in, x_col, swap_axes=False):
         y_clean = y_data[valid_mask]
 
         if len(x_clean) >= 2:
-            # Polyfit (1. derece polinom = Doğru denklemi)
-            m, b = np.polyfit(x_clean, y_clean, 1)
-            result['m'] = m
-            result['b'] = b
+            # Ortalamaya kaydırılmış yeterli istatistiklerle tek geçişte doğru + R² / SE
+            x0, y0 = x_clean.mean(), y_clean.mean()
+            dx, dy = x_clean - x0, y_clean - y0
+            result = regression_from_sums(len(dx), dx.sum(), dy.sum(), (dx * dy).sum(),
+                                          (dx * dx).sum(), (dy * dy).sum(), x0, y0)
             
     except Exception as e:
         print(f"Regresyon Hatası: {e}")
         
     return result
 
-def apply_regression_filter(df_in, x_col, settings_state, regression_line, regression_removed_set, swap_axes=False):
+def calculate_sector_regressions(df_in, x_col, y_col='MRR Growth (%)', swap_axes=False,
+                                 sector_col='Company Sector'):
     """
-    Hesaplanmış regresyon çizgisine göre dataframe'i filtreler.
-    Gizlenen noktaları 'regression_removed_set' kümesine ekler.
+    "All sector trends": her sektörün regresyon doğrusunu tek geçişte hesaplar
+    (gruplu en küçük kareler; sektör başına toplamlar np.bincount ile).
+    Geriye {sektör: {'m', 'b', 'r2', 'se', 'n'}} döndürür; doğrusu tanımsız sektörler yer almaz.
     """
-    # Circular import olmaması için get_point_key'i burada import ediyoruz
-    from data_ops import get_point_key
+    if len(df_in) < 2 or sector_col not in df_in.columns:
+        return {}
 
-    filter_mode = settings_state.get("regression_filter", "none")
-    m = regression_line.get('m')
-    b = regression_line.get('b')
+    x_data = pd.to_numeric(df_in[x_col], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    y_data = pd.to_numeric(df_in[y_col], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    if swap_axes:
+        x_data, y_data = y_data, x_data
 
-    # 1. Filtre kapalıysa veya çizgi yoksa temizle ve çık
-    if filter_mode == "none" or m is None or b is None:
-        regression_removed_set.clear()
-        return df_in
+    codes, names = pd.factorize(df_in[sector_col], sort=True)
+    valid = (codes >= 0) & np.isfinite(x_data) & np.isfinite(y_data)
+    codes, x_data, y_data = codes[valid], x_data[valid], y_data[valid]
+    k = len(names)
+
+    # Sektör ortalamalarına kaydırılmış toplamlar (iki geçişli varyans kadar hassas)
+    n = np.bincount(codes, minlength=k).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x0 = np.nan_to_num(np.bincount(codes, weights=x_data, minlength=k) / n)
+        y0 = np.nan_to_num(np.bincount(codes, weights=y_data, minlength=k) / n)
+    dx, dy = x_data - x0[codes], y_data - y0[codes]
+
+    def _sum(w):
+        return np.bincount(codes, weights=w, minlength=k)
 
-    # 2. Eksen durumuna göre X ve Y verilerini ayarla
+    lines = grouped_regression_from_sums(n, _sum(dx), _sum(dy), _sum(dx * dy), _sum(dx * dx), _sum(dy * dy), x0, y0)
+    return regression_lines_by_sector(lines, names)
+
+def format_regression_label(line):
+    """Legend etiketi: 'Regression Line (R²=…, SE=…)'; istatistik yoksa (ör. sabit çizgi) sade etiket."""
+    parts = []
+    if line.get('r2') is not None:
+        parts.append(f"R²={line['r2']:.3f}")
+    if line.get('se') is not None:
+        parts.append(f"SE={line['se']:.3g}")
+    if not parts:
+        return "Regression Line"
+    return f"Regression Line ({', '.join(parts)})"
+
+# --- Regresyon Filtresi Modları ---
+# above / below: çizginin üstü / altı; band: |residual| ile k·σ karşılaştırması;
+# pct: residual'a göre en üst / en alt N% nokta
+REGRESSION_FILTER_MODES = ("none", "above", "below", "outside_band", "inside_band", "top_pct", "bottom_pct")
+REGRESSION_BAND_MODES = ("outside_band", "inside_band", "top_pct", "bottom_pct")
+
+def compute_residuals(df_in, x_col, regression_line, swap_axes=False):
+    """
+    Görünümün residual dizisi (df_in satırlarına hizalı): y - (m*x + b).
+    Çizgi yoksa None; X / Y sayısal değilse o satır NaN.
+    """
+    m = regression_line.get('m')
+    b = regression_line.get('b')
+    if m is None or b is None:
+        return None
+    x_data = pd.to_numeric(df_in[x_col], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    y_data = pd.to_numeric(df_in['MRR Growth (%)'], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
     if swap_axes:
         # Eksenler ters (Y=MRR, X=Growth)
-        x_data = df_in['MRR Growth (%)'].astype(float)
-        y_data = df_in[x_col].astype(float)
-    else:
-        # Normal (Y=Growth, X=MRR)
-        x_data = df_in[x_col].astype(float)
-        y_data = df_in['MRR Growth (%)'].astype(float)
-    
-    # 3. Tahmini Y'yi hesapla: y_pred = m*x + b
-    y_pred = m * x_data + b
-    
-    # 4. Maskeleme
+        x_data, y_data = y_data, x_data
+    return y_data - (m * x_data + b)
+
+def residual_band_limits(residuals, settings_state, filter_mode=None):
+    """
+    Filtre modunun residual sınırları: (lo, hi, keep_inside).
+    keep_inside True ise lo <= r <= hi olanlar, False ise dışındakiler görünür kalır.
+    σ ve yüzdelikler verilen residual'ların (NaN'lar hariç) kendisinden hesaplanır;
+    σ = sqrt(Σr² / (n - 2)), regresyonun artık standart sapması.
+    """
+    filter_mode = filter_mode or settings_state.get("regression_filter", "none")
+    r = np.asarray(residuals, dtype=float)
+    r = r[np.isfinite(r)]
+
     if filter_mode == "above":
-        mask = (y_data >= y_pred)
-    elif filter_mode == "below":
-        mask = (y_data <= y_pred)
-    else:
-        mask = True 
-    
-    # 5. Gizlenenleri kaydet
+        return 0.0, np.inf, True
+    if filter_mode == "below":
+        return -np.inf, 0.0, True
+    if filter_mode in ("outside_band", "inside_band"):
+        k = float(settings_state.get("regression_band_k", 1.0))
+        sigma = float(np.sqrt((r * r).sum() / (len(r) - 2))) if len(r) > 2 else 0.0
+        return -k * sigma, k * sigma, filter_mode == "inside_band"
+    if filter_mode in ("top_pct", "bottom_pct"):
+        pct = min(max(float(settings_state.get("regression_band_pct", 10.0)), 0.0), 100.0)
+        if len(r) == 0:
+            return -np.inf, np.inf, True
+        if filter_mode == "top_pct":
+            return float(np.percentile(r, 100.0 - pct)), np.inf, True
+        return -np.inf, float(np.percentile(r, pct)), True
+    return -np.inf, np.inf, True
+
+def residual_keep_mask(residuals, limits):
+    """residual_band_limits sınırlarına göre görünür kalan satırlar (NaN residual her zaman gizlenir)."""
+    lo, hi, keep_inside = limits
+    r = np.asarray(residuals, dtype=float)
+    with np.errstate(invalid="ignore"):
+        inside = (r >= lo) & (r <= hi)
+    return np.isfinite(r) & (inside if keep_inside else ~inside)
+
+def apply_regression_filter(df_in, x_col, settings_state, regression_line, regression_removed_set, swap_axes=False,
+                            point_index=None, scope_mask=None):
+    """
+    Hesaplanmış regresyon çizgisine göre dataframe'i filtreler.
+    Gizlenen noktaları 'regression_removed_set' kümesine ekler (anahtarlar tek seferde üretilir).
+    scope_mask: σ / yüzdeliklerin hesaplanacağı satırlar (ör. seçili sektör); yoksa df_in'in tamamı.
+    Dönüş: (filtrelenmiş df, residual dizisi veya None)
+    """
+    # Circular import olmaması için burada import ediyoruz
+    from data_ops import build_point_key_index, point_keys_for
+
+    filter_mode = settings_state.get("regression_filter", "none")
+    residuals = compute_residuals(df_in, x_col, regression_line, swap_axes=swap_axes)
+
+    # 1. Filtre kapalıysa veya çizgi yoksa temizle ve çık
     regression_removed_set.clear()
-    
-    if mask is not True:
-        removed_df = df_in[~mask]
-        for _, row in removed_df.iterrows():
-            regression_removed_set.add(get_point_key(row, settings_state))
-    
-    return df_in[mask]
\ No newline at end of file
+    if filter_mode == "none" or residuals is None:
+        return df_in, residuals
+
+    # 2. Sınırlar sadece kapsamdaki residual'lardan
+    scope = residuals if scope_mask is None else residuals[np.asarray(scope_mask, dtype=bool)]
+    keep = residual_keep_mask(residuals, residual_band_limits(scope, settings_state, filter_mode))
+
+    # 3. Gizlenenleri kaydet
+    if not keep.all():
+        if point_index is None:
+            point_index = build_point_key_index(df_in)
+        regression_removed_set.update(point_keys_for(point_index, settings_state, df_in.index, mask=~keep))
+
+    return df_in[keep], residuals
+
@@ -8,15 +8,16 @@ import numpy as np
 import math
 
 # --- IMPORTS ---
-from data_ops import load_and_clean_data
-from analysis import calculate_regression_line
+from data_cache import load_cleaned_data_cached
+from data_ops import get_age_done_mask, get_churn_mask, get_risk_allowed_mask, risk_settings_from_levels, drop_internal_columns, RISK_COL, RISK_LEVELS
+from analysis import calculate_regression_line, calculate_sector_regressions
 
 # --- SETUP ---
 base_dir = os.path.dirname(os.path.abspath(__file__))
 file_path = os.path.join(base_dir, "assets", "data.xlsx")
 
 if os.path.exists(file_path):
-    global_df = load_and_clean_data(file_path)
+    global_df = load_cleaned_data_cached(file_path)
 else:
     global_df = pd.DataFrame(columns=['Customer', 'Effective MRR', 'MRR Growth (%)', 'Company Sector', 'Churn'])
 
@@ -30,7 +31,7 @@ MATTE_COLORS = [
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 
 # --- HELPER: FILTER DATA ---
-def filter_data(df, age_mode, min_mrr, max_mrr, min_growth, max_growth, show_churn, swap_axes, removed_list):
+def filter_data(df, age_mode, min_mrr, max_mrr, min_growth, max_growth, show_churn, swap_axes, removed_list, risk_levels=None):
     dff = df.copy()
     
     # 0. Remove Deleted Points
@@ -44,17 +45,17 @@ def filter_data(df, age_mode, min_mrr, max_mrr, min_growth, max_growth, show_chu
     
     if age_mode == '0-1':
         if 'DoesCustomerCompleteItsFirstYear' in dff.columns:
-            dff = dff[dff['DoesCustomerCompleteItsFirstYear'].astype(str).str.upper() == 'YES']
+            dff = dff[get_age_done_mask(dff, 'DoesCustomerCompleteItsFirstYear')]
         x_col = 'First Year Ending MRR'
         y_col = 'MRR Growth (0-1)'
     elif age_mode == '0-2':
         if 'DoesCustomersCompleteItsSecondYear' in dff.columns:
-            dff = dff[dff['DoesCustomersCompleteItsSecondYear'].astype(str).str.upper() == 'YES']
+            dff = dff[get_age_done_mask(dff, 'DoesCustomersCompleteItsSecondYear')]
         x_col = 'Second Year Ending MRR'
         y_col = 'MRR Growth (0-2)'
     elif age_mode == '1-2':
         if 'DoesCustomersCompleteItsSecondYear' in dff.columns:
-            dff = dff[dff['DoesCustomersCompleteItsSecondYear'].astype(str).str.upper() == 'YES']
+            dff = dff[get_age_done_mask(dff, 'DoesCustomersCompleteItsSecondYear')]
         x_col = 'Second Year Ending MRR'
         y_col = 'MRR Growth(1-2)'
 
@@ -75,7 +76,11 @@ def filter_data(df, age_mode, min_mrr, max_mrr, min_growth, max_growth, show_chu
 
     # 3. Churn
     if not show_churn and 'Churn' in dff.columns: 
-        dff = dff[dff['Churn'] != 'Churn']
+        dff = dff[~get_churn_mask(dff)]
+
+    # 3b. Risk (masaüstü ve export ile aynı lookup tablosu)
+    if risk_levels is not None and RISK_COL in dff.columns:
+        dff = dff[get_risk_allowed_mask(dff, risk_settings_from_levels(risk_levels))]
 
     # 4. Axis Swap
     if swap_axes:
@@ -267,6 +272,13 @@ settings_modal = dbc.Modal([
             dbc.Col([html.Label("Max Growth (%):"), dbc.Input(id='limit-growth-max', type='number', placeholder="Max")], width=6)
         ]),
         html.Hr(),
+        html.H6("Risk Filter", className="text-primary"),
+        dbc.Checklist(
+            id='risk-levels',
+            options=[{'label': f' Show {r}', 'value': r} for r in RISK_LEVELS],
+            value=list(RISK_LEVELS)
+        ),
+        html.Hr(),
         html.H6("Axis Settings", className="text-primary"),
         dbc.Checklist(
             id='axis-options',
@@ -329,6 +341,7 @@ app.layout = dbc.Container([
                         id='analysis-tools',
                         options=[
                             {'label': ' Show Regression Line', 'value': 'show_reg'},
+                            {'label': ' Show All Sector Trends', 'value': 'sector_trends'},
                             {'label': ' Include Churned Customers', 'value': 'show_churn'}
                         ],
                         value=['show_churn'],
@@ -467,15 +480,16 @@ def global_interaction_handler(signal, btn_clicks, hoverData, removed_list):
      Input('limit-growth-min', 'value'),
      Input('limit-growth-max', 'value'),
      Input('axis-options', 'value'),
-     Input('removed-points-store', 'data')] # <--- 1. YENİ INPUT EKLENDİ
+     Input('removed-points-store', 'data'), # <--- 1. YENİ INPUT EKLENDİ
+     Input('risk-levels', 'value')]
 )
-def update_dashboard(selected_mode, tools_list, age_mode, min_mrr, max_mrr, min_growth, max_growth, axis_opts, removed_list): # <--- 2. PARAMETRE EKLENDİ
+def update_dashboard(selected_mode, tools_list, age_mode, min_mrr, max_mrr, min_growth, max_growth, axis_opts, removed_list, risk_levels): # <--- 2. PARAMETRE EKLENDİ
     swap_axes = 'swap' in axis_opts
     show_churn = 'show_churn' in tools_list
     
     # 3. filter_data ÇAĞRISI GÜNCELLENDİ (removed_list eklendi)
     dff, x_title, y_title = filter_data(
-        global_df, age_mode, min_mrr, max_mrr, min_growth, max_growth, show_churn, swap_axes, removed_list
+        global_df, age_mode, min_mrr, max_mrr, min_growth, max_growth, show_churn, swap_axes, removed_list, risk_levels
     )
 
     total_count = len(dff)
@@ -536,12 +550,31 @@ def update_dashboard(selected_mode, tools_list, age_mode, min_mrr, max_mrr, min_
         if m is not None:
             x_range = np.linspace(calc_df['Plot_X'].min(), calc_df['Plot_X'].max(), 100)
             y_range = m * x_range + b
+            # R² / eğim standart hatası aynı toplamlardan gelir (ek geçiş yok)
+            trend_name = f'Trend ({m:.4f}'
+            if reg_result.get('r2') is not None:
+                trend_name += f", R²={reg_result['r2']:.3f}"
+            if reg_result.get('se') is not None:
+                trend_name += f", SE={reg_result['se']:.3g}"
             fig.add_trace(go.Scatter(
-                x=x_range, y=y_range, mode='lines', name=f'Trend ({m:.4f})',
+                x=x_range, y=y_range, mode='lines', name=trend_name + ')',
                 line=dict(color='#d62728', width=2.5, dash='dash'),
                 legendgroup="group_indicators", legendgrouptitle_text="📊 INDICATORS"
             ))
 
+    # --- SECTOR TRENDS (tüm sektörler tek gruplu en küçük kareler geçişiyle) ---
+    if 'sector_trends' in tools_list and selected_mode in ('All', 'Sector Avg'):
+        trends = calculate_sector_regressions(dff, 'Plot_X', y_col='Plot_Y')
+        x_bounds = dff.groupby('Company Sector')['Plot_X'].agg(['min', 'max'])
+        for sec_name, line in trends.items():
+            x_range = np.array([x_bounds.at[sec_name, 'min'], x_bounds.at[sec_name, 'max']])
+            fig.add_trace(go.Scatter(
+                x=x_range, y=line['m'] * x_range + line['b'], mode='lines',
+                name=f"{sec_name} ({line['m']:.4f})",
+                line=dict(color=color_map.get(sec_name, '#333'), width=1.5, dash='dash'),
+                legendgroup="group_sector_trends", legendgrouptitle_text="📈 SECTOR TRENDS"
+            ))
+
     # --- LAYOUT ---
     mean_x = dff['Plot_X'].mean()
     mean_y = dff['Plot_Y'].mean()
@@ -588,16 +621,17 @@ def update_dashboard(selected_mode, tools_list, age_mode, min_mrr, max_mrr, min_
 @app.callback(
     Output("download-dataframe-xlsx", "data"),
     Input("btn-export", "n_clicks"),
-    [State('sector-dropdown', 'value'), State('analysis-tools', 'value'), State('age-filter-mode', 'value'), State('limit-mrr-min', 'value'), State('limit-mrr-max', 'value'), State('limit-growth-min', 'value'), State('limit-growth-max', 'value'), State('axis-options', 'value'), State('removed-points-store', 'data')],
+    [State('sector-dropdown', 'value'), State('analysis-tools', 'value'), State('age-filter-mode', 'value'), State('limit-mrr-min', 'value'), State('limit-mrr-max', 'value'), State('limit-growth-min', 'value'), State('limit-growth-max', 'value'), State('axis-options', 'value'), State('removed-points-store', 'data'), State('risk-levels', 'value')],
     prevent_initial_call=True,
 )
-def export_data(n_clicks, selected_mode, tools_list, age_mode, min_mrr, max_mrr, min_growth, max_growth, axis_opts, removed_list):
+def export_data(n_clicks, selected_mode, tools_list, age_mode, min_mrr, max_mrr, min_growth, max_growth, axis_opts, removed_list, risk_levels):
     if not n_clicks: return dash.no_update
     swap_axes = 'swap' in axis_opts
     show_churn = 'show_churn' in tools_list
-    dff, _, _ = filter_data(global_df, age_mode, min_mrr, max_mrr, min_growth, max_growth, show_churn, swap_axes, removed_list)
+    dff, _, _ = filter_data(global_df, age_mode, min_mrr, max_mrr, min_growth, max_growth, show_churn, swap_axes, removed_list, risk_levels)
     if selected_mode != 'Sector Avg' and selected_mode != 'All':
         dff = dff[dff['Company Sector'] == selected_mode]
+    dff = drop_internal_columns(dff)
     return dcc.send_data_frame(dff.to_excel, "Analytics_Export.xlsx", sheet_name="Data")
 
 if __name__ == '__main__':
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Fark okları (Inc. -> Exc. License) için vektörel ok katmanı.
+
+Eski / yeni konumlar diziler halinde hesaplanır ve her ok grubu tek bir
+quiver olarak çizilir (müşteri başına annotate / FancyArrowPatch yok).
+Zoom seviyesinde üst üste binen oklar piksel ızgarasında tekilleştirilir
+(level-of-detail) ve toplam ok sayısı sınırlandırılır.
+"""
+import numpy as np
+
+# LOD: aynı piksel hücresine düşen oklardan sadece biri çizilir
+ARROW_LOD_CELL_PX = 6.0
+# LOD: bir grupta çizilecek en fazla ok (en uzunlar kalır)
+ARROW_LOD_MAX = 600
+
+def arrow_segments(x0, y0, x1, y1, swap_axes=False):
+    """
+    Ham (MRR, Growth) değerlerinden plot koordinatında ok başlangıç / bitişleri.
+    Sonlu olmayan satırlar atılır.
+    Dönüş: (starts (N, 2), ends (N, 2), ok) - ok: girdi satırları için maske
+    """
+    x0, y0, x1, y1 = (np.asarray(v, dtype=float).ravel() for v in (x0, y0, x1, y1))
+    if swap_axes:
+        starts = np.column_stack([y0, x0])
+        ends = np.column_stack([y1, x1])
+    else:
+        starts = np.column_stack([x0, y0])
+        ends = np.column_stack([x1, y1])
+
+    ok = np.isfinite(starts).all(axis=1) & np.isfinite(ends).all(axis=1)
+    return starts[ok], ends[ok], ok
+
+def moved_mask(starts, ends, min_move):
+    """Herhangi bir eksende min_move'dan fazla hareket eden oklar."""
+    return (np.abs(ends - starts) > min_move).any(axis=1)
+
+def thin_arrows(ax, starts, ends, cell_px=ARROW_LOD_CELL_PX, max_arrows=ARROW_LOD_MAX):
+    """
+    Görünür alandaki okları piksel ızgarasına göre tekilleştirir.
+    Başlangıç ve bitişi aynı hücrelere düşen oklardan ilki kalır; sonra
+    sayı max_arrows'u aşıyorsa ekranda en uzun olanlar seçilir.
+    """
+    if len(starts) == 0:
+        return starts, ends
+
+    to_px = ax.transData.transform
+    p0, p1 = to_px(starts), to_px(ends)
+
+    # Tamamen görünür alanın dışındaki oklar çizilmez
+    bb = ax.bbox
+    lo = np.minimum(p0, p1)
+    hi = np.maximum(p0, p1)
+    visible = (hi[:, 0] >= bb.x0) & (lo[:, 0] <= bb.x1) & (hi[:, 1] >= bb.y0) & (lo[:, 1] <= bb.y1)
+    idx = np.flatnonzero(visible)
+    if len(idx) == 0:
+        return starts[:0], ends[:0]
+
+    cells = np.floor(np.column_stack([p0[idx], p1[idx]]) / max(cell_px, 1e-9)).astype(np.int64)
+    _, first = np.unique(cells, axis=0, return_index=True)
+    idx = idx[np.sort(first)]
+
+    if max_arrows and len(idx) > max_arrows:
+        length = np.hypot(*(p1[idx] - p0[idx]).T)
+        idx = np.sort(idx[np.argsort(-length, kind="stable")[:max_arrows]])
+    return starts[idx], ends[idx]
+
+def draw_arrows(ax, starts, ends, lw=0.9, alpha=0.5, color="black", zorder=3):
+    """Ok grubunu tek bir quiver olarak çizer. Çizilecek ok yoksa None döner."""
+    if len(starts) == 0:
+        return None
+    delta = ends - starts
+    width = lw * ax.figure.dpi / 72.0
+    return ax.quiver(
+        starts[:, 0], starts[:, 1], delta[:, 0], delta[:, 1],
+        angles="xy", scale_units="xy", scale=1, units="dots", width=width,
+        headwidth=5, headlength=6, headaxislength=5.5,
+        color=color, alpha=alpha, zorder=zorder, clip_on=True, label="_nolegend_",
+    )
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Arka plan hesap yürütücüsü (compute executor).
+
+Filtre / istatistik işleri bir iş parçacığı havuzunda çalışır; sonuç Tk ana
+döngüsüne root.after ile yapılan yoklama (polling) üzerinden teslim edilir
+(Tk nesnelerine sadece ana iş parçacığından dokunulur). Aynı isimle yeni bir
+iş gönderilince eskisi geçersiz sayılır: henüz başlamadıysa iptal edilir,
+başladıysa sonucu çöpe atılır. Böylece art arda gelen tuş / zoom olaylarında
+sadece en son durum çizilir.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+# Sonuç kontrol aralığı (ms)
+COMPUTE_POLL_MS = 15
+
+def create_compute_executor(root, max_workers=2, poll_ms=COMPUTE_POLL_MS):
+    """Yürütücü durumu (dict): havuz ve iş adı -> bekleyen (en son) iş."""
+    return {
+        "root": root,
+        "pool": ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="compute"),
+        "poll_ms": poll_ms,
+        "pending": {},    # iş adı -> (iş numarası, future, on_done, on_error)
+        "seq": 0,
+    }
+
+def submit_job(executor, name, func, on_done, on_error=None):
+    """
+    func'ı arka planda çalıştırır; bittiğinde ana döngüde on_done(sonuç) çağrılır.
+    Aynı isimli bekleyen iş varsa iptal edilir (superseded).
+    Dönüş: iş numarası
+    """
+    executor["seq"] += 1
+    job_id = executor["seq"]
+    cancel_job(executor, name)
+
+    future = executor["pool"].submit(func)
+    executor["pending"][name] = (job_id, future, on_done, on_error)
+    executor["root"].after(executor["poll_ms"], lambda: _poll(executor, name, job_id))
+    return job_id
+
+def cancel_job(executor, name):
+    """Bekleyen işi geçersiz kılar (başlamadıysa havuzdan da düşer)."""
+    job = executor["pending"].pop(name, None)
+    if job is not None:
+        job[1].cancel()
+
+def is_job_pending(executor, name):
+    return name in executor["pending"]
+
+def _poll(executor, name, job_id):
+    job = executor["pending"].get(name)
+    # Yerine yenisi geldiyse veya iptal edildiyse bu yoklama sessizce biter
+    if job is None or job[0] != job_id:
+        return
+
+    _, future, on_done, on_error = job
+    if not future.done():
+        executor["root"].after(executor["poll_ms"], lambda: _poll(executor, name, job_id))
+        return
+
+    executor["pending"].pop(name, None)
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        if on_error is not None:
+            on_error(error)
+        else:
+            print(f"Compute Error ({name}): {error}")
+        return
+    on_done(future.result())
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Temizlenmiş veri için ikili (binary) önbellek.
+
+load_and_clean_data çıktısı (Effective MRR, MRR Growth (%) dahil) Excel
+dosyasının yanında .cache klasörüne yazılır. Anahtar: dosya yolu, boyut,
+mtime ve içerik hash'i. Önbellek geçerliyse read_excel hiç çalışmaz;
+eskiyse Excel okunur ve önbellek arka planda yeniden yazılır.
+
+Biçim: tek bir .npz (np.load allow_pickle=False ile okunur). Sayısal / bool /
+tarih kolonları dizi olarak, metin ve karışık kolonlar JSON olarak tutulur;
+sürüm, kaynak anahtarı ve kolon tipleri JSON başlıktadır. Dosyayı okumak
+kod çalıştırmaz (pickle kullanılmaz).
+"""
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_ops import load_and_clean_data
+
+# Temizleme mantığı değişirse artırılmalı (eski önbellekler geçersiz olur)
+CACHE_VERSION = 4
+CACHE_DIR_NAME = ".cache"
+
+def get_cache_path(file_path):
+    """Excel dosyası için önbellek dosyasının yolu."""
+    folder, name = os.path.split(os.path.abspath(file_path))
+    return os.path.join(folder, CACHE_DIR_NAME, name + ".cleaned.npz")
+
+def _file_hash(file_path):
+    h = hashlib.sha1()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _source_key(file_path, with_hash=True):
+    st = os.stat(file_path)
+    return {
+        "path": os.path.abspath(file_path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha1": _file_hash(file_path) if with_hash else None,
+    }
+
+def _json_value(value):
+    """Karışık (object) kolon değerleri için JSON dönüşümü; desteklenmeyen tipte hata verir."""
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    raise TypeError(f"Cache: unsupported value type {type(value).__name__}")
+
+def _encode_series(values, arrays, key):
+    """Kolon / index için başlık kaydı; dizi gerekiyorsa arrays[key]'e koyar."""
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        arrays[key] = pd.Categorical(values).codes
+        return {"kind": "category", "ordered": bool(dtype.ordered),
+                "categories": _encode_series(dtype.categories, arrays, key + "_cat")}
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufcmM":
+        arrays[key] = np.asarray(values)
+        return {"kind": "array"}
+    return {"kind": "values", "dtype": str(dtype), "values": np.asarray(values, dtype=object).tolist()}
+
+def _decode_series(meta, arrays, key):
+    if meta["kind"] == "category":
+        categories = pd.Index(_decode_series(meta["categories"], arrays, key + "_cat"))
+        return pd.Categorical.from_codes(arrays[key], categories=categories, ordered=meta["ordered"])
+    if meta["kind"] == "array":
+        return arrays[key]
+    return pd.array(meta["values"], dtype=meta["dtype"])
+
+def _read_cache(cache_path):
+    try:
+        with np.load(cache_path, allow_pickle=False) as npz:
+            arrays = {name: npz[name] for name in npz.files}
+        header = json.loads(arrays.pop("header").tobytes().decode("utf-8"))
+        if not isinstance(header, dict) or header.get("version") != CACHE_VERSION:
+            return None
+        index = header["index"]
+        if index["kind"] == "range":
+            idx = pd.RangeIndex(index["start"], index["stop"], index["step"])
+        else:
+            idx = pd.Index(_decode_series(index, arrays, "index"))
+        columns = {}
+        for i, (name, meta) in enumerate(zip(header["columns"], header["dtypes"])):
+            columns[name] = pd.Series(_decode_series(meta, arrays, f"c{i}"), index=idx, copy=False)
+        df = pd.DataFrame(columns, index=idx)
+    except Exception:
+        return None
+    return {"version": CACHE_VERSION, "source": header.get("source", {}), "df": df}
+
+def _write_cache(cache_path, source, df):
+    """Önce geçici dosyaya yazar, sonra atomik olarak yerine koyar."""
+    try:
+        if not df.columns.is_unique or not all(isinstance(c, str) for c in df.columns):
+            raise TypeError("Cache: column names must be unique strings")
+        arrays = {}
+        if isinstance(df.index, pd.RangeIndex):
+            index = {"kind": "range", "start": df.index.start, "stop": df.index.stop, "step": df.index.step}
+        else:
+            index = _encode_series(df.index, arrays, "index")
+        dtypes = [_encode_series(df.iloc[:, i], arrays, f"c{i}") for i in range(df.shape[1])]
+        header = {"version": CACHE_VERSION, "source": source, "index": index,
+                  "columns": list(df.columns), "dtypes": dtypes}
+        arrays["header"] = np.frombuffer(json.dumps(header, default=_json_value).encode("utf-8"), dtype=np.uint8)
+
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        print(f"Cache Write Error: {e}")
+
+def _write_cache_async(cache_path, source, df):
+    # Kopya: arka plan yazarken uygulama df'i değiştirebilir
+    t = threading.Thread(target=_write_cache, args=(cache_path, source, df.copy()), daemon=True)
+    t.start()
+    return t
+
+def load_cleaned_data_cached(file_path, use_cache=True):
+    """
+    load_and_clean_data ile aynı DataFrame'i döndürür.
+    Önbellek yol + boyut + (mtime veya içerik hash'i) tutuyorsa oradan okunur,
+    tutmuyorsa Excel okunur ve önbellek arka planda yenilenir.
+    """
+    if not use_cache:
+        return load_and_clean_data(file_path)
+
+    cache_path = get_cache_path(file_path)
+    try:
+        source = _source_key(file_path, with_hash=False)
+    except OSError:
+        # Dosya yoksa hata mesajı load_and_clean_data'dan gelsin
+        return load_and_clean_data(file_path)
+
+    payload = _read_cache(cache_path)
+    if payload is not None:
+        cached = payload.get("source", {})
+        if cached.get("path") == source["path"] and cached.get("size") == source["size"]:
+            if cached.get("mtime_ns") == source["mtime_ns"]:
+                return payload["df"]
+            # Sadece mtime değişmiş (kopyalama, touch): içerik aynıysa geçerli
+            source["sha1"] = _file_hash(file_path)
+            if cached.get("sha1") == source["sha1"]:
+                _write_cache_async(cache_path, source, payload["df"])
+                return payload["df"]
+
+    df = load_and_clean_data(file_path)
+    if source["sha1"] is None:
+        source["sha1"] = _file_hash(file_path)
+    _write_cache_async(cache_path, source, df)
+    return df
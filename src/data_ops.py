@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
-from utils import to_plot_coords
+from utils import to_plot_coords, parse_number_entry
+from quadrants import quadrant_labels
 
 # --- SABİTLER (Senin kodundan aldım) ---
 CHURN_COL = 'Churn'
@@ -9,6 +10,43 @@ EFFECTIVE_MRR_COL = 'Effective MRR'
 CURRENT_MRR_COL = 'Current MRR'
 BASE_MRR_FALLBACK_COL = 'First Year Ending MRR'
 RISK_COL = 'Customer Risk'
+SECTOR_COL = 'Company Sector'
+CHURN_DATE_COL = 'Churn Date'
+FIRST_YEAR_FLAG_COL = 'DoesCustomerCompleteItsFirstYear'
+SECOND_YEAR_FLAG_COL = 'DoesCustomersCompleteItsSecondYear'
+LICENSE_PERCENT_COL = 'License Percent'
+
+# --- Tipli (normalize) kolonlar ---
+# load_and_clean_data bunları bir kere üretir; filtreler string işlemleri
+# yerine doğrudan bu kolonlardan maske alır. Orijinal kolonlar (gösterim /
+# export için) olduğu gibi kalır.
+IS_CHURN_COL = '_is_churn'              # bool
+FIRST_YEAR_DONE_COL = '_first_year_done'    # bool
+SECOND_YEAR_DONE_COL = '_second_year_done'  # bool
+RISK_CODE_COL = '_risk_code'            # category (strip + upper)
+SECTOR_CODE_COL = '_sector_code'        # category
+CHURN_DATE_PARSED_COL = '_churn_date'   # datetime64 (ör. "APR.25")
+LICENSE_VALUE_COL = '_license_value'    # float64 (License Percent, sayı değilse NaN)
+INTERNAL_COLS = (IS_CHURN_COL, FIRST_YEAR_DONE_COL, SECOND_YEAR_DONE_COL, RISK_CODE_COL,
+                 SECTOR_CODE_COL, CHURN_DATE_PARSED_COL, LICENSE_VALUE_COL)
+
+# Güncellenmiş Growth kolonu adayları (get_updated_y_col_if_any, öncelik sırasıyla)
+UPDATED_GROWTH_COLS = (
+    'Exc. License Growth (%)',
+    'Updated Growth (%)',
+    'MRR Growth Updated (%)',
+    'New MRR Growth (%)',
+    'Growth Updated (%)',
+)
+# normalize_schema'nın float64'e çevirdiği bilinen MRR / Growth kolonları
+NUMERIC_SCHEMA_COLS = (
+    'Starting MRR', BASE_MRR_FALLBACK_COL, 'Second Year Ending MRR', CURRENT_MRR_COL,
+    'MRR Growth', 'MRR Growth (0-1)', 'MRR Growth (0-2)', 'MRR Growth(1-2)', 'MRR Growth (0-today)',
+    'Exc. License MRR', 'First Year Ending Exc. License MRR', 'Second Year Ending Exc. License MRR',
+    CHURNED_MRR_COL,
+) + UPDATED_GROWTH_COLS
+
+RISK_LEVELS = ("NO RISK", "LOW RISK", "MEDIUM RISK", "HIGH RISK", "BOOKED CHURN")
 
 def tr_lower(text):
     """Türkçe karakter uyumlu küçük harfe çevirme."""
@@ -17,6 +55,16 @@ def tr_lower(text):
     text = text.replace("İ", "i").replace("I", "ı")
     return text.lower()
 
+def search_fold(text):
+    """
+    Arama indeksi ve sorguları için ortak normalizasyon: tr_lower + i / ı ayrımı yok.
+    tr_lower ile de casefold ile de eşleşen isimler bununla da eşleşir
+    (ör. "inv" -> "INVEX", "teknosa i" -> "TEKNOSA İ").
+    """
+    if not text:
+        return ""
+    return tr_lower(text).replace("ı", "i").replace("\u0307", "").casefold()
+
 def load_and_clean_data(file_path):
     """
     Excel dosyasını okur, gerekli kolonları oluşturur ve temizler.
@@ -43,14 +91,116 @@ def load_and_clean_data(file_path):
 
     df[EFFECTIVE_MRR_COL] = base_mrr_series.astype(float)
 
-    # 4. Churn Olanların MRR'ını Güncelle
+    # 4. Tipli şema (bool / category / float64 / datetime)
+    df = normalize_schema(df)
+
+    # 5. Churn Olanların MRR'ını Güncelle
     # Eğer müşteri Churn ise, 'Effective MRR' değeri 'Churned MRR' olmalı
     if (CHURN_COL in df.columns) and (CHURNED_MRR_COL in df.columns):
-        churn_mask = df[CHURN_COL].astype(str).str.upper().eq("CHURN")
-        df.loc[churn_mask, EFFECTIVE_MRR_COL] = df.loc[churn_mask, CHURNED_MRR_COL].astype(float)
+        churn_mask = df[IS_CHURN_COL]
+        df.loc[churn_mask, EFFECTIVE_MRR_COL] = df.loc[churn_mask, CHURNED_MRR_COL]
 
     return df
 
+def normalize_schema(df):
+    """
+    Sık kullanılan bayrakları bir kere tipli kolonlara çevirir:
+    churn / yaş tamamlama -> bool, risk ve sektör -> category,
+    bilinen MRR ve Growth kolonları (NUMERIC_SCHEMA_COLS) -> float64, Churn Date -> datetime,
+    License Percent -> float64.
+    """
+    for col in NUMERIC_SCHEMA_COLS:
+        if col in df.columns and df[col].dtype != np.float64:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(np.float64)
+
+    if CHURN_COL in df.columns:
+        df[IS_CHURN_COL] = df[CHURN_COL].astype(str).str.upper().eq("CHURN").to_numpy()
+    else:
+        df[IS_CHURN_COL] = False
+
+    for flag_col, done_col in ((FIRST_YEAR_FLAG_COL, FIRST_YEAR_DONE_COL),
+                               (SECOND_YEAR_FLAG_COL, SECOND_YEAR_DONE_COL)):
+        if flag_col in df.columns:
+            df[done_col] = df[flag_col].astype(str).str.upper().eq("YES").to_numpy()
+
+    if RISK_COL in df.columns:
+        codes = df[RISK_COL].fillna("").astype(str).str.strip().str.upper()
+        extra = sorted(set(codes.unique()) - set(RISK_LEVELS))
+        df[RISK_CODE_COL] = pd.Categorical(codes, categories=list(RISK_LEVELS) + extra)
+
+    if SECTOR_COL in df.columns:
+        df[SECTOR_CODE_COL] = df[SECTOR_COL].astype("category")
+
+    if CHURN_DATE_COL in df.columns:
+        # Excel'de "APR.25" gibi metin veya gerçek tarih olabilir
+        raw = df[CHURN_DATE_COL]
+        parsed = pd.to_datetime(raw.astype(str).str.strip(), format="%b.%y", errors="coerce")
+        fallback = pd.to_datetime(raw.where(parsed.isna()), errors="coerce", format="mixed")
+        df[CHURN_DATE_PARSED_COL] = parsed.fillna(fallback)
+
+    if LICENSE_PERCENT_COL in df.columns:
+        df[LICENSE_VALUE_COL] = parse_license_percent(df[LICENSE_PERCENT_COL])
+
+    return df
+
+def _parse_license_value(raw_val):
+    """Tek License Percent hücresi -> float; boş / rakamsız ("CHURN") / hatalı -> NaN."""
+    if pd.isna(raw_val):
+        return np.nan
+    if isinstance(raw_val, str):
+        cleaned = raw_val.strip()
+        if not any(ch.isdigit() for ch in cleaned):
+            return np.nan
+        return parse_number_entry(cleaned)
+    try:
+        return float(raw_val)
+    except Exception:
+        return np.nan
+
+def parse_license_percent(series):
+    """
+    Karışık tipli (sayı / metin) License Percent kolonunu float64'e çevirir.
+    Metin hücreler benzersiz değer başına bir kere parse edilir.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(np.float64)
+    uniques = pd.unique(series)
+    lookup = {v: _parse_license_value(v) for v in uniques if not pd.isna(v)}
+    return series.map(lookup).astype(np.float64)
+
+def get_license_removed_mask(df_in, min_license, reverse=False):
+    """
+    License eşiği filtresinde gizlenecek satırlar (df_in index'ine hizalı bool dizi).
+    Normalde License Percent > eşik olanlar, reverse ise <= eşik olanlar gizlenir.
+    Churn satırları ve License Percent'i sayı olmayanlar hiç gizlenmez.
+    """
+    if LICENSE_VALUE_COL in df_in.columns:
+        values = df_in[LICENSE_VALUE_COL].to_numpy(dtype=float)
+    elif LICENSE_PERCENT_COL in df_in.columns:
+        values = parse_license_percent(df_in[LICENSE_PERCENT_COL]).to_numpy(dtype=float)
+    else:
+        return np.zeros(len(df_in), dtype=bool)
+
+    # NaN karşılaştırmaları False döner, sayı olmayanlar kendiliğinden dışarıda kalır
+    removed = (values <= min_license) if reverse else (values > min_license)
+    return removed & ~get_churn_mask(df_in).to_numpy()
+
+def get_churn_mask(df_in):
+    """Churn satırları için index'e hizalı bool Series (tipli kolon varsa string işlemi yok)."""
+    if IS_CHURN_COL in df_in.columns:
+        return df_in[IS_CHURN_COL].astype(bool)
+    if CHURN_COL in df_in.columns:
+        return df_in[CHURN_COL].astype(str).str.upper().eq("CHURN")
+    return pd.Series(False, index=df_in.index)
+
+def get_age_done_mask(df_in, flag_col):
+    """Yaş tamamlama (Yes/No) kolonu için bool Series."""
+    done_col = {FIRST_YEAR_FLAG_COL: FIRST_YEAR_DONE_COL,
+                SECOND_YEAR_FLAG_COL: SECOND_YEAR_DONE_COL}.get(flag_col)
+    if done_col in df_in.columns:
+        return df_in[done_col].astype(bool)
+    return df_in[flag_col].astype(str).str.upper().eq("YES")
+
 def get_point_key(row, settings_state):
     """
     Nokta kimliği: (Index, Effective MRR, MRR Growth (%))
@@ -85,39 +235,51 @@ def get_point_key(row, settings_state):
     except Exception:
         return (row.name, 0.0, 0.0)
     
-def get_limit_removed_keys(df, settings_state):
+def get_limit_removed_mask(df, settings_state, point_index=None):
     """
-    Limit modunda (Min/Max filtreleri) gizlenmesi gereken noktaların
-    key'lerini (set olarak) döndürür.
+    Limit modunda (Min/Max filtreleri) dışarıda kalan satırlar için boolean maske.
+    Karşılaştırma get_point_key anahtarlarının (x, y) değerleri üzerinden yapılır.
     """
     if settings_state.get("mode") != "limit":
-        return set()
-    
+        return np.zeros(len(df), dtype=bool)
+
+    if point_index is None:
+        point_index = build_point_key_index(df)
+    _, x, y = point_key_arrays(point_index, settings_state, df.index)
+
     mrr_min = settings_state.get("mrr_min", None)
     mrr_max = settings_state.get("mrr_max", None)
     gy_min = settings_state.get("growth_min", None)
     gy_max = settings_state.get("growth_max", None)
-    
-    s = set()
-    for _, row in df.iterrows():
-        # get_point_key bu dosyanın içinde olduğu için direkt çağırabiliriz
-        key = get_point_key(row, settings_state)
-        
-        # key yapısı: (index, x_val, y_val)
-        # Eğer tuple 3 elemanlıysa parçala, değilse (nadiren) atla
-        if isinstance(key, tuple) and len(key) == 3:
-            idx, x, y = key
-            
-            out = False
-            if mrr_min is not None and x < mrr_min: out = True
-            if mrr_max is not None and x > mrr_max: out = True
-            if gy_min is not None and y < gy_min:   out = True
-            if gy_max is not None and y > gy_max:   out = True
-            
-            if out:
-                s.add(key)
-                
-    return s  
+
+    out = np.zeros(len(df), dtype=bool)
+    if mrr_min is not None: out |= x < mrr_min
+    if mrr_max is not None: out |= x > mrr_max
+    if gy_min is not None:  out |= y < gy_min
+    if gy_max is not None:  out |= y > gy_max
+    return out
+
+def get_limit_removed_keys(df, settings_state, point_index=None):
+    """
+    Limit modunda (Min/Max filtreleri) gizlenmesi gereken noktaların
+    key'lerini (set olarak) döndürür.
+    """
+    if settings_state.get("mode") != "limit":
+        return set()
+
+    if point_index is None:
+        point_index = build_point_key_index(df)
+    mask = get_limit_removed_mask(df, settings_state, point_index)
+    return set(point_keys_for(point_index, settings_state, df.index, mask))
+
+# Risk kodu -> settings_state anahtarı (listede olmayan kodlar her zaman gösterilir)
+RISK_SETTING_KEYS = {
+    "NO RISK": "risk_show_no",
+    "LOW RISK": "risk_show_low",
+    "MEDIUM RISK": "risk_show_med",
+    "HIGH RISK": "risk_show_high",
+    "BOOKED CHURN": "risk_show_booked",
+}
 
 def is_risk_allowed(risk_val, settings_state):
     """
@@ -126,38 +288,69 @@ def is_risk_allowed(risk_val, settings_state):
     # Gelen değer boşsa veya tanımsızsa string'e çevirip temizle
     val = (str(risk_val or "")).strip().upper()
     
-    if val == "NO RISK":        return settings_state.get("risk_show_no", True)
-    if val == "LOW RISK":       return settings_state.get("risk_show_low", True)
-    if val == "MEDIUM RISK":    return settings_state.get("risk_show_med", True)
-    if val == "HIGH RISK":      return settings_state.get("risk_show_high", True)
-    if val == "BOOKED CHURN":   return settings_state.get("risk_show_booked", True)
-    
     # Tanımsız bir risk durumu varsa varsayılan olarak göster
-    return True
-
-def apply_churn_filters(df_in, settings_state):
+    key = RISK_SETTING_KEYS.get(val)
+    return settings_state.get(key, True) if key else True
+
+def risk_settings_from_levels(levels):
+    """Seçili risk seviyeleri listesinden (ör. Dash checklist) risk_show_* ayarları üretir."""
+    levels = {str(v).strip().upper() for v in (levels or [])}
+    return {key: (name in levels) for name, key in RISK_SETTING_KEYS.items()}
+
+def get_risk_codes(df_in):
+    """Normalize risk kodu (category). load_and_clean_data'dan geçmeyen veride anında üretilir."""
+    if RISK_CODE_COL in df_in.columns:
+        return df_in[RISK_CODE_COL]
+    codes = df_in[RISK_COL].fillna("").astype(str).str.strip().str.upper()
+    return codes.astype("category")
+
+def build_risk_lookup(categories, settings_state):
+    """Her risk kategorisi için izin (bool) tablosu: lookup[kod] -> göster/gizle."""
+    return np.array([is_risk_allowed(cat, settings_state) for cat in categories], dtype=bool)
+
+def get_risk_allowed_mask(df_in, settings_state):
     """
-    Include / Show Only durumuna göre churn satırlarını filtreler.
+    Risk filtresi: risk_show_* ayarları kategori kodları üzerinden tek bir
+    lookup.take ile maskeye çevrilir. Dönüş: index'e hizalı bool Series.
     """
+    if RISK_COL not in df_in.columns and RISK_CODE_COL not in df_in.columns:
+        return pd.Series(True, index=df_in.index)
+    codes = get_risk_codes(df_in)
+    lookup = build_risk_lookup(codes.cat.categories, settings_state)
+    # Kod -1 (NaN) -> tanımsız risk, göster
+    lookup = np.append(lookup, True)
+    return pd.Series(lookup.take(codes.cat.codes.to_numpy()), index=df_in.index)
+
+def drop_internal_columns(df_in):
+    """Tipli yardımcı kolonları (INTERNAL_COLS) export / tablo çıktısından çıkarır."""
+    internal = [c for c in INTERNAL_COLS if c in df_in.columns]
+    return df_in.drop(columns=internal) if internal else df_in
+
+def churn_keep_mask(df_in, settings_state):
+    """
+    apply_churn_filters'ın tuttuğu satırlar: index'e hizalı bool dizi
+    (tipli churn kolonundan, DataFrame kopyalamadan).
+    """
+    n = len(df_in)
     # CHURN_COL sabitine bu dosya içinden erişilebilir
     if CHURN_COL not in df_in.columns:
-        return df_in
-
-    churn_enabled = settings_state.get("churn_enabled", True)
-    show_only = settings_state.get("show_only_churn", False)
+        return np.ones(n, dtype=bool)
 
-    # Büyük/küçük harf duyarlılığı olmasın diye upper() kullanıyoruz
-    col = df_in[CHURN_COL].astype(str).str.upper()
-
-    if show_only:
+    if settings_state.get("show_only_churn", False):
         # Sadece Churn olanları göster
-        return df_in[col.eq("CHURN")]
-    elif not churn_enabled:
+        return get_churn_mask(df_in).to_numpy(dtype=bool)
+    if not settings_state.get("churn_enabled", True):
         # Churn olanları gizle (Sadece aktifler)
-        return df_in[~col.eq("CHURN")]
-    else:
-        # Hepsini göster
-        return df_in
+        return ~get_churn_mask(df_in).to_numpy(dtype=bool)
+    # Hepsini göster
+    return np.ones(n, dtype=bool)
+
+def apply_churn_filters(df_in, settings_state):
+    """
+    Include / Show Only durumuna göre churn satırlarını filtreler.
+    """
+    keep = churn_keep_mask(df_in, settings_state)
+    return df_in if keep.all() else df_in[keep]
 
 # --- Age Constants ---
 AGE_MODE_0_CURRENT = "0-Current"
@@ -169,29 +362,134 @@ def get_age_filter_mode(settings_state):
     """Settings içindeki aktif yaş filtresi modu."""
     return settings_state.get("age_filter_mode", AGE_MODE_0_CURRENT)
 
-def apply_age_filters(df_in, settings_state):
+def age_keep_mask(df_in, settings_state):
     """
-    Yaş filtresine göre satırları filtreler:
+    Yaş filtresinin tuttuğu satırlar: index'e hizalı bool dizi.
     - 0-Current: hiç filtre yok (herkes görünür)
     - 0-1: DoesCustomerCompleteItsFirstYear = Yes olmalı
     - 0-2 / 1-2: DoesCustomersCompleteItsSecondYear = Yes olmalı
     """
     mode = get_age_filter_mode(settings_state)
-    df_out = df_in.copy()
-
+    col = None
     if mode == AGE_MODE_0_1:
-        col = "DoesCustomerCompleteItsFirstYear"
-        if col in df_out.columns:
-            mask = df_out[col].astype(str).str.upper().eq("YES")
-            df_out = df_out[mask]
-
+        col = FIRST_YEAR_FLAG_COL
     elif mode in (AGE_MODE_0_2, AGE_MODE_1_2):
-        col = "DoesCustomersCompleteItsSecondYear"
-        if col in df_out.columns:
-            mask = df_out[col].astype(str).str.upper().eq("YES")
-            df_out = df_out[mask]
+        col = SECOND_YEAR_FLAG_COL
+    if col is None or col not in df_in.columns:
+        return np.ones(len(df_in), dtype=bool)
+    return get_age_done_mask(df_in, col).to_numpy(dtype=bool)
 
-    return df_out  
+def apply_age_filters(df_in, settings_state):
+    """Yaş filtresine göre satırları filtreler (kurallar: age_keep_mask)."""
+    return df_in[age_keep_mask(df_in, settings_state)].copy()
+
+# --- Nokta Anahtarı İndeksi (Vektörel get_point_key) ---
+# get_point_key'in yaş moduna göre okuduğu (X, Y) kolonları.
+# Listede olmayan modlar (0-Current) Effective MRR / MRR Growth (%) kullanır.
+AGE_MODE_KEY_COLUMNS = {
+    AGE_MODE_0_1: ("First Year Ending MRR", "MRR Growth (0-1)"),
+    AGE_MODE_0_2: ("Second Year Ending MRR", "MRR Growth (0-2)"),
+    AGE_MODE_1_2: ("Second Year Ending MRR", "MRR Growth(1-2)"),
+}
+
+def _key_coord_arrays(df, x_col, y_col, y_scale):
+    """
+    Tek bir yaş modu için anahtar koordinatlarını (x, y) numpy dizisi olarak üretir.
+    get_point_key gibi: sayıya çevrilemeyen satır (0.0, 0.0) olur.
+    """
+    n = len(df)
+    if x_col not in df.columns or y_col not in df.columns:
+        return np.zeros(n), np.zeros(n)
+
+    x_raw = df[x_col]
+    y_raw = df[y_col]
+    x = pd.to_numeric(x_raw, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    y = pd.to_numeric(y_raw, errors="coerce").to_numpy(dtype=float, na_value=np.nan) * y_scale
+
+    # Orijinal değer dolu ama sayıya çevrilemiyorsa float() hata verirdi -> (0, 0)
+    bad = (np.isnan(x) & x_raw.notna().to_numpy()) | (np.isnan(y) & y_raw.notna().to_numpy())
+    if bad.any():
+        x[bad] = 0.0
+        y[bad] = 0.0
+    return x, y
+
+def build_point_key_index(df):
+    """
+    get_point_key'in ürettiği (index, x, y) anahtarlarını tüm yaş modları için
+    kolon dizileri halinde bir kere hesaplar.
+    Dönüş: {"ids": df.index, "modes": {yaş_modu: (x_dizisi, y_dizisi)}}
+    """
+    base_x_col = EFFECTIVE_MRR_COL if EFFECTIVE_MRR_COL in df.columns else BASE_MRR_FALLBACK_COL
+    base = _key_coord_arrays(df, base_x_col, 'MRR Growth (%)', 1.0)
+
+    modes = {AGE_MODE_0_CURRENT: base}
+    for mode, (x_col, y_col) in AGE_MODE_KEY_COLUMNS.items():
+        if x_col in df.columns and y_col in df.columns:
+            modes[mode] = _key_coord_arrays(df, x_col, y_col, 100.0)
+        else:
+            # Kolonlar yoksa get_point_key de 0-Current değerlerine düşer
+            modes[mode] = base
+
+    return {"ids": df.index, "modes": modes}
+
+def _index_positions(point_index, labels):
+    """labels (alt DataFrame index'i) için ana df içindeki satır pozisyonları."""
+    if labels is None:
+        return None
+    return point_index["ids"].get_indexer(labels)
+
+def point_key_arrays(point_index, settings_state, labels=None):
+    """
+    Aktif yaş modunda (ids, x, y) dizilerini döndürür.
+    labels verilirse sadece o satırlar, verilen sırada döner.
+    """
+    modes = point_index["modes"]
+    x, y = modes.get(get_age_filter_mode(settings_state), modes[AGE_MODE_0_CURRENT])
+    ids = point_index["ids"]
+
+    pos = _index_positions(point_index, labels)
+    if pos is None:
+        return ids, x, y
+    return ids[pos], x[pos], y[pos]
+
+def point_keys_for(point_index, settings_state, labels=None, mask=None):
+    """
+    get_point_key ile birebir aynı tuple anahtarları toplu olarak üretir.
+    mask verilirse (labels'a hizalı boolean dizi) sadece True olan satırlar döner.
+    """
+    ids, x, y = point_key_arrays(point_index, settings_state, labels)
+    if mask is not None:
+        mask = np.asarray(mask, dtype=bool)
+        ids, x, y = ids[mask], x[mask], y[mask]
+    return list(zip(ids.tolist(), x.tolist(), y.tolist()))
+
+def point_keys_mask(point_index, settings_state, keys, labels=None):
+    """
+    keys kümesindeki anahtarlara denk gelen satırlar için True olan boolean maske.
+    Satır başına Python çağrısı yerine anahtar başına tek bir vektörel eşleştirme yapar.
+    labels verilirse maske o satırlara hizalanır (ör. visible_df.index).
+    """
+    ids, x, y = point_key_arrays(point_index, settings_state)
+    mask = np.zeros(len(ids), dtype=bool)
+
+    # Sadece (index, x, y) yapısındaki anahtarlar satır eşleşebilir
+    # (SEC_AVG|... ve (x, y) Avg anahtarları hiçbir satıra denk gelmez)
+    triples = [k for k in keys if isinstance(k, tuple) and len(k) == 3]
+    if triples:
+        k_ids, k_x, k_y = zip(*triples)
+        pos = ids.get_indexer(list(k_ids))
+        k_x = np.asarray(k_x, dtype=float)
+        k_y = np.asarray(k_y, dtype=float)
+
+        found = pos >= 0
+        pos = pos[found]
+        same = (x[pos] == k_x[found]) & (y[pos] == k_y[found])
+        mask[pos[same]] = True
+
+    pos = _index_positions(point_index, labels)
+    if pos is None:
+        return mask
+    return mask[pos]
 
 def get_growth_source_col_for_age_mode(settings_state, df_columns):
     """
@@ -257,11 +555,7 @@ def calculate_churn_stats(df_sub):
         return 0.0, 0.0, 0.0, 0
 
     # Churn Maskesi Oluştur
-    if CHURN_COL in df_sub.columns:
-        churn_col = df_sub[CHURN_COL].astype(str).str.upper()
-        churn_mask = churn_col.eq("CHURN")
-    else:
-        churn_mask = pd.Series(False, index=df_sub.index)
+    churn_mask = get_churn_mask(df_sub)
 
     active_mask = ~churn_mask
 
@@ -283,11 +577,34 @@ def calculate_churn_stats(df_sub):
 
     return float(churned_mrr), float(total_mrr), float(ratio_pct), churn_count   
 
-def get_visible_customer_names(df, settings_state, current_sector, hidden_keys, prefix):
+def get_search_visible_mask(df, settings_state, current_sector, hidden_keys, point_index=None):
+    """
+    Arama sonuçları için görünür satırlar (df'e hizalı bool dizi):
+    gizli noktalar -> churn -> yaş -> (tek sektör görünümünde) sektör + risk.
+    """
+    if point_index is None:
+        point_index = build_point_key_index(df)
+    mask = ~point_keys_mask(point_index, settings_state, hidden_keys, df.index)
+
+    # Churn ve yaş filtreleri satır bazlı; tipli kolonlardan doğrudan maske
+    mask &= churn_keep_mask(df, settings_state)
+    mask &= age_keep_mask(df, settings_state)
+
+    if current_sector not in ("All", "Sector Avg"):
+        if 'Company Sector' in df.columns:
+            mask &= (df['Company Sector'] == current_sector).to_numpy()
+
+        if is_risk_view_active(current_sector, df.columns, settings_state) and (RISK_COL in df.columns):
+            mask &= get_risk_allowed_mask(df, settings_state).to_numpy()
+
+    return mask
+
+def get_visible_customer_names(df, settings_state, current_sector, hidden_keys, prefix, point_index=None):
     """
     Arama kutusu için aday listesi oluşturur.
     - Sector Avg modu: Sektör isimlerini döndürür.
     - Diğer modlar: Görünür müşteri isimlerini döndürür.
+    (Arayüz her tuşta tarama yapmamak için search_index kullanır.)
     """
     prefix_cf = tr_lower(prefix)
     
@@ -295,37 +612,23 @@ def get_visible_customer_names(df, settings_state, current_sector, hidden_keys,
     if current_sector == "Sector Avg":
         candidates = []
         if 'Company Sector' in df.columns:
-            sectors = df['Company Sector'].unique()
-            for sec in sectors:
-                if not df[df['Company Sector'] == sec].empty:
-                    candidates.append(f"{sec} Avg")
+            candidates = [f"{sec} Avg" for sec in df['Company Sector'].dropna().unique()]
         
         return [c for c in candidates if tr_lower(c).startswith(prefix_cf)]
 
     # --- SENARYO 2: MÜŞTERİ ARAMA MODU ---
-    # visible_df oluştur (filtrelenmiş veri)
-    vis_df = df[~df.apply(lambda r: get_point_key(r, settings_state) in hidden_keys, axis=1)].copy()
-
-    vis_df = apply_churn_filters(vis_df, settings_state)
-    vis_df = apply_age_filters(vis_df, settings_state)
-
-    if current_sector not in ("All", "Sector Avg"):
-        if 'Company Sector' in vis_df.columns:
-            vis_df = vis_df[vis_df['Company Sector'] == current_sector]
-        
-        if is_risk_view_active(current_sector, df.columns, settings_state) and (RISK_COL in vis_df.columns):
-            vis_df = vis_df[vis_df[RISK_COL].astype(str).str.upper().apply(lambda val: is_risk_allowed(val, settings_state))]
-
-    if 'Customer' not in vis_df.columns:
+    if 'Customer' not in df.columns:
         return []
-    
-    names = vis_df['Customer'].dropna().astype(str)
+
+    mask = get_search_visible_mask(df, settings_state, current_sector, hidden_keys, point_index)
+    names = df.loc[mask, 'Customer'].dropna().astype(str)
     return [n for n in names if tr_lower(n).startswith(prefix_cf)]
 
-def prepare_export_dataframe(df, settings_state, hidden_keys, selected_sector, selected_keys_set, only_selected=False):
+def prepare_export_dataframe(df, settings_state, hidden_keys, selected_sector, selected_keys_set, only_selected=False, point_index=None, olap_cube=None):
     """
     Mevcut grafikte görünen veriyi Export için DataFrame olarak hazırlar.
     main.py içindeki _gather_current_view_dataframe fonksiyonunun mantığıdır.
+    olap_cube verilirse (create_olap_cube) Sector Avg özeti küp diliminden okunur.
     """
     x_col = EFFECTIVE_MRR_COL
     if settings_state.get("use_updated_exc_license_values", False):
@@ -338,7 +641,14 @@ def prepare_export_dataframe(df, settings_state, hidden_keys, selected_sector, s
              
     # 2. Gizli Noktaları Filtrele
     # hidden_keys parametresi (manual_removed + license_removed + limit_removed) içermeli
-    base_df = df[~df.apply(lambda r: get_point_key(r, settings_state) in hidden_keys, axis=1)].copy()
+    if point_index is None:
+        point_index = build_point_key_index(df)
+    hidden_mask = point_keys_mask(point_index, settings_state, hidden_keys, df.index)
+    if selected_sector == "Sector Avg" and olap_cube is not None:
+        # Sector Avg özeti satır filtresi / kolon yazımı olmadan küp diliminden
+        return _export_sector_summary_from_cube(olap_cube, settings_state, ~hidden_mask, df, x_col,
+                                                selected_keys_set, only_selected)
+    base_df = df[~hidden_mask].copy()
 
     # 3. Temel Filtreler (Churn, Age)
     base_df = apply_churn_filters(base_df, settings_state)
@@ -355,7 +665,7 @@ def prepare_export_dataframe(df, settings_state, hidden_keys, selected_sector, s
 
     # Churn ise MRR'ı güncelle
     if (CHURN_COL in base_df.columns) and (CHURNED_MRR_COL in base_df.columns):
-        churn_mask_loc = base_df[CHURN_COL].astype(str).str.upper().eq("CHURN")
+        churn_mask_loc = get_churn_mask(base_df)
         base_df.loc[churn_mask_loc, EFFECTIVE_MRR_COL] = base_df.loc[churn_mask_loc, CHURNED_MRR_COL].astype(float)
 
     # Exc. License MRR doldur
@@ -377,8 +687,8 @@ def prepare_export_dataframe(df, settings_state, hidden_keys, selected_sector, s
         if not selected_keys_set:
             return pd.DataFrame()
         
-        # get_point_key data_ops içinde mevcut
-        base_df = base_df[base_df.apply(lambda r: get_point_key(r, settings_state) in selected_keys_set, axis=1)]
+        # Seçili anahtarlar tek bir vektörel maske ile eşlenir
+        base_df = base_df[point_keys_mask(point_index, settings_state, selected_keys_set, base_df.index)]
 
     # 7. Merkez Hesaplama (Quadrant için)
     # fixed_axis ayarı varsa
@@ -425,11 +735,7 @@ def prepare_export_dataframe(df, settings_state, hidden_keys, selected_sector, s
             total_mrr = sec_df[EFFECTIVE_MRR_COL].astype(float).sum()
             
             px, py = to_plot_coords(avg_mrr, avg_growth, settings_state.get("swap_axes", False))
-            
-            if px >= plot_cx and py >= plot_cy:     q_str = "(+,+)"
-            elif px < plot_cx and py >= plot_cy:    q_str = "(-,+)"
-            elif px < plot_cx and py < plot_cy:     q_str = "(-,-)"
-            else:                                   q_str = "(+,-)"
+            q_str = quadrant_labels([px], [py], plot_cx, plot_cy)[0]
 
             summary_rows.append({
                 "Company Sector": sector,
@@ -447,9 +753,8 @@ def prepare_export_dataframe(df, settings_state, hidden_keys, selected_sector, s
         base_df = base_df[base_df['Company Sector'] == selected_sector]
     
     # Risk Filtresi
-    # is_risk_view_active ve is_risk_allowed data_ops içinde mevcut
     if is_risk_view_active(selected_sector, df.columns, settings_state) and (RISK_COL in base_df.columns):
-        base_df = base_df[base_df[RISK_COL].astype(str).str.upper().apply(lambda val: is_risk_allowed(val, settings_state))]
+        base_df = base_df[get_risk_allowed_mask(base_df, settings_state)]
 
     # Çıktı Oluştur
     out = pd.DataFrame()
@@ -471,18 +776,54 @@ def prepare_export_dataframe(df, settings_state, hidden_keys, selected_sector, s
     if RISK_COL in base_df.columns:
         out[RISK_COL] = base_df[RISK_COL]
 
-    # Quadrant Hesapla (Teker teker)
-    qs = []
-    for xv, yv in zip(out['MRR Value'].values, out['MRR Growth (%)'].values):
-        px, py = to_plot_coords(float(xv), float(yv), settings_state.get("swap_axes", False))
-        if px >= plot_cx and py >= plot_cy:     qs.append("(+,+)")
-        elif px < plot_cx and py >= plot_cy:    qs.append("(-,+)")
-        elif px < plot_cx and py < plot_cy:     qs.append("(-,-)")
-        else:                                   qs.append("(+,-)")
-    out['Quadrant'] = qs
+    # Quadrant Hesapla (vektörel)
+    px, py = to_plot_coords(out['MRR Value'].to_numpy(dtype=float), out['MRR Growth (%)'].to_numpy(dtype=float),
+                            settings_state.get("swap_axes", False))
+    out['Quadrant'] = quadrant_labels(px, py, plot_cx, plot_cy)
     
     return out
 
+def _export_sector_summary_from_cube(olap_cube, settings_state, keep, df, x_col,
+                                     selected_keys_set, only_selected):
+    """prepare_export_dataframe'in Sector Avg özeti: sektör başına maske yerine küp dilimi."""
+    # Circular import olmaması için burada import ediyoruz
+    from olap_cube import olap_sector_table, olap_totals, churn_axis_filter
+
+    age_mode = get_age_filter_mode(settings_state)
+    x_measure = "exc" if x_col == 'Exc. License MRR' else "mrr"
+    churn_filter = churn_axis_filter(settings_state)
+    table = olap_sector_table(olap_cube, age_mode, x_measure, churn_filter, keep=keep)
+
+    # Merkez (Quadrant için): fixed_axis varsa o, yoksa görünür satırların ortalaması
+    if settings_state.get("fixed_axis", False) and settings_state.get("fixed_center") is not None:
+        eff_center_x, eff_center_y = settings_state["fixed_center"]
+    else:
+        totals = olap_totals(olap_cube, age_mode, x_measure, churn_filter, keep=keep)
+        if totals["count"] > 0:
+            eff_center_x, eff_center_y = totals["x_mean"], totals["y_mean"]
+        else:
+            eff_center_x, eff_center_y = 0, 0
+    plot_cx, plot_cy = to_plot_coords(eff_center_x, eff_center_y, settings_state.get("swap_axes", False))
+
+    sectors = df['Company Sector'].unique() if 'Company Sector' in df.columns else []
+    summary_rows = []
+    for sector in sectors:
+        if only_selected and f"SEC_AVG|{sector}" not in selected_keys_set:
+            continue
+        if sector not in table.index:
+            continue
+        st = table.loc[sector]
+        px, py = to_plot_coords(st["x_mean"], st["y_mean"], settings_state.get("swap_axes", False))
+        summary_rows.append({
+            "Company Sector": sector,
+            "Customer Count": int(st["count"]),
+            "Average MRR": st["x_mean"],
+            "Average Growth (%)": st["y_mean"],
+            "Total MRR": st["mrr_sum"],
+            "Quadrant": quadrant_labels([px], [py], plot_cx, plot_cy)[0]
+        })
+    return pd.DataFrame(summary_rows)
+
 def get_plot_x_col(df, settings_state, license_mode_string):
     """
     X ekseninde kullanılacak kolonu belirler.
@@ -508,14 +849,7 @@ def get_updated_y_col_if_any(df):
     """
     Veri setinde güncellenmiş Growth kolonlarından biri varsa adını döner.
     """
-    candidates = [
-        'Exc. License Growth (%)',
-        'Updated Growth (%)',
-        'MRR Growth Updated (%)',
-        'New MRR Growth (%)',
-        'Growth Updated (%)'
-    ]
-    for c in candidates:
+    for c in UPDATED_GROWTH_COLS:
         if c in df.columns:
             return c
     return None
\ No newline at end of file
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Çok kalabalık görünümler için yoğunluk (density) katmanı.
+
+Görünür alandaki normal nokta sayısı eşiği aşınca noktalar gizlenir ve
+yerine 2B histogram tek bir görüntü (AxesImage) olarak çizilir. Kullanıcı
+yakınlaştıkça görünür nokta sayısı eşiğin altına iner ve noktalar geri gelir.
+Histogramlar zoom seviyesine göre sabit bir ızgarada, görünür alanı kaplayan
+karolar (tile) halinde hesaplanır. Her karo (seviye, tx, ty) anahtarıyla sınırlı
+bir önbellekte tutulur; aynı seviyede pan yapmak sadece yeni giren karoları hesaplar.
+"""
+from collections import OrderedDict
+
+import numpy as np
+from matplotlib.colors import LogNorm
+from matplotlib.image import AxesImage
+
+# Görünür normal nokta sayısı bunu aşarsa yoğunluk moduna geçilir (0 = kapalı)
+LOD_POINT_THRESHOLD = 20000
+# Bir karonun eksen başına kutu sayısı (görünür alan eksen başına 1-2 karo)
+DENSITY_BINS = 160
+# En derin zoom seviyesi (seviye L'de veri aralığı eksen başına 2**L karoya bölünür)
+DENSITY_MAX_LEVEL = 12
+# Görünür alanın bir ekseninde en fazla karo (eksenler çok farklı zoom'daysa seviye düşürülür)
+DENSITY_MAX_TILES_PER_AXIS = 4
+# Önbellekteki en fazla karo sayısı (en eski kullanılan atılır; karo başına ~100 KB)
+DENSITY_TILE_CACHE = 128
+DENSITY_CMAP = "Blues"
+
+def points_in_view(px, py, xlim, ylim):
+    """Eksen limitleri içindeki nokta sayısı."""
+    x0, x1 = sorted(xlim)
+    y0, y1 = sorted(ylim)
+    return int(np.count_nonzero((px >= x0) & (px <= x1) & (py >= y0) & (py <= y1)))
+
+def _axis_range(lo, hi):
+    # Tek noktalı eksende sıfır genişlikli aralık olmasın
+    return (lo, hi) if hi > lo else (lo - 0.5, lo + 0.5)
+
+def create_density_state(px, py):
+    """Nokta kümesi için yoğunluk durumu (x'e göre sıralı sonlu noktalar ve karo önbelleği)."""
+    px = np.asarray(px, dtype=float).ravel()
+    py = np.asarray(py, dtype=float).ravel()
+    ok = np.isfinite(px) & np.isfinite(py)
+    px, py = px[ok], py[ok]
+    if len(px):
+        bounds = _axis_range(px.min(), px.max()) + _axis_range(py.min(), py.max())
+    else:
+        bounds = (0.0, 1.0, 0.0, 1.0)
+    # x'e göre sıralı: bir karo sütununun noktaları searchsorted ile tek dilim
+    order = np.argsort(px, kind="stable")
+    return {"px": px, "py": py, "sx": px[order], "sy": py[order], "bounds": bounds,
+            "tiles": OrderedDict()}
+
+def _zoom_level(data_span, view_span):
+    if view_span <= 0 or data_span <= 0:
+        return 0
+    return max(0, int(np.floor(np.log2(data_span / view_span))))
+
+def _tile_span(state, level, vx0, vx1, vy0, vy1):
+    """Görünür alanı kaplayan karo aralığı: (tx0, tx1, ty0, ty1), uçlar dahil."""
+    bx0, bx1, by0, by1 = state["bounds"]
+    n = 2 ** level
+    tw, th = (bx1 - bx0) / n, (by1 - by0) / n
+    tx0 = int(np.clip(np.floor((vx0 - bx0) / tw), 0, n - 1))
+    tx1 = int(np.clip(np.floor((vx1 - bx0) / tw), 0, n - 1))
+    ty0 = int(np.clip(np.floor((vy0 - by0) / th), 0, n - 1))
+    ty1 = int(np.clip(np.floor((vy1 - by0) / th), 0, n - 1))
+    return tx0, tx1, ty0, ty1
+
+def _tile_counts(state, level, tx, ty):
+    """
+    Karonun (DENSITY_BINS x DENSITY_BINS) sayıları. Kutu numarası seviyenin
+    global ızgarasından alınır; komşu karoların sınırındaki nokta iki kere sayılmaz.
+    """
+    key = (level, tx, ty)
+    tiles = state["tiles"]
+    counts = tiles.get(key)
+    if counts is not None:
+        tiles.move_to_end(key)
+        return counts
+
+    bx0, bx1, by0, by1 = state["bounds"]
+    bins = DENSITY_BINS * (2 ** level)
+    tw = (bx1 - bx0) / (2 ** level)
+    # Kayan nokta payı için sütun dilimi bir kutu geniş alınır, kesin seçim kutu numarasıyla
+    pad = tw / DENSITY_BINS
+    lo = np.searchsorted(state["sx"], bx0 + tx * tw - pad, side="left")
+    hi = np.searchsorted(state["sx"], bx0 + (tx + 1) * tw + pad, side="right")
+    gx = np.clip(((state["sx"][lo:hi] - bx0) / (bx1 - bx0) * bins).astype(np.int64), 0, bins - 1)
+    gy = np.clip(((state["sy"][lo:hi] - by0) / (by1 - by0) * bins).astype(np.int64), 0, bins - 1)
+    gx -= tx * DENSITY_BINS
+    gy -= ty * DENSITY_BINS
+    inside = (gx >= 0) & (gx < DENSITY_BINS) & (gy >= 0) & (gy < DENSITY_BINS)
+    flat = gx[inside] * DENSITY_BINS + gy[inside]
+    counts = np.bincount(flat, minlength=DENSITY_BINS * DENSITY_BINS).astype(np.uint32)
+    counts = counts.reshape(DENSITY_BINS, DENSITY_BINS)
+
+    tiles[key] = counts
+    while len(tiles) > DENSITY_TILE_CACHE:
+        tiles.popitem(last=False)
+    return counts
+
+def _level_grid(state, xlim, ylim):
+    """
+    Görünür alanın (histogram, extent) ızgarası. Tek seviye: eksenlerin veri / görünür
+    aralık oranlarından (2 tabanında) büyüğü; görünür alan eksen başına
+    DENSITY_MAX_TILES_PER_AXIS karodan fazlasını kaplıyorsa seviye düşürülür.
+    Izgara, görünür alanı kaplayan önbellekli karoların birleşimidir.
+    """
+    bx0, bx1, by0, by1 = state["bounds"]
+    vx0, vx1 = sorted(xlim)
+    vy0, vy1 = sorted(ylim)
+    level = min(max(_zoom_level(bx1 - bx0, vx1 - vx0), _zoom_level(by1 - by0, vy1 - vy0)),
+                DENSITY_MAX_LEVEL)
+    tx0, tx1, ty0, ty1 = _tile_span(state, level, vx0, vx1, vy0, vy1)
+    while level > 0 and max(tx1 - tx0, ty1 - ty0) + 1 > DENSITY_MAX_TILES_PER_AXIS:
+        level -= 1
+        tx0, tx1, ty0, ty1 = _tile_span(state, level, vx0, vx1, vy0, vy1)
+
+    counts = np.block([[_tile_counts(state, level, tx, ty) for ty in range(ty0, ty1 + 1)]
+                       for tx in range(tx0, tx1 + 1)])
+    n = 2 ** level
+    tw, th = (bx1 - bx0) / n, (by1 - by0) / n
+    return counts, (bx0 + tx0 * tw, bx0 + (tx1 + 1) * tw, by0 + ty0 * th, by0 + (ty1 + 1) * th)
+
+def draw_density(ax, state, zorder=5, alpha=0.9):
+    """
+    Görünür alana göre yoğunluk görüntüsünü ekler ve döndürür.
+    Veri limitlerini değiştirmemesi için imshow yerine add_image kullanılır.
+    """
+    if len(state["px"]) == 0:
+        return None
+    counts, (x0, x1, y0, y1) = _level_grid(state, ax.get_xlim(), ax.get_ylim())
+    # Boş kutular saydam kalsın
+    img = np.ma.masked_equal(counts.T, 0)
+    vmax = max(float(counts.max()), 1.0)
+
+    im = AxesImage(ax, cmap=DENSITY_CMAP, norm=LogNorm(vmin=1.0, vmax=max(vmax, 1.0 + 1e-9)),
+                   origin="lower", extent=(x0, x1, y0, y1), interpolation="nearest",
+                   alpha=alpha, zorder=zorder)
+    im.set_data(img)
+    im.set_label("_density")
+    ax.add_image(im)
+    return im
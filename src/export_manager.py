@@ -10,9 +10,11 @@ from data_ops import prepare_export_dataframe, get_limit_removed_keys
 
 def run_export_workflow(parent, df, file_path_ref, settings_state, selection_state, 
                        manual_removed, license_removed, regression_removed, 
-                       current_sector):
+                       current_sector, point_index=None, olap_cube=None):
     """
     Excel dışa aktarma sürecini yönetir.
+    point_index verilirse (build_point_key_index) anahtar eşleştirmesi yeniden hesaplanmaz.
+    olap_cube verilirse Sector Avg özeti ön-toplam küpten okunur.
     """
     
     # 1. Seçim var mı kontrol et
@@ -55,7 +57,7 @@ def run_export_workflow(parent, df, file_path_ref, settings_state, selection_sta
         current_hidden = set().union(
             manual_removed, 
             license_removed, 
-            get_limit_removed_keys(df, settings_state)
+            get_limit_removed_keys(df, settings_state, point_index)
         )
         current_hidden = current_hidden.union(regression_removed)
         
@@ -65,7 +67,9 @@ def run_export_workflow(parent, df, file_path_ref, settings_state, selection_sta
             current_hidden, 
             current_sector, 
             selected_keys, 
-            only_selected=is_selected_only
+            only_selected=is_selected_only,
+            point_index=point_index,
+            olap_cube=olap_cube
         )
 
         if data.empty:
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+update_plot için kademeli (staged) filtre hattı.
+
+Her aşama çıktısını, sadece okuduğu ayarlardan oluşan bir anahtar ile saklar.
+Anahtar değişmediyse aşama yeniden hesaplanmaz (zoom / pan gibi durumlarda
+tüm aşamalar önbellekten döner). Bir aşama yeniden hesaplanınca 'rev' değeri
+artar; sonraki aşamalar anahtarlarına bu rev'i koyarak zincirlenir.
+Hat arka plan iş parçacığından da ısıtılabildiği için aşama zinciri
+pipeline["lock"] altında çalıştırılmalıdır.
+"""
+import threading
+import time
+
+# update_plot'taki sıralama ("focus" zincire girmez: age maskesi üzerine sadece çizimde uygulanır)
+PIPELINE_STAGES = ("hidden", "churn", "age", "columns", "risk", "regression", "sectors", "focus")
+
+def create_filter_pipeline(stage_names=PIPELINE_STAGES):
+    """Boş bir filtre hattı (dict) oluşturur."""
+    stages = {}
+    for name in stage_names:
+        stages[name] = {
+            "key": None,
+            "value": None,
+            "rev": 0,
+            "runs": 0,
+            "hits": 0,
+            "total_ms": 0.0,
+            "last_ms": 0.0,
+        }
+    return {"order": tuple(stage_names), "stages": stages, "lock": threading.RLock()}
+
+def run_stage(pipeline, name, key, compute_func):
+    """
+    Aşamanın anahtarı öncekiyle aynıysa saklanan değeri döndürür,
+    değilse compute_func() ile yeniden hesaplar ve süresini kaydeder.
+    """
+    st = pipeline["stages"][name]
+    if st["rev"] > 0 and st["key"] == key:
+        st["hits"] += 1
+        return st["value"]
+
+    t0 = time.perf_counter()
+    value = compute_func()
+    elapsed_ms = (time.perf_counter() - t0) * 1000.0
+
+    st["value"] = value
+    st["key"] = key
+    st["rev"] += 1
+    st["runs"] += 1
+    st["last_ms"] = elapsed_ms
+    st["total_ms"] += elapsed_ms
+    return value
+
+def stage_rev(pipeline, name):
+    """Aşamanın revizyon numarası (sonraki aşamaların anahtarında kullanılır)."""
+    return pipeline["stages"][name]["rev"]
+
+def stage_value(pipeline, name):
+    """Aşamanın son hesaplanan değeri (hiç çalışmadıysa None)."""
+    return pipeline["stages"][name]["value"]
+
+def invalidate_pipeline(pipeline, from_stage=None):
+    """
+    Önbelleği temizler. from_stage verilirse o aşama ve sonrası temizlenir
+    (ör. veri yeniden yüklendiğinde tamamı).
+    """
+    order = pipeline["order"]
+    start = order.index(from_stage) if from_stage in order else 0
+    for name in order[start:]:
+        st = pipeline["stages"][name]
+        st["key"] = None
+        st["value"] = None
+
+def get_pipeline_stats(pipeline):
+    """
+    Aşama bazında sayaçlar: {aşama: {"runs", "hits", "last_ms", "avg_ms", "total_ms"}}
+    """
+    out = {}
+    for name in pipeline["order"]:
+        st = pipeline["stages"][name]
+        runs = st["runs"]
+        out[name] = {
+            "runs": runs,
+            "hits": st["hits"],
+            "last_ms": st["last_ms"],
+            "avg_ms": (st["total_ms"] / runs) if runs else 0.0,
+            "total_ms": st["total_ms"],
+        }
+    return out
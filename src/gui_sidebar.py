@@ -113,17 +113,26 @@ def build_sidebar_ui(parent, sectors_list, vars_dict, callbacks, has_sklearn):
 
     rb_none = ttk.Radiobutton(analytics_frame, text="None (Standard View)", value="none", 
                               variable=vars_dict["an_mode"], command=callbacks.get("apply_analytics"))
-    rb_kmeans = ttk.Radiobutton(analytics_frame, text="K-Means Clustering (3 Groups)", value="kmeans", 
+    rb_kmeans = ttk.Radiobutton(analytics_frame, text="K-Means Clustering", value="kmeans", 
                                 variable=vars_dict["an_mode"], command=callbacks.get("apply_analytics"))
     rb_pareto = ttk.Radiobutton(analytics_frame, text="Pareto Analysis (Top %20)", value="pareto", 
                                 variable=vars_dict["an_mode"], command=callbacks.get("apply_analytics"))
 
     rb_none.grid(row=2, column=0, sticky="w", padx=10)
     rb_kmeans.grid(row=3, column=0, sticky="w", padx=10)
-    rb_pareto.grid(row=4, column=0, sticky="w", padx=10)
+    rb_pareto.grid(row=5, column=0, sticky="w", padx=10)
+
+    # K-Means küme sayısı (analytics_state["kmeans_k"])
+    k_frame = ttk.Frame(analytics_frame)
+    k_frame.grid(row=4, column=0, sticky="w", padx=28, pady=(0, 2))
+    ttk.Label(k_frame, text="Groups:").pack(side="left")
+    spin_k = ttk.Spinbox(k_frame, from_=2, to=8, width=4, state="readonly",
+                         textvariable=vars_dict["an_k"], command=callbacks.get("apply_analytics"))
+    spin_k.pack(side="left", padx=(4, 0))
 
     if not has_sklearn:
         rb_kmeans.configure(state="disabled", text="K-Means (sklearn not found)")
+        spin_k.configure(state="disabled")
 
     # Layout ayarları
     controls_frame.grid_rowconfigure(8, weight=1)
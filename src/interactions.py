@@ -110,6 +110,7 @@ def handle_pan_motion(event, pan_state, ax, canvas, ctrl_pressed):
 # src/interactions.py en altına:
 
 from matplotlib.patches import Rectangle
+import numpy as np
 
 def handle_select_press(event, selection_state, pan_active, ctrl_pressed, ax):
     """
@@ -206,9 +207,12 @@ def handle_select_motion(event, selection_state, ax, canvas):
     ax.draw_artist(selection_state["rect"])
     canvas.blit(ax.bbox)
 
-def handle_select_release(event, selection_state, ax, canvas, get_point_key_func, to_plot_coords_func, scatter_points, sector_mode, settings_state):
+def handle_select_release(event, selection_state, ax, canvas, point_keys_func, hit_test_func, rect_query_func, scatter_points, sector_mode, settings_state):
     """
     Seçimi tamamlar. Mouse dışarıda bırakılsa bile en son kenarı kabul eder.
+    point_keys_func(index) -> anahtar listesi
+    hit_test_func(event) -> (scatter sırası, satır sırası) veya None
+    rect_query_func(x_min, x_max, y_min, y_max) -> (scatter sıraları, satır sıraları) dizileri
     """
     if not selection_state["active"]:
         return False
@@ -257,65 +261,50 @@ def handle_select_release(event, selection_state, ax, canvas, get_point_key_func
     dist = ((x_start - x_end)**2 + (y_start - y_end)**2)**0.5
     is_single_click = (dist < diag * 0.01) 
 
-    swap_axes = settings_state.get("swap_axes", False)
     is_sector_avg_mode = (sector_mode == "Sector Avg")
     
     changed = False
     
     if is_single_click:
         # --- TEK TIK MANTIĞI ---
-        for sc, sub_df in scatter_points:
-            contains, ind = sc.contains(event)
-            if contains:
-                if is_sector_avg_mode:
-                    lbl = sc.get_label()
-                    if lbl.endswith(" Avg"):
-                        sec_name = lbl.replace(" Avg", "")
-                        key = f"SEC_AVG|{sec_name}"
-                    else:
-                        continue
-                else:
-                    idx = ind["ind"][0]
-                    row = sub_df.iloc[idx]
-                    key = get_point_key_func(row, settings_state)
-                
-                if key in selection_state["selected_keys"]:
-                    selection_state["selected_keys"].remove(key)
-                else:
-                    selection_state["selected_keys"].add(key)
-                changed = True
-                break
+        # Uzamsal indeks üzerinden tek sorgu (Sector Avg modunda sadece Avg noktaları)
+        hit = hit_test_func(event, avg_only=is_sector_avg_mode)
+        if hit is not None:
+            sc_pos, idx = hit
+            sc, sub_df = scatter_points[sc_pos]
+            if is_sector_avg_mode:
+                sec_name = sc.get_label().replace(" Avg", "")
+                key = f"SEC_AVG|{sec_name}"
+            else:
+                keys = point_keys_func(sub_df.index[idx:idx + 1])
+                key = keys[0]
+
+            if key in selection_state["selected_keys"]:
+                selection_state["selected_keys"].remove(key)
+            else:
+                selection_state["selected_keys"].add(key)
+            changed = True
     else:
         # --- KUTU SEÇİMİ MANTIĞI ---
-        if is_sector_avg_mode:
-            for sc, _ in scatter_points:
-                offsets = sc.get_offsets()
-                if len(offsets) > 0:
-                    px, py = offsets[0]
-                    if (x_min <= px <= x_max) and (y_min <= py <= y_max):
-                        lbl = sc.get_label()
-                        if lbl.endswith(" Avg"):
-                            sec_name = lbl.replace(" Avg", "")
-                            key = f"SEC_AVG|{sec_name}"
-                            selection_state["selected_keys"].add(key)
-                            changed = True
-        else:
-            # Normal Müşteri Modu
-            # scatter_points içindeki her dataframe'i geziyoruz
-            for sc, sub_df in scatter_points:
-                 for _, row in sub_df.iterrows():
-                     # Noktanın key'ini ve koordinatını bul
-                     key = get_point_key_func(row, settings_state)
-                     
-                     # get_point_key (id, x, y) döndürür
-                     if isinstance(key, tuple) and len(key) == 3:
-                         _, val_x, val_y = key
-                         # Grafik koordinatına çevir (Swap axis varsa diye)
-                         px, py = to_plot_coords_func(val_x, val_y, swap_axes)
-                         
-                         if (x_min <= px <= x_max) and (y_min <= py <= y_max):
-                             selection_state["selected_keys"].add(key)
-                             changed = True
+        # Uzamsal indeks kutu içindeki çizili noktaları (scatter, satır) olarak döndürür
+        sc_hits, row_hits = rect_query_func(x_min, x_max, y_min, y_max)
+
+        for sc_pos in np.unique(sc_hits):
+            sc, sub_df = scatter_points[sc_pos]
+            is_avg_point = (sc.get_label() or "").endswith(" Avg")
+
+            if is_sector_avg_mode:
+                if is_avg_point:
+                    sec_name = sc.get_label().replace(" Avg", "")
+                    selection_state["selected_keys"].add(f"SEC_AVG|{sec_name}")
+                    changed = True
+            elif not is_avg_point:
+                # Normal Müşteri Modu: satır sıralarından anahtarlar toplu alınır
+                rows = row_hits[sc_hits == sc_pos]
+                keys = point_keys_func(sub_df.index[rows])
+                if keys:
+                    selection_state["selected_keys"].update(keys)
+                    changed = True
 
     return changed
 
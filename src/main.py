@@ -14,13 +14,29 @@ except Exception:
       _HAS_TKCALENDAR = False   # Yüklü değilse fallback olarak Entry kullanılacak
 
 _layout_timer = None
+_license_filter_timer = None
+LICENSE_FILTER_DEBOUNCE_MS = 250
+_residual_filter_timer = None
+RESIDUAL_FILTER_DEBOUNCE_MS = 150
 _prev_cfg_width = 0
 _prev_cfg_height = 0      
 
 from settings_window import show_settings_window      
-from data_ops import load_and_clean_data, tr_lower, CHURN_COL, CHURNED_MRR_COL, EFFECTIVE_MRR_COL, RISK_COL, CURRENT_MRR_COL, BASE_MRR_FALLBACK_COL, get_point_key, get_limit_removed_keys, is_risk_allowed, apply_churn_filters, apply_age_filters, get_growth_source_col_for_age_mode, get_base_mrr_col_for_age_mode, get_exc_mrr_col_for_age_mode, is_risk_view_active, calculate_churn_stats, get_visible_customer_names, get_plot_x_col, get_updated_y_col_if_any
+from residual_window import show_residual_filter_window
+from data_ops import tr_lower, get_license_removed_mask, get_churn_mask, CHURN_COL, EFFECTIVE_MRR_COL, RISK_COL, CURRENT_MRR_COL, BASE_MRR_FALLBACK_COL, get_limit_removed_mask, build_point_key_index, point_keys_for, point_keys_mask, get_risk_allowed_mask, get_risk_codes, churn_keep_mask, age_keep_mask, get_base_mrr_col_for_age_mode, is_risk_view_active, get_search_visible_mask, get_plot_x_col, get_updated_y_col_if_any
 from export_manager import run_export_workflow
-from analysis import calculate_kmeans_labels, calculate_pareto_mask, calculate_regression_line, apply_regression_filter
+from arrow_layer import arrow_segments, moved_mask, thin_arrows, draw_arrows
+from quadrants import weighted_quadrant_colors, quadrant_rects
+from projections import start_projection_precompute, get_age_projection
+from search_index import build_search_index, search_customer_rows, search_sector_names, search_row_mask
+from sector_stats import build_sector_stats, named_sectors, sector_frame, churn_totals, sector_churn_row
+from olap_cube import (create_olap_cube, set_olap_active, olap_sector_table, olap_sector_rows, olap_totals,
+                       olap_regression, olap_sector_regressions, churn_axis_filter, risk_axis_filter)
+from compute_executor import create_compute_executor, submit_job, cancel_job
+from density_layer import LOD_POINT_THRESHOLD, create_density_state, points_in_view, draw_density
+from filter_pipeline import create_filter_pipeline, run_stage, stage_rev, stage_value
+from data_cache import load_cleaned_data_cached
+from analysis import KMEANS_K_RANGE, calculate_kmeans_labels, calculate_pareto_mask, apply_regression_filter, format_regression_label, REGRESSION_BAND_MODES
 from utils import (
     external_resource_path, 
     enable_per_monitor_dpi_awareness, 
@@ -46,6 +62,14 @@ from ui_components import (
     strip_focus_globally
 )
 
+from spatial_index import build_spatial_index, query_hit, query_rect
+from overlay_layer import (
+    create_overlay_layer,
+    add_overlay_artists,
+    clear_overlay_group,
+    blit_overlay,
+    invalidate_overlay_background,
+)
 from interactions import (
     handle_scroll_event, 
     handle_pan_press, 
@@ -64,6 +88,8 @@ _resize_timer = None
 CHURN_X_COLOR = 'red' 
 CHURN_DATE_COL = 'Churn Date'
 current_visible_df = None  # Grafikte o an çizili olan verinin kopyası
+current_sector_table = None  # current_visible_df'in sektör tablosu (küp dilimi)
+current_sector_trends = {}  # "All sector trends" açıksa {sektör: doğru} (yan paneldeki eğimler)
 current_avg_keys = set()   # Avg noktalarının key'lerini tutmak için (Ayırt etmek adına)
 # --- GLOBAL TOOLTIP YÖNETİCİSİ ---
 _tt_win = None
@@ -113,7 +139,12 @@ settings_state = {
       "risk_cmap_weighted": True,
       "risk_cmap_weight_power": 1.0,
 
+      # Görünür nokta sayısı bunu aşınca noktalar yerine yoğunluk görüntüsü (0 = kapalı)
+      "lod_point_threshold": LOD_POINT_THRESHOLD,
+
       "activate_search_box": False,
+      # Arama modu: "prefix" (önek), "substring" (içerir), "fuzzy" (trigram benzerliği)
+      "search_mode": "prefix",
 
       "churn_enabled": True,
       "show_only_churn": False,
@@ -126,7 +157,10 @@ settings_state = {
 
       # YENİ: Regresyon ayarları
       "fix_regression_line": False,           # Çizgiyi sabitleme ayarı
+      "show_sector_trends": False,            # Tüm sektörlerin regresyon çizgileri (All / Sector Avg)
       "fixed_regression_params": None,      # Sabitlenen m ve b değerlerini tutacak sözlük
+      "regression_band_k": 1.0,             # ±kσ residual bandı (outside_band / inside_band)
+      "regression_band_pct": 10.0,          # residual'a göre en üst / en alt N% (top_pct / bottom_pct)
 }
 
 # Seçim durumu ve değişkenleri
@@ -186,7 +220,16 @@ splash_set(splash, pbar, splash_title_lbl, splash_sub_lbl, pct=16, sub="Reading
 
 # Tüm o karmaşık işleri artık tek satırda yapıyoruz:
 try:
-    df = load_and_clean_data(file_path)
+    # Geçerli bir önbellek varsa Excel hiç parse edilmez
+    df = load_cleaned_data_cached(file_path)
+    # Nokta anahtarları (index, x, y) tüm yaş modları için bir kere hesaplanır
+    point_index = build_point_key_index(df)
+    # Arama kutusu için önek indeksi (Türkçe küçük harf, sıralı)
+    search_index = build_search_index(df)
+    # Tüm yaş modlarının kolon projeksiyonları arka planda hazırlanır (mod değişimi = dizi seçimi)
+    projection_store = start_projection_precompute(df)
+    # Sektör × risk × churn × yaş ön-toplam küpü (yaş modu hücreleri ilk kullanımda)
+    aggregate_cube = create_olap_cube(df, projection_store)
 except Exception as e:
     # Hata olursa ekrana basıp kapatalım
     import tkinter.messagebox
@@ -213,11 +256,14 @@ analytics_state = {
       "mode": "none",           # "none", "kmeans", "pareto"
       "show_marginals": False,
       "kmeans_k": 3,            # Küme sayısı
+      "kmeans_backend": "auto", # "auto", "full", "minibatch"
       "marginal_artists": [] # Temizlik için referanslar
 }
 from matplotlib.patches import Patch, Rectangle
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.colors import to_rgb
+from matplotlib.colors import to_rgb, to_rgba
+from matplotlib.lines import Line2D
+from matplotlib.collections import LineCollection
 
 # (İsteğe bağlı küçük hız optimizasyonu: font ailesi sabitleme)
 try:
@@ -339,7 +385,9 @@ def _export_to_excel():
         manual_removed=manual_removed,
         license_removed=license_removed,
         regression_removed=regression_removed,
-        current_sector=sector_combobox.get()
+        current_sector=sector_combobox.get(),
+        point_index=point_index,
+        olap_cube=aggregate_cube
     )
 
 
@@ -389,13 +437,13 @@ def _on_focus_press(event):
             return
       is_focus_held = True
       # Zoom bozulmasın (preserve_zoom=True), veri fit edilmesin (fit_to_data=False)
-      update_plot(sector_combobox.get(), preserve_zoom=True, fit_to_data=False)
+      request_plot_update(sector_combobox.get(), preserve_zoom=True, fit_to_data=False)
 
 def _on_focus_release(event):
       global is_focus_held
       is_focus_held = False
       # Her şeyi geri getir, yine zoom bozulmasın
-      update_plot(sector_combobox.get(), preserve_zoom=True, fit_to_data=False)
+      request_plot_update(sector_combobox.get(), preserve_zoom=True, fit_to_data=False)
 
 # Basma (Button-1) ve Bırakma (ButtonRelease-1) olaylarını bağlıyoruz
 btn_focus.bind("<Button-1>", _on_focus_press)
@@ -416,6 +464,12 @@ search_frame.grid_columnconfigure(1, weight=0)
 search_frame.grid_columnconfigure(2, weight=1)
 
 highlight_overlay_artists = []   # vurgulama overlay scatter’ları
+
+# Hover işaretçisi, seçim halkaları ve arama parlaması blit edilen overlay katmanında çizilir
+overlay = create_overlay_layer(ax, canvas, {
+      "selection": selection_state["highlight_artists"],
+      "search": highlight_overlay_artists,
+})
 def _position_search_frame():
     """Arama çubuğunu Handbook butonunun sağına konumlandırır."""
     try:
@@ -458,18 +512,72 @@ def toggle_search_bar_visibility():
 
 
 def _clear_highlight_overlays():
-      for art in highlight_overlay_artists:
-            try:
-                  art.remove()
-            except Exception:
-                  pass
-      highlight_overlay_artists.clear()
-      canvas.draw_idle()
+      clear_overlay_group(overlay, "search")
+
+
+# Arama listesi: ilk sonuçlar hemen, kalanı parça parça (root.after) eklenir
+SEARCH_LIST_FIRST = 50
+SEARCH_LIST_CHUNK = 200
+SEARCH_LIST_MAX = 2000
+search_stream = {"job": None, "names": [], "next": 0}
 
+def _cancel_search_stream():
+      if search_stream["job"] is not None:
+            try: root.after_cancel(search_stream["job"])
+            except Exception: pass
+      search_stream["job"] = None
+      search_stream["names"] = []
+      search_stream["next"] = 0
+
+def _stream_search_list():
+      """Bekleyen arama sonuçlarından bir parçayı listeye ekler, kalan varsa tekrar planlar."""
+      search_stream["job"] = None
+      names = search_stream["names"]
+      start = search_stream["next"]
+      end = min(start + SEARCH_LIST_CHUNK, len(names))
+      if end > start:
+            search_list.insert(tk.END, *names[start:end])
+      search_stream["next"] = end
+      if end < len(names):
+            search_stream["job"] = root.after(1, _stream_search_list)
+
+search_mask_cache = {"key": None, "mask": None}
+
+def _search_visible_mask():
+      """
+      Arama için görünür satırlar: filtre hattının önbellekteki age maskesi (gizli + limit +
+      churn + yaş) ile tek sektör görünümünde sektör + risk maskesi. Tuş başına filtre
+      hesaplanmaz; maske aşama revizyonları ve sektör değişince yenilenir.
+      """
+      selected_sector = sector_combobox.get()
+      # Önce rev, sonra değer: arada aşama yenilenirse sadece bir sonraki çağrıda tekrar kurulur
+      key = (stage_rev(plot_pipeline, "age"), stage_rev(plot_pipeline, "risk"), selected_sector)
+      age_keep = stage_value(plot_pipeline, "age")
+      risk_ok = stage_value(plot_pipeline, "risk")
+      if age_keep is None:
+            # Hat henüz hiç çalışmadı (ilk çizimden önce)
+            hidden = set().union(manual_removed, license_removed)
+            mask = get_search_visible_mask(df, settings_state, selected_sector, hidden, point_index)
+            return mask & ~get_limit_removed_mask(df, settings_state, point_index)
+      if search_mask_cache["key"] == key:
+            return search_mask_cache["mask"]
+
+      mask = np.array(age_keep, dtype=bool)
+      if selected_sector not in ("All", "Sector Avg"):
+            mask &= (df['Company Sector'] == selected_sector).to_numpy()
+            if is_risk_view_active(selected_sector, df.columns, settings_state) and (RISK_COL in df.columns):
+                  if risk_ok is None:
+                        risk_ok = get_risk_allowed_mask(df, settings_state)
+                  mask &= risk_ok.to_numpy(dtype=bool)
+      search_mask_cache["key"] = key
+      search_mask_cache["mask"] = mask
+      return mask
 
 def _update_search_list(prefix: str):
+      _cancel_search_stream()
       search_list.delete(0, tk.END)
-      prefix = (prefix or "").strip().casefold()
+      # Normalizasyon (search_fold) arama indeksinin içinde yapılır
+      prefix = (prefix or "").strip()
       if not prefix:
             search_info.config(text="")
             try:
@@ -484,44 +592,47 @@ def _update_search_list(prefix: str):
       except Exception:
             pass
 
-      current_hidden = set().union(
-          manual_removed,
-          license_removed,
-          get_limit_removed_keys(df, settings_state)
-      )
-      names = get_visible_customer_names(
-          df,
-          settings_state,
-          sector_combobox.get(),
-          current_hidden,
-          prefix
-      )    
-      for name in names[:50]:
-            search_list.insert(tk.END, name)
-
-      count = search_list.size()
-      search_info.config(text=f"{count} match")
+      # Önek / trigram indeksinde arama + görünürlük maskesi (DataFrame taranmaz)
+      search_mode = settings_state.get("search_mode", "prefix")
+      if sector_combobox.get() == "Sector Avg":
+            names = search_sector_names(search_index, prefix, mode=search_mode)
+            total = len(names)
+      else:
+            rows = search_customer_rows(search_index, prefix, _search_visible_mask(), mode=search_mode)
+            total = len(rows)
+            names = [search_index["names"][i] for i in rows[:SEARCH_LIST_MAX]]
+
+      if names[:SEARCH_LIST_FIRST]:
+            search_list.insert(tk.END, *names[:SEARCH_LIST_FIRST])
+      if len(names) > SEARCH_LIST_FIRST:
+            search_stream["names"] = names
+            search_stream["next"] = SEARCH_LIST_FIRST
+            search_stream["job"] = root.after(1, _stream_search_list)
+
+      search_info.config(text=f"{total} match")
 
 def _highlight_matches(prefix: str):
       _clear_highlight_overlays()
-      prefix_cf = (prefix or "").strip().casefold()
-      if not prefix_cf:
+      # Normalizasyon (search_fold) arama indeksinin içinde yapılır
+      query = (prefix or "").strip()
+      if not query:
             return
 
       if is_focus_held:
             return
 
       is_sector_avg_mode = (sector_combobox.get() == "Sector Avg")
+      search_mode = settings_state.get("search_mode", "prefix")
 
       # --- SENARYO 1: SECTOR AVG MODU (BÜYÜK NOKTALARI PARLAT) ---
       if is_sector_avg_mode:
+            # Listbox'tan seçilince tam isim gelir (örn: "Finance Avg"), elle yazılınca
+            # arama metni gelir (örn: "Fin"); eşleşme seçili arama moduna göre
+            matched_avg = set(search_sector_names(search_index, query, mode=search_mode))
             for sc, _ in scatter_points:
                   label = sc.get_label() or ""
                    
-                  # Label tam eşleşiyor mu veya arama ile başlıyor mu?
-                  # Listbox'tan seçilince tam isim gelir (örn: "Finance Avg")
-                  # Elle yazılınca prefix gelir (örn: "Fin")
-                  if tr_lower(label).startswith(prefix_cf):
+                  if label in matched_avg:
                          
                         # Koordinatı al (Scatter tek bir nokta içerir)
                         offsets = sc.get_offsets()
@@ -535,12 +646,19 @@ def _highlight_matches(prefix: str):
                               ov1 = ax.scatter([px], [py], s=1200, c='#00FF00', alpha=0.2, edgecolors='none', zorder=9)
                               ov2 = ax.scatter([px], [py], s=600, c='#00FF00', alpha=0.4, edgecolors='none', zorder=9)
                               ov3 = ax.scatter([px], [py], s=300, c='white', alpha=0.9, edgecolors='#00FF00', linewidth=2, zorder=10)
-                              highlight_overlay_artists.extend([ov1, ov2, ov3])
+                              add_overlay_artists(overlay, "search", [ov1, ov2, ov3], redraw=False)
              
-            canvas.draw_idle()
+            blit_overlay(overlay)
             return
 
-      # --- SENARYO 2: NORMAL MÜŞTERİ MODU (ESKİ KOD) ---
+      # --- SENARYO 2: NORMAL MÜŞTERİ MODU ---
+      # Eşleşen satırlar arama indeksinden bir kere alınır, scatter başına sadece index kesişimi
+      match_labels = df.index[search_customer_rows(search_index, query, mode=search_mode)]
+      if len(match_labels) == 0:
+            blit_overlay(overlay)
+            return
+
+      x_col = get_plot_x_col(df, settings_state, license_var.get())
       for sc, sd in scatter_points:
             label = sc.get_label() or ""
              
@@ -550,28 +668,20 @@ def _highlight_matches(prefix: str):
                    
             if 'Customer' not in sd.columns: continue
 
-            mask = sd['Customer'].astype(str).str.casefold().str.startswith(prefix_cf)
-            if not mask.any(): continue
+            matched = sd[sd.index.isin(match_labels)]
+            if matched.empty: continue
 
-            x_col = get_plot_x_col(df, settings_state, license_var.get())
-            xs = []; ys = []
-            for _, row in sd[mask].iterrows():
-                  try:
-                        xv = float(row[x_col])
-                  except:
-                        xv = float(row.get(EFFECTIVE_MRR_COL, row.get(BASE_MRR_FALLBACK_COL)))
-                  yv = float(row['MRR Growth (%)'])
-                  px, py = to_plot_coords(xv, yv, settings_state.get("swap_axes", False))
-                  xs.append(px); ys.append(py)
-
-            if xs:
-                  # Neon Efekti (Müşteri için daha küçük)
-                  ov1 = ax.scatter(xs, ys, s=500, c='#00FF00', alpha=0.2, edgecolors='none', zorder=9)
-                  ov2 = ax.scatter(xs, ys, s=200, c='#00FF00', alpha=0.4, edgecolors='none', zorder=9)
-                  ov3 = ax.scatter(xs, ys, s=50, c='white', alpha=0.9, edgecolors='#00FF00', linewidth=1, zorder=10)
-                  highlight_overlay_artists.extend([ov1, ov2, ov3])
+            x_src = x_col if x_col in matched.columns else (EFFECTIVE_MRR_COL if EFFECTIVE_MRR_COL in matched.columns else BASE_MRR_FALLBACK_COL)
+            xs, ys = to_plot_coords(matched[x_src].to_numpy(dtype=float), matched['MRR Growth (%)'].to_numpy(dtype=float),
+                                    settings_state.get("swap_axes", False))
 
-      canvas.draw_idle()
+            # Neon Efekti (Müşteri için daha küçük)
+            ov1 = ax.scatter(xs, ys, s=500, c='#00FF00', alpha=0.2, edgecolors='none', zorder=9)
+            ov2 = ax.scatter(xs, ys, s=200, c='#00FF00', alpha=0.4, edgecolors='none', zorder=9)
+            ov3 = ax.scatter(xs, ys, s=50, c='white', alpha=0.9, edgecolors='#00FF00', linewidth=1, zorder=10)
+            add_overlay_artists(overlay, "search", [ov1, ov2, ov3], redraw=False)
+
+      blit_overlay(overlay)
 
 def _on_search_key_press(event):
       """
@@ -768,18 +878,19 @@ try:
 except Exception:
       pass
 
-reg_filter_var = tk.StringVar(value="none") # "none", "above", "below"
+reg_filter_var = tk.StringVar(value="none") # REGRESSION_FILTER_MODES: "none", "above", "below", band modları
 
 reg_btn_up = ttk.Button(root, text="⬆", style="Reg.TButton", command=lambda: _on_reg_filter_click("above"))
 reg_btn_down = ttk.Button(root, text="⬇", style="Reg.TButton", command=lambda: _on_reg_filter_click("below"))
+reg_btn_band = ttk.Button(root, text="σ", style="Reg.TButton", command=lambda: _open_residual_filter())
+residual_window_state = {"handle": None}   # açık Residual Filter penceresi (show_residual_filter_window dönüşü)
 
 def trigger_auto_zoom():
       """Grafiği mevcut seçim için otomatik olarak fit_to_data yap."""
-      update_plot(sector_combobox.get(), preserve_zoom=False, fit_to_data=True)
-       
       # --- DÜZELTME: Auto-zoom sonrası seçili noktaları tekrar boya ---
-      draw_selection_highlights()
-       
+      request_plot_update(sector_combobox.get(), preserve_zoom=False, fit_to_data=True,
+                          after_draw=draw_selection_highlights)
+
 def _on_reg_filter_click(clicked_mode: str):
       current_mode = reg_filter_var.get()
     
@@ -790,22 +901,66 @@ def _on_reg_filter_click(clicked_mode: str):
             # Diğer butona basıldı -> onu aç
             new_mode = clicked_mode
     
-      reg_filter_var.set(new_mode)
-      settings_state["regression_filter"] = new_mode
-    
-      # Butonların "selected" durumunu güncelle
-      if new_mode == "above":
-            reg_btn_up.state(["selected"])
-            reg_btn_down.state(["!selected"])
-      elif new_mode == "below":
-            reg_btn_up.state(["!selected"])
-            reg_btn_down.state(["selected"])
-      else:
-            reg_btn_up.state(["!selected"])
-            reg_btn_down.state(["!selected"])
+      _set_regression_filter_mode(new_mode)
     
       # Değişikliği uygulamak için grafiği yeniden çiz
-      update_plot(sector_combobox.get(), preserve_zoom=True, fit_to_data=False)
+      request_plot_update(sector_combobox.get(), preserve_zoom=True, fit_to_data=False)
+
+def _sync_regression_buttons(mode):
+      """⬆ / ⬇ / σ butonlarının "selected" durumunu filtre moduna göre ayarlar."""
+      try:
+            reg_btn_up.state(["selected" if mode == "above" else "!selected"])
+            reg_btn_down.state(["selected" if mode == "below" else "!selected"])
+            reg_btn_band.state(["selected" if mode in REGRESSION_BAND_MODES else "!selected"])
+      except Exception:
+            pass
+
+def _set_regression_filter_mode(mode):
+      """Regresyon filtre modunu değişkene, ayarlara ve butonlara yazar (çizim yapmaz)."""
+      reg_filter_var.set(mode)
+      settings_state["regression_filter"] = mode
+      _sync_regression_buttons(mode)
+
+def _schedule_residual_filter_redraw():
+      # Debounce: k / N kaydırıcısı sürüklenirken her adımda değil, durunca bir kere çiz
+      global _residual_filter_timer
+      if _residual_filter_timer is not None:
+            try: root.after_cancel(_residual_filter_timer)
+            except Exception: pass
+      _residual_filter_timer = root.after(RESIDUAL_FILTER_DEBOUNCE_MS, _run_residual_filter_redraw)
+
+def _run_residual_filter_redraw():
+      global _residual_filter_timer
+      _residual_filter_timer = None
+      request_plot_update(sector_combobox.get(), preserve_zoom=True, fit_to_data=False)
+
+def _open_residual_filter():
+      """Residual bandı filtresi penceresi (±kσ, en üst / en alt N%) ve canlı residual histogramı."""
+      handle = residual_window_state["handle"]
+      if handle is not None:
+            try:
+                  if handle["window"].winfo_exists():
+                        handle["window"].lift()
+                        return
+            except Exception:
+                  pass
+      residual_window_state["handle"] = show_residual_filter_window(
+            root, settings_state, lambda: current_regression_residuals,
+            {"set_mode": _set_regression_filter_mode, "apply": _schedule_residual_filter_redraw}
+      )
+
+def _refresh_residual_window():
+      """Görünüm değişince açık Residual Filter penceresinin histogramını yeniler."""
+      handle = residual_window_state["handle"]
+      if handle is None:
+            return
+      try:
+            if handle["window"].winfo_exists():
+                  handle["refresh"]()
+                  return
+      except Exception:
+            pass
+      residual_window_state["handle"] = None
 
 
 def _position_regression_buttons():
@@ -836,9 +991,12 @@ def _position_regression_buttons():
             x = cx + cw - bw - 10
             y_down = cy + ch - bh - 10
             y_up = y_down - bh - 2  
+            y_band = y_up - bh - 2
              
+            reg_btn_band.place(x=x, y=y_band)
             reg_btn_up.place(x=x, y=y_up)
             reg_btn_down.place(x=x, y=y_down)
+            reg_btn_band.lift()
             reg_btn_up.lift()
             reg_btn_down.lift()
       except Exception:
@@ -862,6 +1020,7 @@ def toggle_regression_buttons_visibility():
             try:
                   reg_btn_up.place_forget()
                   reg_btn_down.place_forget()
+                  reg_btn_band.place_forget()
             except Exception:
                   pass
 # =================================================================================
@@ -975,7 +1134,7 @@ def _on_churn_toggle():
       settings_state["show_only_churn"] = bool(churn_only_var.get())
 
       _apply_churn_labels_visibility()
-      update_plot(sector_combobox.get(), preserve_zoom=False, fit_to_data=True)
+      request_plot_update(sector_combobox.get(), preserve_zoom=False, fit_to_data=True)
 
 
 def _on_only_churn_toggle():
@@ -990,23 +1149,31 @@ def _on_only_churn_toggle():
       settings_state["show_only_churn"] = bool(churn_only_var.get())
 
       _apply_churn_labels_visibility()
-      update_plot(sector_combobox.get(), preserve_zoom=False, fit_to_data=True)            
+      request_plot_update(sector_combobox.get(), preserve_zoom=False, fit_to_data=True)
 
 def apply_analytics():
       analytics_state["mode"] = an_mode_var.get()
       analytics_state["show_marginals"] = bool(an_marginal_var.get())
+      try:
+            k_min, k_max = KMEANS_K_RANGE
+            analytics_state["kmeans_k"] = min(max(int(an_k_var.get()), k_min), k_max)
+      except (ValueError, tk.TclError):
+            an_k_var.set(analytics_state["kmeans_k"])
        
       # Eğer Pareto açıksa, koyu tema iyidir ama şimdilik sadece grafiği yenileyelim
+      request_plot_update(sector_combobox.get(), preserve_zoom=True, fit_to_data=False)
 
 churn_enabled_var = tk.BooleanVar(value=True)
 churn_only_var = tk.BooleanVar(value=False)
 an_mode_var = tk.StringVar(value="none")
 an_marginal_var = tk.BooleanVar(value=False)
+an_k_var = tk.IntVar(value=analytics_state["kmeans_k"])
 sidebar_vars = {
     "churn_enabled": churn_enabled_var,
     "churn_only": churn_only_var,
     "an_mode": an_mode_var,
-    "an_marginal": an_marginal_var
+    "an_marginal": an_marginal_var,
+    "an_k": an_k_var
 }
       
 # ===== Sağ YAN PANEL =====
@@ -1088,7 +1255,6 @@ controls_frame.grid_rowconfigure(8, weight=1)
 controls_frame.grid_columnconfigure(0, weight=1)
 
 scatter_points = []
-sector_churn_stats_cache = {}
 last_annotation = None
 
 # =====================================================
@@ -1098,8 +1264,10 @@ manual_removed = set()
 license_removed = set()
 # YENİ: Regresyon filtresi tarafından gizlenen noktalar (anahtar olarak point_key kullanır)
 regression_removed = set()
-# YENİ: Mevcut görünüm için hesaplanan regresyon çizgisi (eğim, kesişim)
-current_regression_line = {'m': None, 'b': None}
+# YENİ: Mevcut görünüm için hesaplanan regresyon çizgisi (eğim, kesişim, R², eğim standart hatası)
+current_regression_line = {'m': None, 'b': None, 'r2': None, 'se': None}
+# Regresyon çizgisinin kapsadığı görünür satırların residual'ları (residual histogramı için)
+current_regression_residuals = np.empty(0)
 
 
 active_legends = []
@@ -1111,17 +1279,20 @@ undo_stack = []
 # Çizim / etkileşim
 # =====================================================
 
-def update_sidebar_statistics(target_df, custom_header=None):
+def update_sidebar_statistics(target_df, custom_header=None, sector_table=None, sector_trends=None):
     """
     Verilen dataframe'e (target_df) göre yan paneldeki istatistikleri günceller.
     Breakdown listeleri sadece seçili veriyi yansıtacak şekilde düzeltildi.
+    sector_table: target_df'in sektör tablosu (sector_stats); yoksa tek groupby ile hesaplanır.
+    sector_trends: {sektör: doğru} ("All sector trends" açıksa); eğimler listenin altına yazılır.
     """
+    if sector_table is None:
+        sector_table = build_sector_stats(target_df, EFFECTIVE_MRR_COL)["table"]
+    named = named_sectors(sector_table)
+
     # 1. Toplam Sayılar (Seçili Veri İçin)
     count = len(target_df)
-    mrr_val = 0.0
-    
-    if EFFECTIVE_MRR_COL in target_df.columns:
-        mrr_val = target_df[EFFECTIVE_MRR_COL].astype(float).sum()
+    mrr_val = float(sector_table["mrr_sum"].sum()) if len(sector_table) else 0.0
 
     prefix = "Selected" if custom_header else "Total"
     
@@ -1131,21 +1302,23 @@ def update_sidebar_statistics(target_df, custom_header=None):
     # 2. Sektör Dağılımı (Selected Customers Breakdown)
     if mrr_val > 0:
         sector_entries = []
-        # Sadece elimizdeki (seçili) veriyi grupluyoruz. 
+        # Sadece elimizdeki (seçili) verinin sektörleri tabloda var.
         # Böylece seçilmeyen sektörler buraya asla girmez.
-        grouped = target_df.groupby('Company Sector')
-        for sec, sd in grouped:
-            c = len(sd)
-            try: s_mrr = sd[EFFECTIVE_MRR_COL].astype(float).sum()
-            except: s_mrr = 0
-            
+        for sec, st in named.iterrows():
+            c = int(st["count"])
             # Pay (Share): Bu sektör, toplam seçimin yüzde kaçı?
             if c > 0:
-                share = (s_mrr / mrr_val) * 100.0
+                share = (st["mrr_sum"] / mrr_val) * 100.0
                 sector_entries.append((share, sec, c))
         
         sector_entries.sort(key=lambda t: t[0], reverse=True)
         lines = [f"{sec}: {c} ({share:.1f}%)" for (share, sec, c) in sector_entries[:15]]
+        # Sektör trendleri açıksa eğimler (büyükten küçüğe)
+        if sector_trends:
+            lines += ["", "Trend slopes:"] + [
+                f"{sec}: {line['m']:.4f}"
+                for sec, line in sorted(sector_trends.items(), key=lambda t: t[1]['m'], reverse=True)
+            ]
         sector_count_label.config(text="\n".join(lines))
     else:
         sector_count_label.config(text="")
@@ -1154,12 +1327,9 @@ def update_sidebar_statistics(target_df, custom_header=None):
     show_churn_stats = settings_state.get("churn_enabled", True) or settings_state.get("show_only_churn", False)
     
     if show_churn_stats and CHURN_COL in target_df.columns:
-        # A) Seçili veri içindeki CHURN olanları ayıkla
-        is_churn_mask = target_df[CHURN_COL].astype(str).str.upper() == "CHURN"
-        churn_df = target_df[is_churn_mask] # Sadece churn olan satırlar
-        
-        sel_churn_cnt = len(churn_df)
-        sel_churn_mrr = churn_df[EFFECTIVE_MRR_COL].astype(float).sum() if not churn_df.empty else 0.0
+        # A) Seçili veri içindeki CHURN adedi ve MRR'ı (tablodan)
+        sel_churn_cnt = int(sector_table["churn_count"].sum())
+        sel_churn_mrr = float(sector_table["churned_mrr"].sum()) if sel_churn_cnt else 0.0
         
         # Seçili toplam MRR (Ratio hesabı için)
         sel_total_mrr = mrr_val 
@@ -1187,18 +1357,15 @@ def update_sidebar_statistics(target_df, custom_header=None):
         else:
             churn_sec_entries = []
             
-            # Sadece seçili alandaki churn'leri grupla
-            churn_grouped = churn_df.groupby('Company Sector')
-            
-            for sec, sd in churn_grouped:
-                cnt = len(sd) # O sektördeki churn adedi
-                sec_c_mrr = sd[EFFECTIVE_MRR_COL].astype(float).sum() # O sektördeki churn MRR
+            # Sadece seçili alanda churn'ü olan sektörler
+            for sec, st in named[named["churn_count"] > 0].iterrows():
+                cnt = int(st["churn_count"]) # O sektördeki churn adedi
                 
                 # İsteğine göre hesap:
                 # "Seçilen Toplam Churn içinde bu sektörün payı nedir?"
                 # Tek sektör seçtiysen pay %100 olur.
                 if sel_churn_mrr > 0:
-                    share_of_churn = (sec_c_mrr / sel_churn_mrr) * 100.0
+                    share_of_churn = (st["churned_mrr"] / sel_churn_mrr) * 100.0
                 else:
                     share_of_churn = 0.0
                 
@@ -1216,16 +1383,607 @@ def update_sidebar_statistics(target_df, custom_header=None):
         churn_ratio_label.pack_forget()
         churn_sector_label.config(text="")
 
-def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
-      global last_annotation, center_x, center_y
+# ================= LİMİTE BAĞLI ÇİZİMLER (zoom / pan için hızlı yol) =================
+# update_plot'un son çizimine ait, sadece eksen limitine bağlı artist ve veriler
+view_state = {
+      "valid": False,
+      "sector": None,
+      "visible_df": None,
+      "plot_center": None,
+      "regression_line": None,
+      "risk_patches": [],
+      "spatial_index": None,
+      "arrow_sets": [],      # fark okları (plot koordinatında başlangıç / bitiş dizileri)
+      "arrow_artists": [],
+      "density": None,       # normal müşteri noktaları için yoğunluk (LOD) durumu
+      "density_artist": None,
+      "sector_table": None,  # visible_df_base'in sektör tablosu (Avg tooltip'leri)
+      "sector_trends": None, # sektör trend çizgileri: (LineCollection, {sektör: doğru})
+}
+
+def _regression_line_points():
+      """Regresyon çizgisini görünür aralığın çok ötesine uzatan (xs, ys)."""
+      m = current_regression_line['m']
+      b = current_regression_line['b']
+
+      xs = _regression_span_xs()
+      return xs, m * xs + b
+
+def _regression_span_xs():
+      """Mevcut eksen limitlerini görünür aralığın çok ötesine uzatan iki x değeri (sonsuzmuş gibi)."""
+      x0, x1 = ax.get_xlim()
+      span = x1 - x0 if x1 != x0 else 1.0
+      return np.array([x0 - span * 1000, x1 + span * 1000])
+
+def _sector_trend_segments(lines):
+      """Sektör trend doğrularının LineCollection segmentleri: (sektör sayısı, 2, 2)."""
+      xs = _regression_span_xs()
+      slopes = np.array([line['m'] for line in lines.values()])
+      intercepts = np.array([line['b'] for line in lines.values()])
+      ys = slopes[:, None] * xs[None, :] + intercepts[:, None]
+      return np.stack([np.broadcast_to(xs, ys.shape), ys], axis=-1)
+
+def _draw_risk_quadrant_overlay(visible_df, plot_cx, plot_cy):
+      """
+      Quadrant Risk Color Map Overlay (distance-weighted).
+      Ağırlıklar görünür alana göre normalize edildiği için limit değişince tekrar çizilir.
+      """
+      for patch in view_state["risk_patches"]:
+            try: patch.remove()
+            except Exception: pass
+      view_state["risk_patches"] = []
+
+      try:
+            if settings_state.get("activate_risk_colormap", False) \
+                 and sector_combobox.get() not in ("Sector Avg", "All") \
+                 and (RISK_COL in df.columns):
+                  # Overlay, *filtreli* visible_df'e göre hesaplanmalı
+                  sec_df = visible_df[visible_df['Company Sector'] == sector_combobox.get()]
+                  if len(sec_df) > 0:
+                        x_plot_col = get_plot_x_col(df, settings_state, license_var.get())
+                        if x_plot_col not in sec_df.columns:
+                              x_plot_col = EFFECTIVE_MRR_COL if EFFECTIVE_MRR_COL in sec_df.columns else BASE_MRR_FALLBACK_COL
+                        px, py = to_plot_coords(sec_df[x_plot_col].to_numpy(dtype=float),
+                                                sec_df['MRR Growth (%)'].to_numpy(dtype=float),
+                                                settings_state.get("swap_axes", False))
+
+                        # Risk kodu -> RGB (tanımsız risk açık gri)
+                        codes = get_risk_codes(sec_df)
+                        cat_rgb = np.array([to_rgb(RISK_COLOR.get(cat, (0.8, 0.8, 0.8))) for cat in codes.cat.categories]
+                                           + [(0.8, 0.8, 0.8)]).reshape(-1, 3)
+                        rgb = cat_rgb[codes.cat.codes.to_numpy()]
+
+                        xlim, ylim = ax.get_xlim(), ax.get_ylim()
+                        colors = weighted_quadrant_colors(
+                              px, py, rgb, plot_cx, plot_cy, xlim, ylim,
+                              weighted=settings_state.get("risk_cmap_weighted", True),
+                              power=float(settings_state.get("risk_cmap_weight_power", 1.0)),
+                        )
+
+                        alpha_bg = 0.18
+                        for color, (xy, w, h) in zip(colors, quadrant_rects(plot_cx, plot_cy, xlim, ylim)):
+                              if color is not None:
+                                    view_state["risk_patches"].append(ax.add_patch(Rectangle(xy, w, h, facecolor=color, alpha=alpha_bg, edgecolor='none', zorder=0.5)))
+      except Exception:
+            pass
+
+def _add_arrow_set(starts, ends, lw=0.9, alpha=0.5, zorder=3, lod=False):
+      """Fark oku grubunu kaydeder; çizim limitler belli olunca _draw_arrow_layers ile yapılır."""
+      view_state["arrow_sets"].append({
+            "starts": np.asarray(starts, dtype=float).reshape(-1, 2),
+            "ends": np.asarray(ends, dtype=float).reshape(-1, 2),
+            "lw": lw, "alpha": alpha, "zorder": zorder, "lod": lod,
+      })
+
+def _draw_arrow_layers():
+      """Her ok grubunu tek quiver olarak (gerekirse LOD ile seyrelterek) yeniden çizer."""
+      for art in view_state["arrow_artists"]:
+            try: art.remove()
+            except Exception: pass
+      view_state["arrow_artists"] = []
+
+      for arrow_set in view_state["arrow_sets"]:
+            starts, ends = arrow_set["starts"], arrow_set["ends"]
+            if arrow_set["lod"]:
+                  starts, ends = thin_arrows(ax, starts, ends)
+            art = draw_arrows(ax, starts, ends, lw=arrow_set["lw"], alpha=arrow_set["alpha"],
+                              zorder=arrow_set["zorder"])
+            if art is not None:
+                  view_state["arrow_artists"].append(art)
+
+def _draw_density_layer():
+      """
+      Görünür normal nokta sayısı eşiği aşarsa scatter gizlenir, yerine yoğunluk
+      görüntüsü çizilir; altına inerse noktalar geri gelir. Churn X'leri ve
+      overlay'ler (arama / seçim / hover) her durumda üstte kalır.
+      Gizli scatter scatter_points'te kalır; hover ve seçim çalışmaya devam eder.
+      """
+      art = view_state["density_artist"]
+      if art is not None:
+            try: art.remove()
+            except Exception: pass
+      view_state["density_artist"] = None
+
+      state = view_state["density"]
+      if state is None:
+            return
+
+      threshold = int(settings_state.get("lod_point_threshold", LOD_POINT_THRESHOLD) or 0)
+      use_density = threshold > 0 and points_in_view(state["px"], state["py"], ax.get_xlim(), ax.get_ylim()) > threshold
+      state["scatter"].set_visible(not use_density)
+      if use_density:
+            view_state["density_artist"] = draw_density(ax, state, zorder=5, alpha=0.9)
+
+def refresh_view_limits():
+      """
+      Zoom / pan sonrası hızlı yol: noktalar, legend'lar ve etiketler aynen kalır,
+      sadece limite bağlı çizimler (regresyon çizgisi uçları, risk quadrant
+      arka planı) ve banner güncellenir. Son çizim geçersizse update_plot'a düşer.
+      """
+      if not view_state["valid"] or view_state["sector"] != sector_combobox.get():
+            # Art arda gelen wheel zoom'larda sadece son istek çizilir
+            request_plot_update(sector_combobox.get(), preserve_zoom=True, fit_to_data=False,
+                                after_draw=draw_selection_highlights)
+            return
+
+      line = view_state["regression_line"]
+      if line is not None and current_regression_line['m'] is not None:
+            try:
+                  line.set_data(*_regression_line_points())
+            except Exception as e:
+                  print(f"Regresyon çizimi hatası: {e}")
+      if view_state["sector_trends"] is not None:
+            trend_collection, trend_lines = view_state["sector_trends"]
+            trend_collection.set_segments(_sector_trend_segments(trend_lines))
+
+      plot_cx, plot_cy = view_state["plot_center"]
+      _draw_risk_quadrant_overlay(view_state["visible_df"], plot_cx, plot_cy)
+      _draw_arrow_layers()
+      _draw_density_layer()
+      invalidate_overlay_background(overlay)
+
+      canvas.draw_idle()
+      update_fixed_banner()
+
+# ================= FİLTRE HATTI (update_plot veri aşamaları) =================
+plot_pipeline = create_filter_pipeline()
+
+def _apply_risk_mask(frame, risk_ok):
+      """Risk aşamasının (df index'ine hizalı) maskesini alt DataFrame'e uygular."""
+      if risk_ok is None or len(frame) == 0:
+            return frame
+      return frame[risk_ok.loc[frame.index].to_numpy()]
+
+def _plot_inputs(selected_sector):
+      """
+      Çizimin veri girdileri, UI thread'inde okunur (Tk değişkenleri, arama kutusu):
+      (selected_sector, x_col, hidden, state, focus, analytics). state settings_state'in kopyasıdır.
+      """
+      _sync_settings_from_ui()
+      state = dict(settings_state)
+      x_col = get_plot_x_col(df, state, license_var.get())
+      hidden = frozenset().union(manual_removed, license_removed)
+
+      # ================= YENİ: HOLD-TO-FOCUS MANTIĞI (GÜNCELLENDİ) =================
+      # Eğer butona BASILI TUTULUYORSA (is_focus_held == True) eşleşmeyen noktalar çizilmez.
+      # Eşleşme maskesi arama indeksinden, filtre aşamalarından sonra ("focus" aşaması) üretilir.
+      focus = None
+      if is_focus_held:
+            # Normalizasyon (search_fold) arama indeksinin içinde yapılır
+            term = search_var.get().strip()
+            if term:
+                  focus = (term, state.get("search_mode", "prefix"), selected_sector == "Sector Avg")
+      # =============================================================================
+
+      analytics = (analytics_state["mode"], analytics_state["kmeans_k"], analytics_state["kmeans_backend"])
+      return selected_sector, x_col, hidden, state, focus, analytics
+
+def _compute_plot_payload(inputs):
+      """
+      update_plot'un veri kısmı (Tk'ye dokunmaz, arka plan iş parçacığında da çalışır):
+      filtre aşamaları, hold-to-focus maskesi ve analytics (K-Means / Pareto) sonucu.
+      """
+      selected_sector, x_col, hidden, state, focus, analytics = inputs
+      with plot_pipeline["lock"]:
+            stages = _compute_filter_stages(selected_sector, x_col, hidden, state=state)
+            focus_ok = _focus_stage(focus)
+
+      # Analytics tüm görünüm için bir kere hesaplanır; sonuç visible_df_base.index'e hizalı
+      # Series'tir (aynı veri + k için önbellekten gelir)
+      ana_labels = None
+      ana_mask = None
+      mode, kmeans_k, kmeans_backend = analytics
+      if selected_sector != "Sector Avg":
+            if mode == "kmeans":
+                  ana_labels = calculate_kmeans_labels(stages[0], x_col, k=kmeans_k, backend=kmeans_backend)
+            elif mode == "pareto":
+                  ana_mask = calculate_pareto_mask(stages[0], x_col)
+      return {"inputs": inputs, "stages": stages, "focus_ok": focus_ok,
+              "ana_labels": ana_labels, "ana_mask": ana_mask}
+
+def _apply_plot_payload(payload):
+      """
+      Payload'ın filtre hattı sonucunu ana thread'de devreye alır: regresyon çizgisi,
+      residual'ları ve filtresinin çıkardığı noktalar global duruma yazılır.
+      Dönüş: (visible_df_base, stats_df, visible_df, risk_ok, sector_stats, focus_ok)
+      focus_ok: focus varken df'e hizalı "görünür ve eşleşen" maskesi, yoksa None
+      """
+      global current_regression_residuals
+      visible_df_base, stats_df, visible_df, risk_ok, line, removed, sector_stats, residuals = payload["stages"]
+      focus_ok = payload["focus_ok"]
+
+      current_regression_line.clear()
+      current_regression_line.update({'r2': None, 'se': None}, **line)
+      regression_removed.clear()
+      regression_removed.update(removed)
+      current_regression_residuals = residuals
+      _refresh_residual_window()
+
+      return visible_df_base, stats_df, visible_df, risk_ok, sector_stats, focus_ok
+
+def _focus_stage(focus):
+      """
+      Hold-to-focus maskesi: önbellekteki age aşamasının maskesi ile arama eşleşmesi.
+      Sonraki aşamalar buna bağlı değildir; bas / bırak sadece çizimi değiştirir.
+      """
+      if focus is None:
+            return None
+      term, search_mode, by_sector = focus
+      age_keep = stage_value(plot_pipeline, "age")
+      return run_stage(plot_pipeline, "focus", (focus, stage_rev(plot_pipeline, "age")),
+                       lambda: age_keep & search_row_mask(search_index, term, mode=search_mode, by_sector=by_sector))
+
+def _compute_filter_stages(selected_sector, x_col, hidden, state=None):
+      """
+      Filtre hattının saf hesap kısmı (Tk'ye ve global çizim durumuna dokunmaz),
+      bu yüzden arka plan iş parçacığında da çalışabilir.
+      Dönüş: (visible_df_base, stats_df, visible_df, risk_ok, line, removed, sector_stats, residuals)
+      residuals: çizginin kapsadığı satırların residual dizisi (histogram için; çizgi yoksa boş)
+      state: ayar sözlüğü; arka plan işleri UI thread'inde alınmış kopyayı verir (None → settings_state)
+      """
+      if state is None:
+            state = settings_state
+      age_mode = state.get("age_filter_mode", "0-Current")
+      swap_axes = state.get("swap_axes", False)
+
+      # 1) Gizli noktalar (manual + license) ve limit modu
+      limit_key = tuple(state.get(k) for k in ("mode", "mrr_min", "mrr_max", "growth_min", "growth_max"))
+
+      def _hidden():
+            mask = point_keys_mask(point_index, state, hidden)
+            mask |= get_limit_removed_mask(df, state, point_index)
+            return ~mask
+
+      keep = run_stage(plot_pipeline, "hidden", (frozenset(hidden), age_mode, limit_key), _hidden)
+      hidden_keep = keep
+
+      # 2) Churn Include / Show Only
+      churn_key = (stage_rev(plot_pipeline, "hidden"),
+                   state.get("churn_enabled", True), state.get("show_only_churn", False))
+
+      def _churn():
+            return keep & churn_keep_mask(df, state)
+
+      keep = run_stage(plot_pipeline, "churn", churn_key, _churn)
+
+      # 3) Yaş filtresi
+      def _age():
+            return keep & age_keep_mask(df, state)
+
+      keep = run_stage(plot_pipeline, "age", (stage_rev(plot_pipeline, "churn"), age_mode), _age)
+
+      # 4) Yaşa göre kolon yeniden yazımı (Growth, Base MRR, Churned MRR, Exc. License MRR)
+      def _columns():
+            # Yaş moduna göre kolonlar (Growth, Base MRR + Churned MRR, Exc. License MRR)
+            # önceden hesaplanmış projeksiyondan satır seçimiyle yazılır
+            projection = get_age_projection(projection_store, df, age_mode)
+            rows = np.asarray(keep, dtype=bool)
+            base = df[keep].copy()
+            for col, values in projection["stats"].items():
+                  base[col] = values[rows]
+
+            # İstatistik verisi (stats) grafikte çizilenle birebir aynı, Exc. yazımından önceki hali
+            stats = base.copy()
 
-      # settings_state ile Churn checkbox senkronu
+            # Exc. License MRR’i yaş moduna göre doldur (Exc. görünümünde kullanılacak)
+            for col, values in projection["exc"].items():
+                  base[col] = values[rows]
+            return base, stats
+
+      visible_df_base, stats_df = run_stage(
+            plot_pipeline, "columns", (stage_rev(plot_pipeline, "age"), age_mode), _columns
+      )
+
+      # 5) Sektör bazlı risk filtresi (df index'ine hizalı maske; kapalıysa None)
+      risk_active = is_risk_view_active(selected_sector, df.columns, state)
+      risk_key = (risk_active,) + tuple(state.get(k, True) for k in
+                  ("risk_show_no", "risk_show_low", "risk_show_med", "risk_show_high", "risk_show_booked"))
+
+      def _risk():
+            if not risk_active:
+                  return None
+            return get_risk_allowed_mask(df, state)
+
+      risk_ok = run_stage(plot_pipeline, "risk", risk_key, _risk)
+
+      # 6) Regresyon çizgisi + filtresi
+      # Regresyon çizgisi, SADECE "Sector Avg" DIŞINDAKİ görünümlerde ve ayar açıksa hesaplanır.
+      fixed_params = state.get("fixed_regression_params")
+      if state.get("fix_regression_line", False) and fixed_params:
+            line_key = ("fixed", fixed_params.get('m'), fixed_params.get('b'))
+      elif state.get("show_regression_line", False) and selected_sector != "Sector Avg":
+            line_key = ("fit", selected_sector, stage_rev(plot_pipeline, "risk"))
+      else:
+            line_key = ("none",)
+
+      def _regression():
+            line = {'m': None, 'b': None}
+            if line_key[0] == "fixed":
+                  # Hesaplanmış veriyi direkt kullan, yeni hesap yapma
+                  line['m'], line['b'] = line_key[1], line_key[2]
+            elif line_key[0] == "fit":
+                  # Doğru küpteki yeterli istatistiklerin dilim toplamından (satır taraması yok);
+                  # gizli noktalar değişince küp sadece fark satırlarıyla güncellenir
+                  set_olap_active(aggregate_cube, hidden_keep)
+                  risk_allowed = None
+                  if risk_active and (RISK_COL in df.columns):
+                        risk_allowed = risk_axis_filter(aggregate_cube, state)
+                  line = olap_regression(aggregate_cube, age_mode,
+                                         "exc" if x_col == 'Exc. License MRR' else "mrr",
+                                         churn_axis_filter(state), risk_allowed,
+                                         None if selected_sector == "All" else [selected_sector],
+                                         swap_axes=swap_axes)
+
+            # σ bandı / yüzdelikler sadece görünümün satırlarından (tek sektörde o sektör + risk filtresi)
+            scope = None
+            if selected_sector != "All":
+                  in_view = visible_df_base[visible_df_base['Company Sector'] == selected_sector]
+                  if risk_active and (RISK_COL in in_view.columns):
+                        in_view = _apply_risk_mask(in_view, risk_ok)
+                  scope = visible_df_base.index.isin(in_view.index)
+
+            # Filtre modu seçiliyse visible_df çizgiye / residual bandına göre filtrelenir
+            removed = set()
+            filtered, residuals = apply_regression_filter(visible_df_base, x_col, state, line, removed,
+                                                          swap_axes=swap_axes, point_index=point_index,
+                                                          scope_mask=scope)
+            if residuals is None:
+                  residuals = np.empty(0)
+            elif scope is not None:
+                  residuals = residuals[scope]
+            return line, filtered, removed, residuals[np.isfinite(residuals)]
+
+      reg_filter = state.get("regression_filter", "none")
+      band_key = ((state.get("regression_band_k", 1.0), state.get("regression_band_pct", 10.0))
+                  if reg_filter in REGRESSION_BAND_MODES else None)
+      reg_key = (stage_rev(plot_pipeline, "columns"), line_key, x_col, swap_axes, selected_sector,
+                 stage_rev(plot_pipeline, "risk"), reg_filter, band_key)
+      line, visible_df, removed, residuals = run_stage(plot_pipeline, "regression", reg_key, _regression)
+
+      # 7) Sektör toplamları: Sector Avg noktaları, fit limitleri, yan panel ve tooltip'ler
+      # ön-toplam küpün dilimidir. Gizli noktalar değişince küp sadece fark satırlarıyla güncellenir.
+      x_measure = "exc" if x_col == 'Exc. License MRR' else "mrr"
+      churn_filter = churn_axis_filter(state)
+
+      show_trends = state.get("show_sector_trends", False)
+
+      def _sectors():
+            set_olap_active(aggregate_cube, hidden_keep)
+            base = {"table": olap_sector_table(aggregate_cube, age_mode, x_measure, churn_filter),
+                    "rows": olap_sector_rows(aggregate_cube, keep),
+                    "totals": olap_totals(aggregate_cube, age_mode, x_measure, churn_filter)}
+            # "All sector trends": her sektörün doğrusu aynı hücre toplamlarından tek seferde
+            base["trends"] = (olap_sector_regressions(aggregate_cube, age_mode, x_measure, churn_filter,
+                                                      swap_axes=swap_axes) if show_trends else {})
+            if visible_df is visible_df_base:
+                  return {"base": base, "visible": base}
+
+            # Regresyon filtresi: çizilen satırlar küpün aktif satırlarından fark olarak düşülür
+            vis_keep = np.zeros(len(df), dtype=bool)
+            vis_keep[df.index.get_indexer(visible_df.index)] = True
+            cube_keep = hidden_keep & ~(keep & ~vis_keep)
+            visible = {"table": olap_sector_table(aggregate_cube, age_mode, x_measure, churn_filter, keep=cube_keep),
+                       "rows": olap_sector_rows(aggregate_cube, vis_keep)}
+            return {"base": base, "visible": visible}
+
+      sectors_key = (stage_rev(plot_pipeline, "columns"), stage_rev(plot_pipeline, "regression"), x_col,
+                     swap_axes, show_trends)
+      sector_stats = run_stage(plot_pipeline, "sectors", sectors_key, _sectors)
+
+      return visible_df_base, stats_df, visible_df, risk_ok, line, removed, sector_stats, residuals
+
+# ================= ARKA PLAN HESAP (veri işleri Tk döngüsünün dışında) =================
+compute_executor = create_compute_executor(root)
+# İş adları kaynağa göre: aynı kaynaktan gelen yeni istek eskisini iptal eder, diğerlerine dokunmaz
+PLOT_JOB_VIEW = "plot:view"
+PLOT_JOB_LICENSE = "plot:license"
+
+def _sync_settings_from_ui():
+      """Tk değişkenlerine bağlı ayarları settings_state'e yazar (sadece ana thread'de çağrılır)."""
       settings_state["churn_enabled"] = bool(churn_enabled_var.get())
       settings_state["show_only_churn"] = bool(churn_only_var.get())
       # YENİ: Regresyon filtresi durumunu global state'e yansıt
       settings_state["regression_filter"] = reg_filter_var.get()
 
-      x_col = get_plot_x_col(df, settings_state, license_var.get())
+def _draw_plot_payload(payload, preserve_zoom=True, fit_to_data=False, after_draw=None, retry=True):
+      """
+      Arka plan işinin sonucunu çizer. İş sürerken girdiler (ayarlar, gizli noktalar,
+      focus) değiştiyse eski sonuç çizilmez; hesap UI'da yapılmadan bir kere yeniden sıraya alınır.
+      """
+      selected_sector = payload["inputs"][0]
+      # Seçili sektör de girdidir: iş sürerken sektör değiştiyse eski görünüm çizilmez
+      current = _plot_inputs(sector_combobox.get())
+      if retry and current != payload["inputs"]:
+            _submit_plot_job(current, preserve_zoom, fit_to_data, after_draw, retry=False)
+            return
+      update_plot(selected_sector, preserve_zoom=preserve_zoom, fit_to_data=fit_to_data, payload=payload)
+      if after_draw is not None:
+            after_draw()
+
+def _submit_plot_job(inputs, preserve_zoom=True, fit_to_data=False, after_draw=None, retry=True):
+      submit_job(compute_executor, PLOT_JOB_VIEW, lambda: _compute_plot_payload(inputs),
+                 lambda payload: _draw_plot_payload(payload, preserve_zoom, fit_to_data, after_draw, retry))
+
+def request_plot_update(selected_sector, preserve_zoom=True, fit_to_data=False, after_draw=None):
+      """
+      update_plot'un asenkron hali: veri kısmı (filtre aşamaları, focus, analytics)
+      compute_executor'da hesaplanır, update_plot sonuç root.after ile ana döngüye
+      dönünce sadece çizer. Art arda gelen istekte sadece en sonuncusu çizilir.
+      """
+      _submit_plot_job(_plot_inputs(selected_sector), preserve_zoom, fit_to_data, after_draw)
+
+# K-Means renk paleti (Canlı renkler)
+KMEANS_COLORS = ['#e41a1c', '#377eb8', '#4daf4a', '#984ea3', '#ff7f00', '#a65628', '#f781bf', '#999999']
+
+def _build_customer_point_arrays(visible_df, drawn_sectors, x_col, risk_active, risk_ok, ana_labels, ana_mask):
+      """
+      Müşteri görünümü için tüm noktaları tek geçişte hazırlar.
+      Satırlar drawn_sectors sırasına göre dizilir (çizim sırası eskisiyle aynı kalır).
+      Dönüş: {"df", "sector_pos", "px", "py", "colors", "churn"}
+      """
+      sector_pos_map = {sec: i for i, sec in enumerate(drawn_sectors)}
+      draw_df = visible_df
+      if risk_active and (RISK_COL in draw_df.columns):
+            draw_df = _apply_risk_mask(draw_df, risk_ok)
+
+      sec_pos = draw_df['Company Sector'].map(sector_pos_map).to_numpy(dtype=float)
+      keep = ~np.isnan(sec_pos)
+      sec_pos = sec_pos[keep].astype(int)
+      order = np.argsort(sec_pos, kind="stable")
+      draw_df = draw_df[keep].iloc[order]
+      sec_pos = sec_pos[order]
+
+      if x_col in draw_df.columns:
+            xs = draw_df[x_col].to_numpy(dtype=float)
+      else:
+            fallback = EFFECTIVE_MRR_COL if EFFECTIVE_MRR_COL in draw_df.columns else BASE_MRR_FALLBACK_COL
+            xs = draw_df[fallback].to_numpy(dtype=float)
+      ys = draw_df['MRR Growth (%)'].to_numpy(dtype=float)
+      px, py = to_plot_coords(xs, ys, settings_state.get("swap_axes", False))
+
+      # --- RENK BELİRLEME MANTIĞI (satır bazlı if/elif zincirinin vektörel hali) ---
+      # Varsayılan: Sektör rengi
+      sector_rgba = np.array([to_rgba(color_map[sec]) for sec in drawn_sectors]).reshape(-1, 4)
+      colors = sector_rgba[sec_pos] if len(sec_pos) else np.empty((0, 4))
+      mode = analytics_state["mode"]
+
+      # A) Risk Modu Açıksa
+      if risk_active and (RISK_COL in draw_df.columns) and mode == "none":
+            codes = get_risk_codes(draw_df)
+            cats = codes.cat.categories
+            has_color = np.array([cat in RISK_COLOR for cat in cats] + [False])
+            cat_rgba = np.array([to_rgba(RISK_COLOR.get(cat, "black")) for cat in cats] + [(0, 0, 0, 0)]).reshape(-1, 4)
+            cat_idx = codes.cat.codes.to_numpy()
+            use = has_color[cat_idx]
+            colors[use] = cat_rgba[cat_idx[use]]
+
+      # B) K-Means Modu Açıksa
+      elif mode == "kmeans" and ana_labels is not None:
+            labels = ana_labels.reindex(draw_df.index).to_numpy(dtype=float)
+            use = ~np.isnan(labels)
+            palette = np.array([to_rgba(c) for c in KMEANS_COLORS])
+            colors[use] = palette[labels[use].astype(int) % len(KMEANS_COLORS)]
+
+      # C) Pareto Modu Açıksa
+      elif mode == "pareto" and ana_mask is not None:
+            top = ana_mask.reindex(draw_df.index)
+            known = top.notna().to_numpy()
+            is_top = top.fillna(False).astype(bool).to_numpy()
+            colors[known & is_top] = to_rgba("#00FF00")    # Parlak Yeşil (Nakit İnekleri)
+            colors[known & ~is_top] = to_rgba("#444444")   # Sönük Gri
+
+      # NEW/CHURN: churn satırları ayrı katmanda (X marker)
+      if CHURN_COL in draw_df.columns:
+            is_churn = get_churn_mask(draw_df).to_numpy()
+            if settings_state.get("show_only_churn", False):
+                  churn = is_churn
+            else:
+                  churn = settings_state.get("churn_enabled", True) & is_churn
+      else:
+            churn = np.zeros(len(draw_df), dtype=bool)
+
+      return {"df": draw_df, "sector_pos": sec_pos, "px": px, "py": py, "colors": colors, "churn": churn}
+
+def _draw_customer_point_layers(points, drawn_sectors, sector_proxies):
+      """
+      Normal noktalar tek, churn noktaları tek koleksiyon olarak çizilir ve scatter_points'e eklenir.
+      Sektör kimliği points["sector_pos"] dizisinde durur; legend için sektör başına proxy üretilir.
+      """
+      churn = points["churn"]
+      norm = ~churn
+      sec_pos = points["sector_pos"]
+
+      # Normal (churn olmayan) noktalar
+      if norm.any():
+            sc = ax.scatter(points["px"][norm], points["py"][norm], c=points["colors"][norm], s=80, alpha=0.90,
+                            edgecolors='black', linewidths=0.8,
+                            label="_customers", zorder=5, clip_on=True)
+            scatter_points.append((sc, points["df"][norm]))
+            view_state["density"] = create_density_state(points["px"][norm], points["py"][norm])
+            view_state["density"]["scatter"] = sc
+
+      # NEW/CHURN: churn olanlar X marker ile
+      if churn.any():
+            scx = ax.scatter(points["px"][churn], points["py"][churn], s=90, marker='x',
+                             linewidths=2.0, color=CHURN_X_COLOR,
+                             label="_churned", zorder=6, clip_on=True)
+            scatter_points.append((scx, points["df"][churn]))
+
+      # Legend proxy'leri: sektörün ilk normal noktasının rengi, hiç yoksa churn işareti
+      for pos, sector in enumerate(drawn_sectors):
+            in_sector = sec_pos == pos
+            first_norm = np.flatnonzero(in_sector & norm)
+            if len(first_norm):
+                  sector_proxies.append(Line2D([], [], linestyle='None', marker='o', markersize=np.sqrt(80),
+                                               markerfacecolor=points["colors"][first_norm[0]],
+                                               markeredgecolor='black', markeredgewidth=0.8,
+                                               alpha=0.90, label=sector))
+            elif (in_sector & churn).any():
+                  sector_proxies.append(Line2D([], [], linestyle='None', marker='x', markersize=np.sqrt(90),
+                                               markeredgewidth=2.0, color=CHURN_X_COLOR, label=sector))
+
+def _add_customer_arrows(points, drawn_sectors, x_col, base_col_for_arrow, extra_points_for_fit):
+      """
+      Müşteri fark okları tek geçişte: baz MRR -> Exc. License MRR (yatay) ve
+      varsa güncel growth kolonu (dikey). Eski konumlar sektör renginde silik noktalar.
+      """
+      draw_df = points["df"]
+      if len(draw_df) == 0 or base_col_for_arrow not in draw_df.columns:
+            return
+      swap = settings_state.get("swap_axes", False)
+      y = draw_df['MRR Growth (%)']
+
+      starts, ends, ok = arrow_segments(draw_df[base_col_for_arrow], y, draw_df['Exc. License MRR'], y, swap)
+      extra_points_for_fit.extend(map(tuple, starts.tolist()))
+      extra_points_for_fit.extend(map(tuple, ends.tolist()))
+
+      if len(starts):
+            sector_rgba = np.array([to_rgba(color_map.get(sec, 'gray')) for sec in drawn_sectors]).reshape(-1, 4)
+            ax.scatter(starts[:, 0], starts[:, 1], c=sector_rgba[points["sector_pos"][ok]], s=60, alpha=0.35,
+                       edgecolors='none', zorder=3, label="_nolegend_", clip_on=True)
+            moved = moved_mask(starts, ends, 0.0001)
+            _add_arrow_set(starts[moved], ends[moved], lw=0.9, alpha=0.5, lod=True)
+
+      updated_y_col = get_updated_y_col_if_any(df)
+      if updated_y_col is not None and updated_y_col in draw_df.columns and x_col in draw_df.columns:
+            xs = draw_df[x_col].to_numpy(dtype=float)[ok]
+            q0, q1, _ = arrow_segments(xs, y.to_numpy(dtype=float)[ok], xs,
+                                       draw_df[updated_y_col].to_numpy(dtype=float)[ok], swap)
+            extra_points_for_fit.extend(map(tuple, q0.tolist()))
+            extra_points_for_fit.extend(map(tuple, q1.tolist()))
+            _add_arrow_set(q0, q1, lw=0.8, alpha=0.45, lod=True)
+
+def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False, payload=None):
+      """
+      Grafiği çizer. payload (request_plot_update / arka plan işi sonucu) verilirse veri
+      kısmı ondan alınır; verilmezse burada hesaplanır (aşamalar çoğunlukla önbellekten).
+      """
+      global last_annotation, center_x, center_y
+
+      if payload is None:
+            # settings_state ile Churn checkbox / regresyon filtresi senkronu _plot_inputs içinde
+            payload = _compute_plot_payload(_plot_inputs(selected_sector))
+      x_col = payload["inputs"][1]
 
       if preserve_zoom:
             try:
@@ -1243,6 +2001,18 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
             last_annotation = None
 
       ax.clear()
+      invalidate_overlay_background(overlay)
+      clear_overlay_group(overlay, "hover", redraw=False)
+      # ax.clear() ile limite bağlı artistler de gitti; hızlı yol bu çizim bitene kadar kapalı
+      view_state["valid"] = False
+      view_state["spatial_index"] = None
+      view_state["regression_line"] = None
+      view_state["sector_trends"] = None
+      view_state["risk_patches"] = []
+      view_state["arrow_sets"] = []
+      view_state["arrow_artists"] = []
+      view_state["density"] = None
+      view_state["density_artist"] = None
       #Eski marjinal grafikleri temizle
       for art in analytics_state["marginal_artists"]:
             try: art.remove()
@@ -1252,140 +2022,30 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
       scatter_points.clear()
       _clear_highlight_overlays()   # yeni çizimde eski highlight overlaylerini temizle
 
-      hidden = set().union(manual_removed, license_removed, get_limit_removed_keys(df, settings_state))
+      # Filtre hattı: sadece ayarı değişen aşamalar yeniden hesaplanır (zoom/pan'da hepsi önbellekten)
+      visible_df_base, stats_df, visible_df, risk_ok, sector_stats, focus_ok = _apply_plot_payload(payload)
+      base_sector_table = sector_stats["base"]["table"]
 
-      # ================= YENİ: HOLD-TO-FOCUS MANTIĞI (GÜNCELLENDİ) =================
-      # Eğer butona BASILI TUTULUYORSA (is_focus_held == True)
-      if is_focus_held:
-            term = search_var.get().strip().casefold()
-            if term:
-                  is_sector_avg_mode = (selected_sector == "Sector Avg")
-                   
-                  for _, row in df.iterrows():
-                        if is_sector_avg_mode:
-                              # Sector Avg modundaysak: "Technology Avg" gibi bir yapı arıyoruz.
-                              # Row'un sektörünü alıp sonuna " Avg" ekleyip kontrol ediyoruz.
-                              sec_name = str(row.get('Company Sector', '')).strip()
-                              # Arama yaparken "Technology Avg" diye arıyoruz, o yüzden karşılaştırma stringi bu olmalı:
-                              lbl_to_check = f"{sec_name} Avg".casefold()
-                               
-                              if not lbl_to_check.startswith(term):
-                                    hidden.add(get_point_key(row, settings_state))
-                        else:
-                              # Normal Müşteri Modu: Müşteri adına bak
-                              c_name = str(row.get('Customer', '')).strip().casefold()
-                              if not c_name.startswith(term):
-                                    hidden.add(get_point_key(row, settings_state))
-      # =============================================================================
-
-      visible_df_base = df[~df.apply(
-            lambda r: get_point_key(r, settings_state) in hidden, axis=1
-      )].copy()
-      stats_df = visible_df_base.copy()
-       
-      # ============== NEW/CHURN: Include / Show Only mantığı ==============
-      visible_df_base = apply_churn_filters(visible_df_base, settings_state)
-      stats_df = apply_churn_filters(stats_df, settings_state)
-      # =====================================================================
-
-      # ============== NEW/AGE: yaş filtresi & yaşa göre kolon seçimi ==============
-      visible_df_base = apply_age_filters(visible_df_base, settings_state)
-      
-      # DİKKAT: stats_df'i burada oluşturmuyoruz! Aşağıya taşıdık.
-
-      age_growth_col = get_growth_source_col_for_age_mode(settings_state, df.columns)
-      if age_growth_col in visible_df_base.columns:
-            visible_df_base['MRR Growth (%)'] = visible_df_base[age_growth_col].astype(float) * 100.0
-
-      age_base_mrr_col = get_base_mrr_col_for_age_mode(settings_state, df.columns)
-      if age_base_mrr_col in visible_df_base.columns:
-            visible_df_base[EFFECTIVE_MRR_COL] = visible_df_base[age_base_mrr_col].astype(float)
-
-      # churn ise MRR'i Churned MRR ile değiştir
-      if (CHURN_COL in visible_df_base.columns) and (CHURNED_MRR_COL in visible_df_base.columns):
-            churn_mask_loc = visible_df_base[CHURN_COL].astype(str).str.upper().eq("CHURN")
-            visible_df_base.loc[churn_mask_loc, EFFECTIVE_MRR_COL] = visible_df_base.loc[churn_mask_loc, CHURNED_MRR_COL].astype(float)
-
-      # =====================================================================
-      # KRİTİK DÜZELTME: stats_df'i BURADA OLUŞTURUYORUZ
-      # Böylece grafikte çizilen (visible_df_base) ile istatistik verisi (stats_df)
-      # birebir aynı oluyor. Churn müşterileri artık doğru koordinatta.
-      # =====================================================================
-      stats_df = visible_df_base.copy()
-
-      # Exc. License MRR’i yaş moduna göre doldur (Exc. görünümünde kullanılacak)
-      exc_src = get_exc_mrr_col_for_age_mode(settings_state)
-      if exc_src in visible_df_base.columns:
-            visible_df_base['Exc. License MRR'] = visible_df_base[exc_src].astype(float)
-      # =====================================================================
-
-      # ===================== YENİ: REGRESYON HESAPLAMA (Çizimden Önce) =====================
-      # Regresyon çizgisi, SADECE "Sector Avg" DIŞINDAKİ görünümlerde ve ayar açıksa hesaplanır.
-      # Ve _apply_regression_filter'dan ÖNCE hesaplanır.
-    
-      current_regression_line['m'] = None
-      current_regression_line['b'] = None
-
-      # Başlangıçta sıfırla (eğer sabit değilse)
-      if not settings_state.get("fix_regression_line", False):
-            current_regression_line['m'] = None
-            current_regression_line['b'] = None
-
-      # A) EĞER SABİTLEME AÇIKSA VE ELİMİZDE PARAMETRE VARSA:
-      if settings_state.get("fix_regression_line", False) and settings_state.get("fixed_regression_params"):
-            # Hesaplanmış veriyi direkt kullan, yeni hesap yapma
-            saved_params = settings_state["fixed_regression_params"]
-            current_regression_line['m'] = saved_params.get('m')
-            current_regression_line['b'] = saved_params.get('b')
-       
-      # B) YOKSA VE REGRESYON AÇIKSA: NORMAL HESAPLAMA YAP
-      elif settings_state.get("show_regression_line", False) and selected_sector != "Sector Avg":
-            
-            # Geçici bir kopya al
-            temp_df_for_line = visible_df_base.copy()
-            if selected_sector != "All":
-                temp_df_for_line = temp_df_for_line[temp_df_for_line['Company Sector'] == selected_sector]
-            
-            # Risk filtresi varsa uygula
-            if is_risk_view_active(selected_sector, df.columns, settings_state) and (RISK_COL in temp_df_for_line.columns):
-                 temp_df_for_line = temp_df_for_line[temp_df_for_line[RISK_COL].astype(str).str.upper().apply(lambda val: is_risk_allowed(val, settings_state))]
-    
-            # --- YENİ: Hesabı 'analysis.py' içindeki fonksiyona yaptır ---
-            res = calculate_regression_line(
-                temp_df_for_line, 
-                x_col, 
-                swap_axes=settings_state.get("swap_axes", False)
-            )
-            current_regression_line['m'] = res['m']
-            current_regression_line['b'] = res['b']
-            # ------------------------------------------------------------
-
-      # ===================== /REGRESYON HESAPLAMA =====================
-
-      # ===================== YENİ: REGRESYON FİLTRESİ UYGULAMA =====================
-      # Çizgi hesaplandıktan sonra, EĞER 'above' veya 'below' seçiliyse,
-      # visible_df'i filtrele.
-      visible_df = apply_regression_filter(
-        visible_df_base,
-        x_col,
-        settings_state,
-        current_regression_line,
-        regression_removed,
-        swap_axes=settings_state.get("swap_axes", False)
-      )
-      # ===================== /REGRESYON FİLTRESİ =====================
+      # Hold-to-focus: eşleşmeyenler sadece çizimden düşer (merkez, regresyon ve yan panel önbellekten)
+      # Sektör tablosunun satır pozisyonları (sector_stats["visible"]["rows"]) focus'suz çerçeveye göredir
+      stage_visible_df = visible_df
+      avg_sector_table = base_sector_table
+      if focus_ok is not None:
+            visible_df = visible_df[focus_ok[df.index.get_indexer(visible_df.index)]]
+            if selected_sector == "Sector Avg":
+                  focused = df.loc[focus_ok, 'Company Sector'].unique()
+                  avg_sector_table = base_sector_table[base_sector_table.index.isin(focused)]
 
       total_customers = 0
       sector_stats_for_counts = {}
+      sector_proxies = []   # Müşteri görünümü legend'ı (sektör başına proxy)
 
       # ÖNEMLİ: Merkez (center) çizgileri, regresyon filtresinden etkilenmeyen
       # visible_df_base'e göre hesaplanmalı.
       if len(visible_df_base) > 0:
-            try:
-                  center_x = visible_df_base[x_col].astype(float).mean()
-            except Exception:
-                  center_x = visible_df_base[EFFECTIVE_MRR_COL].astype(float).mean()
-            center_y = visible_df_base['MRR Growth (%)'].astype(float).mean()
+            # Ortalamalar küp diliminin toplamlarından (satır taraması yok)
+            center_x = sector_stats["base"]["totals"]["x_mean"]
+            center_y = sector_stats["base"]["totals"]["y_mean"]
       else:
             try:
                   center_x = df[x_col].astype(float).mean()
@@ -1423,45 +2083,25 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
                   cur_xlim = (plot_cx - zoom_x_range, plot_cx + zoom_x_range)
                   cur_ylim = (plot_cy - zoom_y_range, plot_cy + zoom_y_range)
 
-      def _risk_allowed(risk_val: str) -> bool:
-            risk_val = (str(risk_val or "")).strip().upper()
-            if risk_val == "NO RISK":        return settings_state.get("risk_show_no", True)
-            if risk_val == "LOW RISK":      return settings_state.get("risk_show_low", True)
-            if risk_val == "MEDIUM RISK": return settings_state.get("risk_show_med", True)
-            if risk_val == "HIGH RISK":     return settings_state.get("risk_show_high", True)
-            if risk_val == "BOOKED CHURN":   return settings_state.get("risk_show_booked", True)
-            return True
-
       risk_active = is_risk_view_active(selected_sector, df.columns, settings_state)
       show_avg_labels = settings_state.get("show_avg_labels", True) and (selected_sector == "Sector Avg")
 
       if selected_sector == "Sector Avg":
             avg_points = []
              
-            # 1. HIZLI YÖNTEM: Tek tek filtrelemek yerine GroupBy kullanıyoruz
-            # visible_df_base zaten filtrelenmiş temiz veridir
-            grouped = visible_df_base.groupby('Company Sector')
+            # 1. HIZLI YÖNTEM: Sektör ortalamaları / sayıları / churn filtre hattının
+            # sektör tablosundan okunur (visible_df_base için tek groupby, önbellekli)
+            avg_arrow_starts, avg_arrow_ends = [], []
              
-            for sector, sd in grouped:
+            for sector, st in named_sectors(avg_sector_table).iterrows():
                   # İstatistikler
-                  count = len(sd)
+                  count = int(st["count"])
                   total_customers += count
-
-                  # Sektör Toplam MRR
-                  try:
-                        sec_mrr = sd[EFFECTIVE_MRR_COL].astype(float).sum()
-                  except:
-                        sec_mrr = 0.0
-                   
-                  sector_stats_for_counts[sector] = (count, sec_mrr)
+                  sector_stats_for_counts[sector] = (count, st["mrr_sum"])
 
                   # Sektör Ortalama Noktası
-                  try:
-                        avg_x = sd[x_col].astype(float).mean()
-                  except:
-                        avg_x = sd[EFFECTIVE_MRR_COL].astype(float).mean()
-                   
-                  avg_y = sd['MRR Growth (%)'].astype(float).mean()
+                  avg_x = st["x_mean"]
+                  avg_y = st["y_mean"]
                    
                   px, py = to_plot_coords(avg_x, avg_y, settings_state.get("swap_axes", False))
 
@@ -1470,32 +2110,11 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
                                           edgecolors='black', label=f"{sector} Avg", zorder=3, clip_on=True)
                   if show_arrows_flag:
                         try:
-                              # 1. Eski Ortalamayı Bul (Base MRR'ın ortalaması)
-                              # 'base_col_for_arrow' değişkeni fonksiyonun başında hesaplanmıştı
-                              if base_col_for_arrow in sd.columns:
-                                    old_avg_raw_x = sd[base_col_for_arrow].astype(float).mean()
-                              else:
-                                    # Kolon yoksa arrow çizilemez, pas geç
-                                    old_avg_raw_x = avg_x 
-
-                              # 2. Yeni Ortalamayı Bul (Zaten avg_x ve avg_y olarak hesaplanmıştı)
-                              new_avg_raw_x = avg_x
-                              
-                              # 3. Y Ekseni (Growth) Değişimi Var mı?
-                              old_avg_raw_y = sd['MRR Growth (%)'].astype(float).mean()
-
-                              # DÜZELTME: Fonksiyona (df) parametresi eklendi
-                              updated_y_col = get_updated_y_col_if_any(df) 
-                              if updated_y_col and updated_y_col in sd.columns:
-                                  new_avg_raw_y = sd[updated_y_col].astype(float).mean()
-                              else:
-                                  new_avg_raw_y = avg_y # Değişmediyse aynısı
-
-                              # 4. Koordinatları Hesapla (Swap Axes durumuna göre)
-                              p0x, p0y = to_plot_coords(old_avg_raw_x, old_avg_raw_y, settings_state.get("swap_axes", False))
-                              p1x, p1y = to_plot_coords(new_avg_raw_x, new_avg_raw_y, settings_state.get("swap_axes", False))
-
-                              # 5. Çizim Yap (Sadece hareket varsa)
+                              # Eski ortalama: baz MRR ve Growth; yeni: avg_x ve (varsa) güncellenmiş Growth
+                              p0x, p0y = to_plot_coords(st["base_x_mean"], avg_y, settings_state.get("swap_axes", False))
+                              p1x, p1y = to_plot_coords(avg_x, st["updated_y_mean"], settings_state.get("swap_axes", False))
+
+                              # Çizim Yap (Sadece hareket varsa)
                               if (abs(p0x - p1x) > 0.001) or (abs(p0y - p1y) > 0.001):
                                     
                                     # A) Eski konuma silik bir "hayalet" nokta koy (Nereden geldiği belli olsun)
@@ -1506,48 +2125,16 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
                                                edgecolors='none', 
                                                zorder=2) # Ana noktanın altında kalsın
 
-                                    # B) Oku Çiz
-                                    ax.annotate("", 
-                                                xy=(p1x, p1y),      # Okun ucu (Yeni yer)
-                                                xytext=(p0x, p0y),  # Okun başlangıcı (Eski yer)
-                                                arrowprops=dict(
-                                                      arrowstyle="->", 
-                                                      color="black",
-                                                      lw=1.5,       # Biraz daha kalın
-                                                      alpha=0.6, 
-                                                      shrinkA=0, 
-                                                      shrinkB=0
-                                                ),
-                                                zorder=4
-                                    )
+                                    # B) Ok (tüm sektörlerin okları döngüden sonra tek quiver olarak çizilir)
+                                    avg_arrow_starts.append((p0x, p0y))
+                                    avg_arrow_ends.append((p1x, p1y))
                         except Exception as e:
                               print(f"Avg arrow error: {e}")
-                  scatter_points.append((sc, sd))
+                  scatter_points.append((sc, sector_frame(sector_stats["base"], visible_df_base, sector)))
                   avg_points.append((sector, px, py, color_map.get(sector, 'gray'), count))
-                   
-                  # --- TOOLTIP İÇİN HESAPLAMA (CACHE DOLDURMA) ---
-                  # Churn oranını şimdi hesaplayıp saklıyoruz.
-                  # Böylece mouse gezdirirken tekrar hesap yapmayacağız.
-                  churn_pct = None
-                  churn_cnt = 0
-                  if settings_state.get("churn_enabled", True) and (CHURN_COL in sd.columns):
-                        try:
-                              churn_mask = sd[CHURN_COL].astype(str).str.upper().eq("CHURN")
-                              churn_cnt = int(churn_mask.sum())
-                              # Oran hesabı (Adet bazlı mı MRR bazlı mı? Genelde MRR istenir ama tooltipte basitçe adet oranı da olabilir)
-                              # Basitlik için Adet Oranı:
-                              if count > 0:
-                                    churn_pct = (churn_cnt / count) * 100.0
-                              else:
-                                    churn_pct = 0.0
-                        except:
-                              pass
-                   
-                  sector_churn_stats_cache[sector] = {
-                        "churn_pct": churn_pct,
-                        "churn_count": churn_cnt,
-                        "total_count": count
-                  }
+
+            if avg_arrow_starts:
+                  _add_arrow_set(avg_arrow_starts, avg_arrow_ends, lw=1.5, alpha=0.6, zorder=4)
 
             # --- Sector isim label'ı (Çakışma önleyici algoritma) ---
             # (Bu kısım aynen kalabilir veya istenirse iptal edilebilir, ama GroupBy ile veri azaldığı için hızlı çalışacaktır)
@@ -1590,25 +2177,36 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
                                           ha="center", va="bottom", fontsize=9, fontweight="bold", color="black", zorder=7)
 
       else:
-            for sector in sectors:
-                  if selected_sector == "All" or sector == selected_sector:
+            # Analytics (K-Means / Pareto) payload'la birlikte hesaplandı (arka planda veya _compute_plot_payload'da)
+            ana_labels = payload["ana_labels"]
+            ana_mask = payload["ana_mask"]
+
+            # --- Müşteri noktaları: tek vektörel geçiş, normal + churn için birer koleksiyon ---
+            drawn_sectors = [sec for sec in sectors
+                             if pd.notna(sec) and (selected_sector == "All" or sec == selected_sector)]
+            points = _build_customer_point_arrays(visible_df, drawn_sectors, x_col, risk_active, risk_ok,
+                                                  ana_labels, ana_mask)
+            _draw_customer_point_layers(points, drawn_sectors, sector_proxies)
+            if show_arrows_flag:
+                  _add_customer_arrows(points, drawn_sectors, x_col, base_col_for_arrow, extra_points_for_fit)
+
+            # Sektör bazlı istatistik / ok / ortalama (satırlar ve toplamlar sektör tablosundan)
+            vis_rows = sector_stats["visible"]["rows"]
+
+            for sector in drawn_sectors:
+                  if sector in vis_rows:
                         # ÖNEMLİ: Çizilecek noktalar (sd_base) *filtreli* visible_df'ten gelir
-                        sd_base = visible_df[visible_df['Company Sector'] == sector]
-                        if len(sd_base) == 0:
-                              continue
+                        sd_base = stage_visible_df.iloc[vis_rows[sector]]
 
                         # Sector Avg/All altındaki oranlar için, *filtresiz* visible_df_base üzerinden MRR & count
-                        sd_for_stat = visible_df_base[visible_df_base['Company Sector'] == sector]
-                        if len(sd_for_stat) > 0:
-                              try:
-                                    sec_mrr_stat = sd_for_stat[EFFECTIVE_MRR_COL].astype(float).sum()
-                              except Exception:
-                                    sec_mrr_stat = 0.0
-                              sector_stats_for_counts[sector] = (len(sd_for_stat), sec_mrr_stat)
+                        sec_count_stat = 0
+                        if sector in base_sector_table.index:
+                              sec_count_stat = int(base_sector_table.at[sector, "count"])
+                              sector_stats_for_counts[sector] = (sec_count_stat, base_sector_table.at[sector, "mrr_sum"])
 
                         # Risk filtresi (varsa)
                         if risk_active and (RISK_COL in sd_base.columns):
-                              sd = sd_base[sd_base[RISK_COL].astype(str).str.upper().apply(_risk_allowed)]
+                              sd = _apply_risk_mask(sd_base, risk_ok)
                         else:
                               sd = sd_base
 
@@ -1618,192 +2216,29 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
                         # Toplam müşteri sayısı, regresyon filtresinden etkilenen sd'ye göre değil,
                         # *filtresiz* visible_df_base'e göre hesaplanmalı (eğer risk filtresi uygulanmadıysa)
                         if not risk_active:
-                              sd_for_count = visible_df_base[visible_df_base['Company Sector'] == sector]
-                              total_customers += len(sd_for_count)
+                              total_customers += sec_count_stat
                         else:
                               # Risk aktifse, risk filtresi uygulanmış (sd) kullanılır
                               total_customers += len(sd)
 
-                        # ============== NEW/CHURN: churn satırlarını ayır ==============
-                        churn_enabled_flag = settings_state.get("churn_enabled", True)
-                        show_only = settings_state.get("show_only_churn", False)
-
-                        if CHURN_COL in sd.columns:
-                              col = sd[CHURN_COL].astype(str).str.upper()
-                              if show_only:
-                                    churn_mask = col.eq("CHURN")
-                              else:
-                                    churn_mask = churn_enabled_flag & col.eq("CHURN")
-                        else:
-                              churn_mask = sd.index == -1   # hiçbir satır churn değil say
-
-                        sd_churn = sd[churn_mask]
-                        sd_norm   = sd[~churn_mask]
-                        # =================================================================
-
-                        px_list, py_list, colors_list = [], [], []
-
-                        # Normal (churn olmayan) noktalar
-                        if len(sd_norm) > 0:
-                              # 1. Önce Analytics Verilerini Hesapla (Eğer Mod Açıksa)
-                              ana_labels = None
-                              ana_mask = None
-                               
-                              if analytics_state["mode"] == "kmeans":
-                                    ana_labels = calculate_kmeans_labels(visible_df_base, x_col, k=analytics_state["kmeans_k"])
-                              elif analytics_state["mode"] == "pareto":
-                                    ana_mask = calculate_pareto_mask(visible_df_base, x_col)
-
-                              px_list, py_list, colors_list = [], [], []
-                               
-                              # K-Means renk paleti (Canlı renkler)
-                              kmeans_colors = ['#e41a1c', '#377eb8', '#4daf4a', '#984ea3', '#ff7f00']
-
-                              for idx, row in sd_norm.iterrows():
-                                    try:
-                                          xv = float(row[x_col])
-                                    except Exception:
-                                          xv = float(row.get(EFFECTIVE_MRR_COL, row.get(BASE_MRR_FALLBACK_COL)))
-                                    yv = float(row['MRR Growth (%)'])
-                                    px, py = to_plot_coords(float(xv), float(yv), settings_state.get("swap_axes", False))
-                                    px_list.append(px); py_list.append(py)
-                                     
-                                    # --- RENK BELİRLEME MANTIĞI ---
-                                    final_color = color_map[sector] # Varsayılan: Sektör rengi
-
-                                    # A) Risk Modu Açıksa
-                                    if risk_active and (RISK_COL in row) and analytics_state["mode"] == "none":
-                                            rname = str(row[RISK_COL]).strip().upper()
-                                            final_color = RISK_COLOR.get(rname, final_color)
-                                     
-                                    # B) K-Means Modu Açıksa (Risk'i ezer)
-                                    elif analytics_state["mode"] == "kmeans" and ana_labels is not None:
-                                          # visible_df_base ile senkronize index bulmamız lazım
-                                          # Basit çözüm: visible_df_base içindeki sırasını bul (biraz yavaş ama güvenli)
-                                          try:
-                                                loc_idx = visible_df_base.index.get_loc(idx)
-                                                label_val = ana_labels[loc_idx]
-                                                final_color = kmeans_colors[label_val % len(kmeans_colors)]
-                                          except:
-                                                pass # Hata olursa sektör rengi kalsın
-                                     
-                                    # C) Pareto Modu Açıksa (Hepsini ezer)
-                                    elif analytics_state["mode"] == "pareto" and ana_mask is not None:
-                                          try:
-                                                is_top_20 = ana_mask.loc[idx]
-                                                if is_top_20:
-                                                      final_color = "#00FF00" # Parlak Yeşil (Nakit İnekleri)
-                                                else:
-                                                      final_color = "#444444" # Sönük Gri
-                                          except:
-                                                pass
-
-                                    colors_list.append(final_color)
-                               
-                              # ÇİZİM (Scatter) - Artık 'c=colors_list' kullanıyoruz
-                              sc = ax.scatter(px_list, py_list, c=colors_list, s=80, alpha=0.90,
-                                                      edgecolors='black', linewidths=0.8,  
-                                                      label=sector, zorder=5, clip_on=True)
-                              scatter_points.append((sc, sd_norm))
-
-                       # ============== NEW/CHURN: churn olanlar X marker ile ==============
-                        if len(sd_churn) > 0:
-                              cx_list, cy_list = [], []
-                              for _, row in sd_churn.iterrows():
-                                    try:
-                                          xv = float(row[x_col])
-                                    except Exception:
-                                            xv = float(row.get(EFFECTIVE_MRR_COL, row.get(BASE_MRR_FALLBACK_COL)))
-                                    yv = float(row['MRR Growth (%)'])
-                                    px, py = to_plot_coords(float(xv), float(yv), settings_state.get("swap_axes", False))
-                                    cx_list.append(px); cy_list.append(py)
-                              scx = ax.scatter(cx_list, cy_list, s=90, marker='x',
-                                       linewidths=2.0, color=CHURN_X_COLOR,
-                                       label=sector, zorder=6, clip_on=True)
-                              scatter_points.append((scx, sd_churn))
-                        # =================================================================
-
-                        if show_arrows_flag:
-                            old_px, old_py, new_px = [], [], []
-                            for _, r in sd.iterrows():
-                                try:
-                                    x0 = float(r[base_col_for_arrow])
-                                    x1 = float(r['Exc. License MRR'])
-                                    y = float(r['MRR Growth (%)'])
-                                except Exception:
-                                    continue
-                                
-                                p0x, p0y = to_plot_coords(x0, y, settings_state.get("swap_axes", False))
-                                p1x, p1y = to_plot_coords(x1, y, settings_state.get("swap_axes", False))
-                                old_px.append(p0x); old_py.append(p0y); new_px.append(p1x)
-                                
-                                extra_points_for_fit.append((p0x, p0y))
-                                extra_points_for_fit.append((p1x, p1y))
-            
-                                # FIX 1: df eklendi
-                                if get_updated_y_col_if_any(df) is not None:
-                                    try:
-                                        # FIX 2: df eklendi
-                                        y_new = float(r[get_updated_y_col_if_any(df)])
-                                        
-                                        # FIX 3: get_plot_x_col() yerine x_col kullanıldı (HATA BURADAYDI)
-                                        x_for_y = float(r[x_col])
-                                        
-                                        q0x, q0y = to_plot_coords(x_for_y, y, settings_state.get("swap_axes", False))
-                                        q1x, q1y = to_plot_coords(x_for_y, y_new, settings_state.get("swap_axes", False))
-                                        extra_points_for_fit.append((q0x, q0y))
-                                        extra_points_for_fit.append((q1x, q1y))
-                                        
-                                        ann2 = ax.annotate(
-                                            "", xy=(q1x, q1y), xytext=(q0x, q0y),
-                                            arrowprops=dict(arrowstyle="->", lw=0.8, alpha=0.45, clip_on=True)
-                                        )
-                                        ann2.set_clip_on(True)
-                                        if hasattr(ann2, "arrow_patch") and ann2.arrow_patch:
-                                            ann2.arrow_patch.set_clip_on(True)
-                                    except Exception:
-                                        pass
-            
-                            if old_px:
-                                ax.scatter(old_px, old_py, color=color_map.get(sector, 'gray'), s=60, alpha=0.35,
-                                        edgecolors='none', zorder=3, label="_nolegend_", clip_on=True)
-                                for p0x, p0y, p1x in zip(old_px, old_py, new_px):
-                                    if abs(p0x - p1x) > 0.0001:
-                                        ann = ax.annotate(
-                                            "", xy=(p1x, p0y), xytext=(p0x, p0y),
-                                            arrowprops=dict(arrowstyle="->", lw=0.9, alpha=0.5, clip_on=True)
-                                        )
-                                        ann.set_clip_on(True)
-                                        if hasattr(ann, "arrow_patch") and ann.arrow_patch:
-                                            ann.arrow_patch.set_clip_on(True)
-            
                         if selected_sector != "All":
-                            sd_for_avg = visible_df_base[visible_df_base['Company Sector'] == selected_sector]
-                            if len(sd_for_avg) > 0:
-                                try:
-                                    avg_x_now = sd_for_avg[x_col].astype(float).mean()
-                                except Exception:
-                                    avg_x_now = sd_for_avg[EFFECTIVE_MRR_COL].astype(float).mean()
-            
-                                # FIX 4: Burada (df) eksikti, ekledik.
+                            if selected_sector in base_sector_table.index:
+                                st = base_sector_table.loc[selected_sector]
+                                avg_x_now = st["x_mean"]
+                                # Oklar açıksa ve güncellenmiş Growth kolonu varsa yeni ortalama ondan
                                 if show_arrows_flag and (get_updated_y_col_if_any(df) is not None):
-                                    avg_y_now = sd_for_avg[get_updated_y_col_if_any(df)].astype(float).mean()
+                                    avg_y_now = st["updated_y_mean"]
                                 else:
-                                    avg_y_now = sd_for_avg['MRR Growth (%)'].astype(float).mean()
+                                    avg_y_now = st["y_mean"]
                                     
                                 pax, pay = to_plot_coords(avg_x_now, avg_y_now, settings_state.get("swap_axes", False))
                                 avg_color = 'navy'
                                 sc = ax.scatter(pax, pay, color=avg_color, s=300, marker='o',
                                                 edgecolors='black', label=f"{selected_sector} Avg", zorder=3, clip_on=True)
-                                scatter_points.append((sc, sd_for_avg))
+                                scatter_points.append((sc, sector_frame(sector_stats["base"], visible_df_base, selected_sector)))
             
                                 if show_arrows_flag:
-                                    if base_col_for_arrow in sd_for_avg.columns:
-                                        old_avg_x = sd_for_avg[base_col_for_arrow].astype(float).mean()
-                                    else:
-                                        old_avg_x = avg_x_now
-                                    old_avg_y = sd_for_avg['MRR Growth (%)'].astype(float).mean()
-                                    p0x, p0y = to_plot_coords(old_avg_x, old_avg_y, settings_state.get("swap_axes", False))
+                                    p0x, p0y = to_plot_coords(st["base_x_mean"], st["y_mean"], settings_state.get("swap_axes", False))
                                     p1x, p1y = pax, pay
                                     extra_points_for_fit.append((p0x, p0y))
                                     extra_points_for_fit.append((p1x, p1y))
@@ -1811,16 +2246,7 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
                                     ax.scatter([p0x], [p0y], color=avg_color, s=300, alpha=0.35,
                                                 edgecolors='none', zorder=5, label="_nolegend_", clip_on=True)
                                     if (p0x != p1x) or (p0y != p1y):
-                                        ann_avg = ax.annotate(
-                                            "", xy=(p1x, p1y), xytext=(p0x, p0y),
-                                            arrowprops=dict(arrowstyle="->", lw=1.0, alpha=0.5, clip_on=True)
-                                        )
-                                        try:
-                                            ann_avg.set_clip_on(True)
-                                            if hasattr(ann_avg, "arrow_patch") and ann_avg.arrow_patch is not None:
-                                                ann_avg.arrow_patch.set_clip_on(True)
-                                        except Exception:
-                                            pass
+                                        _add_arrow_set([(p0x, p0y)], [(p1x, p1y)], lw=1.0, alpha=0.5)
 
       # --- Merkez çizgileri ---
       ax.axvline(plot_cx, color='dodgerblue', linewidth=2, zorder=2)
@@ -1835,31 +2261,31 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
       # ===================== YENİ: REGRESYON ÇİZGİSİ ÇİZİMİ =====================
       if settings_state.get("show_regression_line", False) and current_regression_line['m'] is not None:
             try:
-                  m = current_regression_line['m']
-                  b = current_regression_line['b']
-
-                  # Mevcut eksen limitlerini al
-                  x0, x1 = ax.get_xlim()
-                  span = x1 - x0 if x1 != x0 else 1.0
+                  xs, ys = _regression_line_points()
 
-                  # Görünür aralığın çok daha ötesine uzat (sonsuzmuş gibi)
-                  x_far0 = x0 - span * 1000
-                  x_far1 = x1 + span * 1000
-
-                  xs = np.array([x_far0, x_far1])
-                  ys = m * xs + b
-
-                  ax.plot(
+                  # Zoom/pan hızlı yolunda sadece uçları güncellemek için referansı sakla
+                  view_state["regression_line"], = ax.plot(
                         xs,
                         ys,
                         color='purple',
                         linestyle='--',
                         linewidth=2.0,
                         zorder=3,
-                        label='Regression Line'
+                        label=format_regression_label(current_regression_line)
                   )
             except Exception as e:
                   print(f"Regresyon çizimi hatası: {e}")
+
+      # Sektör trendleri: her sektörün doğrusu sektör renginde, tek LineCollection
+      trend_lines = sector_stats["base"]["trends"] if selected_sector in ("All", "Sector Avg") else {}
+      if trend_lines:
+            trend_collection = LineCollection(
+                  _sector_trend_segments(trend_lines),
+                  colors=[color_map.get(sec, 'gray') for sec in trend_lines],
+                  linewidths=1.4, linestyles='--', alpha=0.85, zorder=3, label="_nolegend_"
+            )
+            ax.add_collection(trend_collection, autolim=False)
+            view_state["sector_trends"] = (trend_collection, trend_lines)
       # ===================== /REGRESYON ÇİZGİSİ =====================
 
       if settings_state.get("swap_axes", False):
@@ -1876,13 +2302,10 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
             # Risk görünümü için visible_df_base (filtresiz) kullanılmalı
             sd_vis = visible_df_base[visible_df_base['Company Sector'] == sector_combobox.get()]
             if RISK_COL in sd_vis.columns:
-                  sd_vis = sd_vis[sd_vis[RISK_COL].astype(str).str.upper().apply(lambda v: v in RISK_VALUES or True)]
+                  risk_counts = get_risk_codes(sd_vis).value_counts()
                   legend_items = []
-                  for risk_name in ["HIGH RISK", "MEDIUM RISK", "LOW RISK", "NO RISK", "BOOKED CHURN"]:
-                        count = 0
-                        if RISK_COL in sd_vis.columns:
-                              col = sd_vis[RISK_COL].astype(str).str.upper()
-                              count = int((col == risk_name).sum())
+                  for risk_name in RISK_VALUES:
+                        count = int(risk_counts.get(risk_name, 0))
                         legend_items.append(Patch(color=RISK_COLOR[risk_name], label=f"{risk_name} ({count})"))
                   legend_items.append(Patch(color="navy", label=f"{sector_combobox.get()} Avg"))
                   legend1 = ax.legend(
@@ -1893,6 +2316,8 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
                   ax.add_artist(legend1); active_legends.append(legend1)
       else:
             handles, labels = ax.get_legend_handles_labels()
+            handles = sector_proxies + handles
+            labels = [h.get_label() for h in sector_proxies] + labels
             uniq = {}
             for h, l in zip(handles, labels):
                   if l not in uniq:
@@ -1946,7 +2371,8 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
                       pad_ratio=PAD_RATIO,
                       eff_center=(eff_center_x, eff_center_y), 
                       extra_points=extra_points_for_fit,
-                      swap_axes=swap_status
+                      swap_axes=swap_status,
+                      sector_table=sector_stats["visible"]["table"]
                 )
             else:
                 limits = compute_fit_limits(
@@ -1957,7 +2383,8 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
                       pad_ratio=PAD_RATIO,
                       eff_center=(eff_center_x, eff_center_y), 
                       extra_points=None,
-                      swap_axes=swap_status
+                      swap_axes=swap_status,
+                      sector_table=sector_stats["visible"]["table"]
                 )
             if limits is not None:
                   xmin, xmax, ymin, ymax = limits
@@ -1977,111 +2404,31 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
                   ax.set_xlim(plot_cx - zoom_x_range, plot_cx + zoom_x_range)
                   ax.set_ylim(plot_cy - zoom_y_range, plot_cy + zoom_y_range)
 
-      # ========================= Quadrant Risk Color Map Overlay (distance-weighted) =========================
-      try:
-            if settings_state.get("activate_risk_colormap", False) \
-                 and sector_combobox.get() not in ("Sector Avg", "All") \
-                 and (RISK_COL in df.columns):
-                  # Overlay, *filtreli* visible_df'e göre hesaplanmalı
-                  sec_df = visible_df[visible_df['Company Sector'] == sector_combobox.get()].copy()
-                  if len(sec_df) > 0:
-                        cx, cy = plot_cx, plot_cy
-                        x0, x1 = ax.get_xlim()
-                        y0, y1 = ax.get_ylim()
-                        sums = {"Q1": [0.0,0.0,0.0], "Q2":[0.0,0.0,0.0], "Q3":[0.0,0.0,0.0], "Q4":[0.0,0.0,0.0]}
-                        weights = {"Q1":0.0, "Q2":0.0, "Q3":0.0, "Q4":0.0}
-                        use_weight = settings_state.get("risk_cmap_weighted", True)
-                        alpha_pow = float(settings_state.get("risk_cmap_weight_power", 1.0))
-
-                        def norm_dist_x(px, side):
-                              if side == 'R':
-                                    span = max(x1 - cx, 1e-9)
-                                    return max(0.0, min(1.0, (px - cx) / span))
-                              else:
-                                    span = max(cx - x0, 1e-9)
-                                    return max(0.0, min(1.0, (cx - px) / span))
-
-                        def norm_dist_y(py, side):
-                              if side == 'U':
-                                    span = max(y1 - cy, 1e-9)
-                                    return max(0.0, min(1.0, (py - cy) / span))
-                              else:
-                                    span = max(cy - y0, 1e-9)
-                                    return max(0.0, min(1.0, (cy - py) / span))
-
-                        for _, r in sec_df.iterrows():
-                              try:
-                                    xv = float(r[get_plot_x_col(df, settings_state, license_var.get())])
-                              except Exception:
-                                    xv = float(r.get(EFFECTIVE_MRR_COL, r.get(BASE_MRR_FALLBACK_COL)))
-                              yv = float(r['MRR Growth (%)'])
-                              px, py = to_plot_coords(xv, yv, settings_state.get("swap_axes", False))
-                              risk_name = str(r.get(RISK_COL, "")).strip().upper()
-                              rgb = to_rgb(RISK_COLOR.get(risk_name, (0.8,0.8,0.8)))
-
-                              if px >= cx and py >= cy:     # (+,+)
-                                    key = "Q1"; rx = norm_dist_x(px, 'R'); ry = norm_dist_y(py, 'U')
-                              elif px < cx and py >= cy:   # (-,+)
-                                    key = "Q2"; rx = norm_dist_x(px, 'L'); ry = norm_dist_y(py, 'U')
-                              elif px < cx and py < cy:     # (-,-)
-                                    key = "Q3"; rx = norm_dist_x(px, 'L'); ry = norm_dist_y(py, 'D')
-                              else:                                    # (+,-)
-                                    key = "Q4"; rx = norm_dist_x(px, 'R'); ry = norm_dist_y(py, 'D')
-
-                              base_w = rx * ry
-                              w = (base_w ** alpha_pow) if use_weight else 1.0
-                              sums[key][0] += rgb[0] * w
-                              sums[key][1] += rgb[1] * w
-                              sums[key][2] += rgb[2] * w
-                              weights[key] += w
-
-                        def _avg_color(key):
-                              w = weights[key]
-                              if w <= 0:
-                                    return None
-                              return (sums[key][0]/w, sums[key][1]/w, sums[key][2]/w)
-
-                        alpha_bg = 0.18
-                        c1 = _avg_color("Q1")
-                        if c1 is not None:
-                              ax.add_patch(Rectangle((cx, cy), x1-cx, y1-cy, facecolor=c1, alpha=alpha_bg, edgecolor='none', zorder=0.5))
-                        c2 = _avg_color("Q2")
-                        if c2 is not None:
-                              ax.add_patch(Rectangle((x0, cy), cx-x0, y1-cy, facecolor=c2, alpha=alpha_bg, edgecolor='none', zorder=0.5))
-                        c3 = _avg_color("Q3")
-                        if c3 is not None:
-                              ax.add_patch(Rectangle((x0, y0), cx-x0, cy-y0, facecolor=c3, alpha=alpha_bg, edgecolor='none', zorder=0.5))
-                        c4 = _avg_color("Q4")
-                        if c4 is not None:
-                              ax.add_patch(Rectangle((cx, y0), x1-cx, cy-y0, facecolor=c4, alpha=alpha_bg, edgecolor='none', zorder=0.5))
-      except Exception:
-            pass
-      # ======================= /overlay =======================
+      # Risk colormap quadrant arka planı (eksen limitlerine bağlı; zoom/pan'da yeniden çizilir)
+      _draw_risk_quadrant_overlay(visible_df, plot_cx, plot_cy)
+      # Fark okları (LOD zoom seviyesine bağlı; zoom/pan'da yeniden seçilir)
+      _draw_arrow_layers()
+      # Yoğunluk (LOD) modu: görünür nokta sayısına göre scatter veya yoğunluk görüntüsü
+      _draw_density_layer()
 
       # Total customers etiketi, *filtresiz* visible_df_base'e göre hesaplanmalı
        
-      sector_churn_stats_cache.clear()
-       
-      if selected_sector == "Sector Avg":
-            df_for_total = visible_df_base
-      elif selected_sector == "All":
-            df_for_total = visible_df_base
+      # Görünümün sektör tablosu: Avg/All -> tüm tablo, tek sektör -> o sektörün dilimi
+      # (risk filtresi açıksa risk boyutu da dilimlenir)
+      if selected_sector in ("Sector Avg", "All"):
+            view_sector_table = base_sector_table
+      elif risk_active and (RISK_COL in df.columns):
+            view_sector_table = olap_sector_table(
+                  aggregate_cube, settings_state.get("age_filter_mode", "0-Current"),
+                  "exc" if x_col == 'Exc. License MRR' else "mrr", churn_axis_filter(settings_state),
+                  risk_allowed=risk_axis_filter(aggregate_cube, settings_state), sectors=[selected_sector])
       else:
-            temp_df_for_total = visible_df_base[visible_df_base['Company Sector'] == selected_sector]
-            if risk_active and (RISK_COL in temp_df_for_total.columns):
-                  df_for_total = temp_df_for_total[
-                        temp_df_for_total[RISK_COL].astype(str).str.upper().apply(_risk_allowed)
-                  ]
-            else:
-                  df_for_total = temp_df_for_total
+            view_sector_table = base_sector_table[base_sector_table.index == selected_sector]
 
-      total_customers_label_count = len(df_for_total)
+      total_customers_label_count = int(view_sector_table["count"].sum())
 
       # MRR toplamı (EFFECTIVE_MRR_COL üzerinden)
-      if EFFECTIVE_MRR_COL in df_for_total.columns:
-            total_mrr_val = df_for_total[EFFECTIVE_MRR_COL].astype(float).sum()
-      else:
-            total_mrr_val = 0.0
+      total_mrr_val = float(view_sector_table["mrr_sum"].sum())
 
       total_label.config(text=f"Total Customers: {total_customers_label_count}")
       total_mrr_label.config(text=f"Total Customer MRR Value: ${total_mrr_val:,.0f}")
@@ -2108,7 +2455,6 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
       sector_count_label.config(text="\n".join(sector_lines))
       if CHURN_COL in stats_df.columns:
           sel = sector_combobox.get()
-          sdf = stats_df.copy()
 
           # Verileri tutacak değişkenler
           total_churn_mrr_all = 0.0
@@ -2117,17 +2463,15 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
           global_ratio_pct = 0.0
           sector_entries = [] # Liste için satırlar
 
-          # A) Hesaplama Mantığı
+          # A) Hesaplama Mantığı (stats_df, visible_df_base ile aynı satırlar: sektör tablosundan)
           if sel in ("Sector Avg", "All"):
                 # Çoklu sektör görünümü: Tek tek sektörleri gez ve listeyi hazırla
                 for sec in sectors:
-                      sec_df = sdf[sdf['Company Sector'] == sec]
-                      
-                      # Helper fonksiyon ile hesapla
-                      c_mrr, t_mrr, r_pct, c_cnt = calculate_churn_stats(sec_df)
+                      # Sektör tablosu satırı (calculate_churn_stats ile aynı çıktı)
+                      c_mrr, t_mrr, r_pct, c_cnt = sector_churn_row(base_sector_table, sec)
                     
                       # Global toplamlara ekle (Sadece Sector Avg modunda manuel topluyoruz, 
-                      # All modunda zaten sdf full data ama listeyi oluşturmak için bu döngü şart)
+                      # All modunda toplamlar tüm tablodan alınır ama listeyi oluşturmak için bu döngü şart)
                       if sel == "Sector Avg":
                             total_churn_mrr_all += c_mrr
                             total_mrr_all += t_mrr
@@ -2137,9 +2481,9 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
                       if t_mrr > 0 or c_cnt > 0:
                             sector_entries.append((r_pct, sec, c_cnt))
                 
-                # Eğer "All" modundaysak, global toplamları direkt ana veriden (sdf) alalım (Daha hassas olur)
+                # Eğer "All" modundaysak, global toplamları tablonun tamamından alalım (sektörü boş satırlar dahil)
                 if sel == "All":
-                      total_churn_mrr_all, total_mrr_all, global_ratio_pct, total_churn_customers_all = calculate_churn_stats(sdf)
+                      total_churn_mrr_all, total_mrr_all, global_ratio_pct, total_churn_customers_all = churn_totals(base_sector_table)
                 else:
                       # Sector Avg için global oranı hesapla
                       if total_mrr_all > 0:
@@ -2147,8 +2491,7 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
           
           else: 
                 # B) Tek Sektör Seçimi
-                sec_df = sdf[sdf['Company Sector'] == sel]
-                total_churn_mrr_all, total_mrr_all, global_ratio_pct, total_churn_customers_all = calculate_churn_stats(sec_df)
+                total_churn_mrr_all, total_mrr_all, global_ratio_pct, total_churn_customers_all = sector_churn_row(base_sector_table, sel)
                 # Tek sektörde detay listesine gerek yok (veya tek satır ekleyebiliriz)
                 sector_entries = [] 
 
@@ -2226,21 +2569,23 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
                   print(f"Marginal Plot Error: {e}")
       # -----------------------------------------------
           # --- YENİ: Global Veriyi Güncelle ---
-      global current_visible_df, current_avg_keys
+      global current_visible_df, current_avg_keys, current_sector_table, current_sector_trends
       
       # DÜZELTME: Eğer tek bir sektör seçiliyse, istatistiklerin kaynağı olan
       # current_visible_df'i de o sektöre göre filtrele.
+      # stats_df, visible_df_base ile aynı satırlardır: sektör tablosu doğrudan kullanılır
       if selected_sector not in ("Sector Avg", "All"):
           current_visible_df = stats_df[stats_df['Company Sector'] == selected_sector].copy()
           
           # Risk filtresi varsa onu da tekrar uygula (Garanti olsun)
           if is_risk_view_active(selected_sector, df.columns, settings_state) and (RISK_COL in current_visible_df.columns):
-               current_visible_df = current_visible_df[
-                   current_visible_df[RISK_COL].astype(str).str.upper().apply(lambda v: is_risk_allowed(v, settings_state))
-               ]
+               current_visible_df = _apply_risk_mask(current_visible_df, risk_ok)
+          current_sector_table = view_sector_table
       else:
           # Avg veya All seçiliyse tüm veriyi kullan
           current_visible_df = stats_df.copy()
+          current_sector_table = base_sector_table
+      current_sector_trends = trend_lines
 
       current_avg_keys.clear()
     
@@ -2262,7 +2607,8 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
         # --- YENİ: İstatistikleri Normal Modda Güncelle ---
         # Eğer seçim yoksa, tüm visible_df üzerinden istatistik bas
       if not selection_state["selected_keys"]:
-            update_sidebar_statistics(current_visible_df, custom_header=None)
+            update_sidebar_statistics(current_visible_df, custom_header=None, sector_table=current_sector_table,
+                                      sector_trends=current_sector_trends)
             selection_info_label.config(text="") # Seçim yazısını temizle
             selection_info_label.pack_forget()   # Yer kaplamasın
       else:
@@ -2275,6 +2621,15 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
       canvas.draw_idle()
       update_fixed_banner()
 
+      # Limit-only yenileme (refresh_view_limits) için son çizimin verisi
+      view_state.update({
+            "valid": True,
+            "sector": selected_sector,
+            "visible_df": visible_df,
+            "plot_center": (plot_cx, plot_cy),
+            "sector_table": base_sector_table,
+      })
+
       # --- SEARCH highlight: search bar açıksa ve entry doluysa highlight uygula
       if settings_state.get("activate_search_box", False):
             if search_var.get().strip():
@@ -2287,6 +2642,48 @@ def update_plot(selected_sector, preserve_zoom=True, fit_to_data=False):
 
 
 
+def _spatial_index():
+      """Çizili noktaların uzamsal indeksi; sadece update_plot yeni nokta çizince yeniden kurulur."""
+      if view_state["spatial_index"] is None:
+            view_state["spatial_index"] = build_spatial_index(scatter_points)
+      return view_state["spatial_index"]
+
+def _hit_test(event, avg_only=False):
+      """Mouse'un altındaki çizili nokta: (scatter_points sırası, satır sırası) veya None."""
+      if event.x is None or event.y is None:
+            return None
+      return query_hit(_spatial_index(), ax, event.x, event.y, avg_only=avg_only)
+
+def _rect_query(x_min, x_max, y_min, y_max):
+      """Kutu seçimi: plot koordinatındaki dikdörtgende kalan (scatter sıraları, satır sıraları)."""
+      index = _spatial_index()
+      pos = query_rect(index, x_min, x_max, y_min, y_max)
+      return index["sc_pos"][pos], index["row_pos"][pos]
+
+def _clear_hover_marker():
+      """Hover işaretçisi çiziliyse kaldırır (sadece overlay blit edilir)."""
+      hover_state["target"] = None
+      if overlay["artists"]["hover"]:
+            clear_overlay_group(overlay, "hover")
+
+def _show_hover_marker(sc, idx, px, py):
+      """Üzerinde durulan noktanın etrafına halka çizer; nokta değişmediyse hiçbir şey yapmaz."""
+      target = (id(sc), idx)
+      if hover_state["target"] == target and overlay["artists"]["hover"]:
+            return
+      hover_state["target"] = target
+
+      sizes = sc.get_sizes()
+      base = float(sizes[idx if idx < len(sizes) else 0]) if len(sizes) else 36.0
+      ring_size = (np.sqrt(base) + 8.0) ** 2
+
+      clear_overlay_group(overlay, "hover", redraw=False)
+      marker = ax.scatter([px], [py], s=ring_size, facecolors='none', edgecolors='black',
+                          linewidths=1.5, zorder=11)
+      add_overlay_artists(overlay, "hover", [marker])
+
+hover_state = {"target": None}
+
 def on_motion(event):
       """
       Mouse hareketlerini takip eder.
@@ -2298,115 +2695,110 @@ def on_motion(event):
       # 1. Seçim yapılıyorsa (kutu çizme) veya Sector Avg'da Pan yapılıyorsa gizle
       if selection_state.get("active", False) or (pan_state["active"] and sector_combobox.get() == "Sector Avg"):
             set_tooltip(None, 0, 0)
+            _clear_hover_marker()
             return
 
       # 2. Grafik alanı dışındaysa gizle
       if event.inaxes != ax:
             set_tooltip(None, 0, 0)
+            _clear_hover_marker()
             return
 
-      found = False
-       
-      # Scatter noktalarını kontrol et
-      for sc, sector_data in scatter_points:
-            contains, ind = sc.contains(event)
-            if not contains:
-                  continue
+      # Uzamsal indeks ile tek sorgu: üzerinde durulan nokta (scatter sırası, satır sırası)
+      hit = _hit_test(event)
+      if hit is None:
+            # Hiçbir nokta bulunamadıysa gizle
+            set_tooltip(None, 0, 0)
+            _clear_hover_marker()
+            return
 
-            found = True
-            label_now = sc.get_label() or ""
-            is_avg_point = label_now.endswith(" Avg")
-             
-            # Koordinatları al
-            offsets = sc.get_offsets()
-            if len(offsets) > 1:
-                    idx = ind["ind"][0]
-                    px, py = offsets[idx]
-            else:
-                    px, py = offsets[0]
-                    idx = 0 # Tek nokta varsa index 0
+      sc_pos, idx = hit
+      sc, sector_data = scatter_points[sc_pos]
+      label_now = sc.get_label() or ""
+      is_avg_point = label_now.endswith(" Avg")
+       
+      # Koordinatları al
+      px, py = sc.get_offsets()[idx]
 
-            # Eksen takası varsa değerleri düzelt
-            if settings_state.get("swap_axes", False):
-                    disp_x, disp_y = py, px
-            else:
-                    disp_x, disp_y = px, py
+      # Eksen takası varsa değerleri düzelt
+      if settings_state.get("swap_axes", False):
+              disp_x, disp_y = py, px
+      else:
+              disp_x, disp_y = px, py
 
-            sector_name = label_now.replace(' Avg', '')
-            text = ""
+      sector_name = label_now.replace(' Avg', '')
+      text = ""
 
-            # --- SENARYO A: SECTOR AVG (CACHE KULLANIR - KASMA YAPMAZ) ---
-            if is_avg_point:
-                  text = f"{sector_name}\nMRR: ${disp_x:,.0f}\nGrowth: %{disp_y:.2f}"
-                   
-                  # update_plot içinde doldurduğumuz cache'den oku
-                  if sector_name in sector_churn_stats_cache:
-                        stats = sector_churn_stats_cache[sector_name]
-                        # stats = {'churn_pct': ..., 'churn_count': ..., 'total_count': ...}
+      # --- SENARYO A: SECTOR AVG (CACHE KULLANIR - KASMA YAPMAZ) ---
+      if is_avg_point:
+            text = f"{sector_name}\nMRR: ${disp_x:,.0f}\nGrowth: %{disp_y:.2f}"
+             
+            # Filtre hattının sektör tablosundan oku (adet bazlı churn oranı)
+            table = view_state["sector_table"]
+            if (table is not None and sector_name in table.index
+                        and settings_state.get("churn_enabled", True) and CHURN_COL in df.columns):
+                  total_count = table.at[sector_name, "count"]
+                  if total_count > 0:
+                        churn_pct = table.at[sector_name, "churn_count"] / total_count * 100.0
+                        text += f"\nChurn: %{churn_pct:.1f}"
                          
-                        if stats.get('churn_pct') is not None:
-                              text += f"\nChurn: %{stats['churn_pct']:.1f}"
-                               
-            # --- SENARYO B: TEKİL MÜŞTERİ (DETAYLI) ---
-            else:
-                  row = sector_data.iloc[idx]
-                  name = row.get('Customer', '')
-                  text = f"{name}\nMRR: ${disp_x:,.0f}\nGrowth: %{disp_y:.2f}"
-                   
-                  # Lisans (Sadece Exc. modunda)
-                  if license_var.get() == "Exc." and 'License Percent' in row:
-                          try: text += f"\nLic: %{float(row['License Percent'])*100:.1f}"
-                          except: pass
-                   
-                  # Risk
-                  if RISK_COL in row:
-                          rv = str(row[RISK_COL]).strip()
-                          if rv and rv.lower() != "nan": text += f"\nRisk: {rv}"
+      # --- SENARYO B: TEKİL MÜŞTERİ (DETAYLI) ---
+      else:
+            row = sector_data.iloc[idx]
+            name = row.get('Customer', '')
+            text = f"{name}\nMRR: ${disp_x:,.0f}\nGrowth: %{disp_y:.2f}"
+             
+            # Lisans (Sadece Exc. modunda)
+            if license_var.get() == "Exc." and 'License Percent' in row:
+                    try: text += f"\nLic: %{float(row['License Percent'])*100:.1f}"
+                    except: pass
+             
+            # Risk
+            if RISK_COL in row:
+                    rv = str(row[RISK_COL]).strip()
+                    if rv and rv.lower() != "nan": text += f"\nRisk: {rv}"
 
-                  # Yaş
-                  if "Customer Age (Months)" in row:
-                        try:
-                              age = row["Customer Age (Months)"]
-                              import pandas as _pd
-                              if not _pd.isna(age): text += f"\nAge: {int(age)} Mo."
-                        except: pass
-
-                  # Churn
-                  if CHURN_COL in row:
-                          cv = str(row[CHURN_COL]).strip().upper()
-                          if cv == "CHURN":
-                                text += "\n[CHURNED]"
-                                if CHURN_DATE_COL in row:
-                                      cd = str(row[CHURN_DATE_COL]).split()[0] # Sadece tarihi al
-                                      if cd != "NaT" and cd != "nan":
-                                            text += f" ({cd})"
-                   
-                  # Eski MRR (Oklar açıksa)
-                  base_col = get_base_mrr_col_for_age_mode(settings_state, df.columns)
-                  show_arrows = (
-                        license_var.get() == "Exc."
-                        and settings_state.get("use_updated_exc_license_values", False)
-                        and settings_state.get("show_difference_arrows", False)
-                  )
-                  if show_arrows and base_col in row:
-                        try:
-                              prev = float(row[base_col])
-                              text += f"\nPrev: ${prev:,.0f}"
-                        except: pass
-
-            # --- ÇİZİM ---
-            # event.guiEvent.x_root -> Ekranın sol üstüne göre mutlak X
-            # event.guiEvent.y_root -> Ekranın sol üstüne göre mutlak Y
-            if event.guiEvent:
-                  set_tooltip(text, event.guiEvent.x_root, event.guiEvent.y_root)
+            # Yaş
+            if "Customer Age (Months)" in row:
+                  try:
+                        age = row["Customer Age (Months)"]
+                        import pandas as _pd
+                        if not _pd.isna(age): text += f"\nAge: {int(age)} Mo."
+                  except: pass
+
+            # Churn
+            if CHURN_COL in row:
+                    cv = str(row[CHURN_COL]).strip().upper()
+                    if cv == "CHURN":
+                          text += "\n[CHURNED]"
+                          if CHURN_DATE_COL in row:
+                                cd = str(row[CHURN_DATE_COL]).split()[0] # Sadece tarihi al
+                                if cd != "NaT" and cd != "nan":
+                                      text += f" ({cd})"
              
-            break # İlk noktayı bulunca döngüyü kır
+            # Eski MRR (Oklar açıksa)
+            base_col = get_base_mrr_col_for_age_mode(settings_state, df.columns)
+            show_arrows = (
+                  license_var.get() == "Exc."
+                  and settings_state.get("use_updated_exc_license_values", False)
+                  and settings_state.get("show_difference_arrows", False)
+            )
+            if show_arrows and base_col in row:
+                  try:
+                        prev = float(row[base_col])
+                        text += f"\nPrev: ${prev:,.0f}"
+                  except: pass
 
-      # Hiçbir nokta bulunamadıysa gizle
-      if not found:
-            set_tooltip(None, 0, 0)
+      # --- ÇİZİM ---
+      # event.guiEvent.x_root -> Ekranın sol üstüne göre mutlak X
+      # event.guiEvent.y_root -> Ekranın sol üstüne göre mutlak Y
+      if event.guiEvent:
+            set_tooltip(text, event.guiEvent.x_root, event.guiEvent.y_root)
+
+      # Hover halkası: sadece overlay katmanı blit edilir, figür yeniden çizilmez
+      if not pan_state["active"]:
+            _show_hover_marker(sc, idx, px, py)
 
-canvas.mpl_connect("motion_notify_event", on_motion)
 canvas.mpl_connect("motion_notify_event", on_motion)
 
 
@@ -2420,57 +2812,52 @@ def on_right_click(event):
 
       # ========== YENİ: Sector Avg görünümünde AVG noktasına sağ tık → tüm sektörü kaldır ==========
       if sector_combobox.get() == "Sector Avg":
-            for sc, sector_data in scatter_points:
-                  label = sc.get_label() or ""
-                  if not label.endswith(" Avg"):
-                        continue
-
-                  contains, ind = sc.contains(event)
-                  if contains:
-                        sector_name = label.replace(" Avg", "")
-                        # Bu sektördeki TÜM müşterileri kaldır (global df üzerinden)
+            hit = _hit_test(event, avg_only=True)
+            if hit is not None:
+                  sc, _ = scatter_points[hit[0]]
+                  sector_name = (sc.get_label() or "").replace(" Avg", "")
+                  # Bu sektördeki TÜM müşterileri kaldır (global df üzerinden)
+                  keys_for_sector = []
+                  try:
+                        sec_idx = df.index[(df['Company Sector'] == sector_name).to_numpy()]
+                        for key in point_keys_for(point_index, settings_state, sec_idx):
+                              if key not in manual_removed:
+                                    manual_removed.add(key)
+                                    keys_for_sector.append(key)
+                  except Exception:
                         keys_for_sector = []
-                        try:
-                              sec_df = df[df['Company Sector'] == sector_name]
-                              for _, row in sec_df.iterrows():
-                                    key = get_point_key(row, settings_state)
-                                    if key not in manual_removed:
-                                          manual_removed.add(key)
-                                          keys_for_sector.append(key)
-                        except Exception:
-                              keys_for_sector = []
-
-                        if keys_for_sector:
-                              # Undo için SECTOR kaydı tut
-                              undo_stack.append(('SECTOR', keys_for_sector))
-                              update_plot(sector_combobox.get(), preserve_zoom=True, fit_to_data=False)
-                        return
+
+                  if keys_for_sector:
+                        # Undo için SECTOR kaydı tut
+                        undo_stack.append(('SECTOR', keys_for_sector))
+                        request_plot_update(sector_combobox.get(), preserve_zoom=True, fit_to_data=False)
+                  return
             # Sector Avg seçiliyken ama AVG noktasına değil, normal müşteri noktasına sağ tık ise
-            # alttaki standart müşteri silme mantığına düşsün (break etmeden devam)
+            # alttaki standart müşteri silme mantığına düşsün
       # =============================================================================================
 
       # Eski davranış: Tekil müşteri/point kaldırma
-      for sc, sector_data in scatter_points:
-            contains, ind = sc.contains(event)
-            if contains:
-                  # Eğer bu tek bir AVG noktası ise (ve yukarıda Sector Avg özel case'i yakalamadıysa)
-                  if hasattr(sc, "get_offsets") and len(sc.get_offsets()) == 1 and len(sc.get_offsets()[0]) == 2 and sc.get_label().endswith(" Avg"):
-                        ox, oy = sc.get_offsets()[0]
-                        if settings_state.get("swap_axes", False):
-                              x_val, y_val = float(oy), float(ox)
-                        else:
-                              x_val, y_val = float(ox), float(oy)
-                        key = (x_val, y_val)
-                  else:
-                        idx = ind["ind"][0]
-                        row = sector_data.iloc[idx]
-                        key = get_point_key(row, settings_state)
-
-                  if key not in manual_removed:
-                        manual_removed.add(key)
-                        undo_stack.append(('POINT', key))
-                        update_plot(sector_combobox.get(), preserve_zoom=True, fit_to_data=False)
-                  break
+      hit = _hit_test(event)
+      if hit is None:
+            return
+
+      sc_pos, idx = hit
+      sc, sector_data = scatter_points[sc_pos]
+      # Eğer bu tek bir AVG noktası ise (ve yukarıda Sector Avg özel case'i yakalamadıysa)
+      if len(sc.get_offsets()) == 1 and sc.get_label().endswith(" Avg"):
+            ox, oy = sc.get_offsets()[0]
+            if settings_state.get("swap_axes", False):
+                  x_val, y_val = float(oy), float(ox)
+            else:
+                  x_val, y_val = float(ox), float(oy)
+            key = (x_val, y_val)
+      else:
+            key = point_keys_for(point_index, settings_state, sector_data.index[idx:idx + 1])[0]
+
+      if key not in manual_removed:
+            manual_removed.add(key)
+            undo_stack.append(('POINT', key))
+            request_plot_update(sector_combobox.get(), preserve_zoom=True, fit_to_data=False)
 
 canvas.mpl_connect("button_press_event", on_right_click)
 
@@ -2508,16 +2895,7 @@ def on_undo(event=None):
                   settings_state[k] = v
             # Butonların görsel durumunu düzelt
             reg_filter_var.set(settings_state.get("regression_filter", "none"))
-            try:
-                  # Eğer buton fonksiyonları erişilebilir durumdaysa güncelle
-                  if settings_state["regression_filter"] == "above":
-                        reg_btn_up.state(["selected"]); reg_btn_down.state(["!selected"])
-                  elif settings_state["regression_filter"] == "below":
-                        reg_btn_up.state(["!selected"]); reg_btn_down.state(["selected"])
-                  else:
-                        reg_btn_up.state(["!selected"]); reg_btn_down.state(["!selected"])
-            except:  
-                  pass
+            _sync_regression_buttons(settings_state.get("regression_filter", "none"))
 
       elif tag == 'SECTOR':
             # Sektör silme geri alımı
@@ -2560,11 +2938,8 @@ def on_scroll(event):
       ax.set_xlim(x_left, x_right)
       ax.set_ylim(y_bottom, y_top)
        
-      # Grafiği yenile
-      update_plot(sector_combobox.get(), preserve_zoom=True, fit_to_data=False)
-       
-      # --- DÜZELTME: Zoom bittikten sonra seçili noktaları tekrar boya ---
-      draw_selection_highlights()
+      # Sadece limite bağlı çizimleri yenile (noktalar ve seçim halkaları yerinde kalır)
+      refresh_view_limits()
 
 canvas.mpl_connect("scroll_event", on_scroll)
 
@@ -2599,10 +2974,8 @@ def on_press(event):
 def on_release(event):
     # Callback: Pan bitince yapılacaklar
     def _refresh_after_pan():
-        # Sektör değişmediği için preserve_zoom=True, fit_to_data=False
-        update_plot(sector_combobox.get(), preserve_zoom=True, fit_to_data=False)
-        # Seçimleri tekrar boya
-        try: draw_selection_highlights()
+        # Sektör ve veri değişmediği için sadece limite bağlı çizimler yenilenir
+        try: refresh_view_limits()
         except: pass
 
     handle_pan_release(event, pan_state, _refresh_after_pan)
@@ -2647,11 +3020,12 @@ def on_sector_change(event):
       
       toggle_regression_buttons_visibility()
 
-      update_plot(sector_combobox.get(), preserve_zoom=False, fit_to_data=True)
+      def _after_draw():
+            if settings_state.get("activate_search_box", False):
+                  _update_search_list(search_var.get())
+
+      request_plot_update(sector_combobox.get(), preserve_zoom=False, fit_to_data=True, after_draw=_after_draw)
       _apply_churn_labels_visibility()
-        
-      if settings_state.get("activate_search_box", False):
-            _update_search_list(search_var.get())
 
       canvas.get_tk_widget().focus_set()
       root.focus_set()
@@ -2682,12 +3056,12 @@ def on_exc_updated_toggle():
       refresh_show_arrows_enabled()
       
       # 3. Grafiği yenile
-      update_plot(sector_combobox.get(), preserve_zoom=False, fit_to_data=True)
+      request_plot_update(sector_combobox.get(), preserve_zoom=False, fit_to_data=True)
 
 
 def on_exc_show_arrows_toggle():
       settings_state["show_difference_arrows"] = bool(exc_show_arrows_var.get())
-      update_plot(sector_combobox.get(), preserve_zoom=False, fit_to_data=True)
+      request_plot_update(sector_combobox.get(), preserve_zoom=False, fit_to_data=True)
 
 
 exc_updated_cb = ttk.Checkbutton(exc_opts_frame, text="Updated Exc. License Values",
@@ -2708,8 +3082,15 @@ numeric_entry.config(validate="key", validatecommand=vcmd)
 numeric_entry.grid(row=0, column=1, sticky="w")
 
 
+def _compute_license_removed(min_license, rev, state):
+      """
+      License Percent eşiğine göre gizlenecek nokta anahtarları (churn satırları hariç).
+      state: anahtarların yaş modu için settings_state kopyası (arka planda çalışır).
+      """
+      mask = get_license_removed_mask(df, min_license, reverse=rev)
+      return set(point_keys_for(point_index, state, df.index, mask))
+
 def on_license_filter():
-      license_removed.clear()
       try:
             value_str = numeric_entry.get()
             min_license = parse_number_entry(value_str) / 100.0
@@ -2717,57 +3098,43 @@ def on_license_filter():
             min_license = 0.0
 
       # Sadece Exc. modunda filtre uygula
-      if license_var.get() == "Exc.":     
-            rev = settings_state.get("reverse_effect", False)
-
-            for _, row in df.iterrows():
-
-                  # 1) CHURN satırlarını tamamen atla
-                  if CHURN_COL in df.columns:
-                        try:
-                              churn_flag = str(row.get(CHURN_COL, "")).strip().upper()
-                              if churn_flag == "CHURN":
-                                    continue
-                        except Exception:
-                              pass
-
-                  # 2) License Percent değerini float'a çevir
-                  raw_val = row.get("License Percent", 0)
-
-                  try:
-                        import pandas as _pd
-                        # NaN ise atla
-                        if _pd.isna(raw_val):
-                              continue
+      is_exc = (license_var.get() == "Exc.")
+      rev = settings_state.get("reverse_effect", False)
+      inputs = _plot_inputs(sector_combobox.get())
+      state = inputs[3]
+      manual = frozenset(manual_removed)
+
+      def _job():
+            # Anahtarlar ve çizimin veri kısmı arka planda; yeni tuş gelirse bu iş iptal edilir
+            removed = _compute_license_removed(min_license, rev, state) if is_exc else set()
+            payload = _compute_plot_payload(inputs[:2] + (manual.union(removed),) + inputs[3:])
+            payload["license_removed"] = removed
+            return payload
+
+      def _after_draw():
+            if settings_state.get("activate_search_box", False):
+                  _update_search_list(search_var.get())
+
+      def _done(payload):
+            license_removed.clear()
+            license_removed.update(payload["license_removed"])
+            refresh_show_arrows_enabled()
+            _draw_plot_payload(payload, preserve_zoom=False, fit_to_data=True, after_draw=_after_draw)
 
-                        if isinstance(raw_val, str):
-                              cleaned = raw_val.strip()
-                              # İçinde hiç rakam yoksa (ör: "CHURN") bu satırı da atla
-                              if not any(ch.isdigit() for ch in cleaned):
-                                    continue
-                              license_value = parse_number_entry(cleaned)
-                        else:
-                              license_value = float(raw_val)
-                  except Exception:
-                        # Herhangi bir parse hatasında satırı atla
-                        continue
-
-                  key = get_point_key(row, settings_state)
-
-                  if not rev:
-                        if license_value > min_license:
-                              license_removed.add(key)
-                  else:
-                        if license_value <= min_license:
-                              license_removed.add(key)
-
-      refresh_show_arrows_enabled()
-      update_plot(sector_combobox.get(), preserve_zoom=False, fit_to_data=True)
-      if settings_state.get("activate_search_box", False):
-            _update_search_list(search_var.get())
+      submit_job(compute_executor, PLOT_JOB_LICENSE, _job, _done)
 
 
 def on_license_key_release(event):
+      # Debounce: "12.5" yazarken her tuşta değil, yazma durunca bir kere filtrele
+      global _license_filter_timer
+      if _license_filter_timer is not None:
+            try: root.after_cancel(_license_filter_timer)
+            except Exception: pass
+      _license_filter_timer = root.after(LICENSE_FILTER_DEBOUNCE_MS, _run_debounced_license_filter)
+
+def _run_debounced_license_filter():
+      global _license_filter_timer
+      _license_filter_timer = None
       on_license_filter()
 
 numeric_entry.bind("<KeyRelease>", on_license_key_release)
@@ -2789,6 +3156,8 @@ def on_license_select_v1():
       # Inc. seçildi → normal davran, churn checkbox'larına karışma
       license_var.set("Inc.")
       update_exc_controls_visibility()
+      # Bekleyen Exc. eşik işi sonradan license_removed'ı doldurmasın
+      cancel_job(compute_executor, PLOT_JOB_LICENSE)
       license_removed.clear()
       refresh_show_arrows_enabled()
       update_plot(sector_combobox.get(), preserve_zoom=False, fit_to_data=True)
@@ -2971,15 +3340,12 @@ def _toggle_regression_line_hotkey(event=None):
              
             # Eğer kapatılıyorsa, filtreyi de kapat
             if not new_state:
-                  settings_state["regression_filter"] = "none"
-                  reg_filter_var.set("none")
-                  reg_btn_up.state(["!selected"])
-                  reg_btn_down.state(["!selected"])
+                  _set_regression_filter_mode("none")
              
             # Butonların görünürlüğünü güncelle
             toggle_regression_buttons_visibility()
             # Grafiği yeniden çiz
-            update_plot(sector_combobox.get(), preserve_zoom=True, fit_to_data=False)
+            request_plot_update(sector_combobox.get(), preserve_zoom=True, fit_to_data=False)
       except Exception as e:
             print(f"Ctrl+R+L toggle hata: {e}")
 
@@ -3070,12 +3436,7 @@ root.after_idle(lambda: _position_search_frame() if settings_state.get("activate
 
 def clear_selection_visuals():
       """Seçim efektlerini temizler."""
-      for art in selection_state["highlight_artists"]:
-            try:
-                  art.remove()
-            except:
-                  pass
-      selection_state["highlight_artists"].clear()
+      clear_overlay_group(overlay, "selection", redraw=False)
 
 def draw_selection_highlights():
     """
@@ -3089,11 +3450,12 @@ def draw_selection_highlights():
     # --- 1. SEÇİM YOKSA ---
     if not selected_keys:
         if current_visible_df is not None:
-             update_sidebar_statistics(current_visible_df, custom_header=None)
+             update_sidebar_statistics(current_visible_df, custom_header=None, sector_table=current_sector_table,
+                                       sector_trends=current_sector_trends)
         
         selection_info_label.config(text="")
         selection_info_label.pack_forget()
-        canvas.draw_idle()
+        blit_overlay(overlay)
         return
 
     # --- 2. SEÇİM VARSA ---
@@ -3155,13 +3517,9 @@ def draw_selection_highlights():
 
         # 2. Dataframe Filtreleme (Artık Churn'ler de eşleşecek!)
         if current_visible_df is not None and target_keys:
-            def _is_selected(row):
-                # get_point_key artık Adım 1'deki düzeltme sayesinde 
-                # Churn satırları için de "Swapped MRR" üretecek ve eşleşme sağlanacak.
-                key = get_point_key(row, settings_state)
-                return key in target_keys
-
-            subset_df = current_visible_df[current_visible_df.apply(_is_selected, axis=1)]
+            # Seçili anahtarlar nokta indeksinde tek bir maske ile eşlenir
+            selected_mask = point_keys_mask(point_index, settings_state, target_keys, current_visible_df.index)
+            subset_df = current_visible_df[selected_mask]
             
             # Sağ Paneli Güncelle
             update_sidebar_statistics(subset_df, custom_header="Selected")
@@ -3198,9 +3556,9 @@ def draw_selection_highlights():
     if xs:
         glow = ax.scatter(xs, ys, s=s_size, c='#1f77b4', alpha=0.3, edgecolors='none', zorder=2.5)
         ring = ax.scatter(xs, ys, s=s_size, facecolors='none', edgecolors='#1f77b4', linewidths=2.0, zorder=2.6)
-        selection_state["highlight_artists"].extend([glow, ring])
+        add_overlay_artists(overlay, "selection", [glow, ring], redraw=False)
 
-    canvas.draw_idle()
+    blit_overlay(overlay)
 
 # --- OPTİMİZE EDİLMİŞ EVENTLER ---
 
@@ -3216,14 +3574,19 @@ def on_select_press(event):
 def on_select_motion(event):
     handle_select_motion(event, selection_state, ax, canvas)
 
+def _point_keys(labels):
+    """Seçim için: verilen satırların (index, x, y) anahtarları."""
+    return point_keys_for(point_index, settings_state, labels)
+
 def on_select_release(event):
     changed = handle_select_release(
         event, 
         selection_state, 
         ax, 
         canvas, 
-        get_point_key,      # Fonksiyonu parametre olarak gönderiyoruz
-        to_plot_coords,     # Fonksiyonu parametre olarak gönderiyoruz
+        _point_keys,        # Fonksiyonu parametre olarak gönderiyoruz
+        _hit_test,          # Tek tık: uzamsal indeks sorgusu
+        _rect_query,        # Kutu seçimi: uzamsal indeks sorgusu
         scatter_points, 
         sector_combobox.get(), 
         settings_state
@@ -3255,9 +3618,8 @@ def on_delete_selected(event):
                         sec_name = sec_key.split("|")[1]
                          
                         # O sektördeki tüm müşterileri bul
-                        sec_df = df[df['Company Sector'] == sec_name]
-                        for _, row in sec_df.iterrows():
-                              pt_key = get_point_key(row, settings_state)
+                        sec_idx = df.index[(df['Company Sector'] == sec_name).to_numpy()]
+                        for pt_key in point_keys_for(point_index, settings_state, sec_idx):
                               if pt_key not in manual_removed:
                                     keys_to_add_to_manual.append(pt_key)
                                     manual_removed.add(pt_key)
@@ -3277,7 +3639,7 @@ def on_delete_selected(event):
       selection_state["selected_keys"].clear()
       clear_selection_visuals()
        
-      update_plot(sector_combobox.get(), preserve_zoom=True, fit_to_data=False)
+      request_plot_update(sector_combobox.get(), preserve_zoom=True, fit_to_data=False)
 
 # --- EVENT BAĞLAMALARI (BINDINGS) ---
 canvas.mpl_connect("button_press_event", on_press)              # Pan Press (Güncelledik)
@@ -3307,9 +3669,7 @@ def invert_selection(event=None):
       else:
             # Müşteri anahtarlarını topla
             for sc, sub_df in scatter_points:
-                  for _, row in sub_df.iterrows():
-                        key = get_point_key(row, settings_state)
-                        all_visible_keys.add(key)
+                  all_visible_keys.update(point_keys_for(point_index, settings_state, sub_df.index))
 
       current_selection = selection_state["selected_keys"]
       new_selection = all_visible_keys - current_selection
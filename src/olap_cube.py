@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+"""
+Sektör × risk × churn × yaş modu ön-toplam küpü (OLAP cube).
+
+Veri yüklenince her satırın kategorik boyut kodları (sektör, risk, churn)
+bir kere çıkarılır. Her yaş modu için satırlar (sektör, risk, churn)
+hücrelerine np.bincount ile toplanır; hücrede adet ve MRR /
+Growth toplamları (ve NaN olmayan değer adetleri) tutulur. Yaş modu
+boyutu, o modun yaş filtresinden geçen satırlar ve modun projeksiyon
+kolonlarıyla ayrı bir hücre dizisidir (ilk kullanımda kurulur).
+
+Gizli / silinen noktalar değişince küp baştan kurulmaz: sadece durumu
+değişen satırların katkısı hücrelerden çıkarılır / eklenir (np.add.at).
+Çok satır değiştiyse (ör. hold-to-focus) baştan kurmak daha ucuzdur.
+Yan panel sayıları ve Sector Avg satırları bu hücrelerin dilimlenip
+toplanmasıyla elde edilir; satır taraması yapılmaz.
+
+Regresyon için hücrelerde her X ölçüsü (MRR / Exc.) ile Growth çiftinin
+yeterli istatistikleri de (n, Σx, Σy, Σxy, Σx², Σy²) tutulur: herhangi
+bir sektör kümesinin doğrusu, R²'si ve eğim standart hatası dilim
+toplamından çıkar; nokta silme / geri alma sadece o satırın katkısını
+günceller.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_ops import (
+    SECTOR_COL, CHURN_COL, EFFECTIVE_MRR_COL, RISK_COL, RISK_CODE_COL,
+    get_churn_mask, get_risk_codes, build_risk_lookup, age_keep_mask,
+    get_base_mrr_col_for_age_mode, get_updated_y_col_if_any,
+)
+from analysis import grouped_regression_from_sums, regression_from_sums, regression_lines_by_sector
+from projections import get_age_projection
+from sector_stats import SECTOR_TABLE_COLUMNS
+
+# Regresyon yeterli istatistikleri (X ölçüsü başına, kaydırılmış değerlerle)
+REGRESSION_SUMS = ("n", "x", "y", "xy", "xx", "yy")
+
+# Hücre ölçüleri (her biri için hücre başına toplam)
+MEASURES = ("count", "mrr", "mrr_n", "exc", "exc_n", "y", "y_n", "base_x", "base_x_n", "upd_y", "upd_y_n") + \
+    tuple(f"reg_{name}_{x_measure}" for x_measure in ("mrr", "exc") for name in REGRESSION_SUMS)
+_M = {name: i for i, name in enumerate(MEASURES)}
+
+# Bu orandan fazla satırın durumu değişirse hücreler artımlı değil baştan hesaplanır
+OLAP_REBUILD_RATIO = 0.25
+
+def _float_values(series):
+    return pd.to_numeric(series, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+def create_olap_cube(df, projection_store=None):
+    """
+    df için boş küp: boyut kodları hazır, yaş modu hücreleri ilk kullanımda kurulur.
+    Tüm satırlar başlangıçta aktiftir (gizli nokta yok).
+    """
+    n = len(df)
+    if SECTOR_COL in df.columns:
+        sector_codes, sectors = pd.factorize(df[SECTOR_COL], sort=True)
+        sectors = list(sectors)
+    else:
+        sector_codes, sectors = np.full(n, -1), []
+    n_sectors = len(sectors) + 1          # son dilim: sektörü boş satırlar
+    sector_codes = np.where(sector_codes < 0, n_sectors - 1, sector_codes)
+
+    if RISK_COL in df.columns or RISK_CODE_COL in df.columns:
+        risk = get_risk_codes(df)
+        risk_categories = list(risk.cat.categories)
+        risk_codes = risk.cat.codes.to_numpy().astype(np.int64)
+    else:
+        risk_categories, risk_codes = [], np.full(n, -1)
+    n_risks = len(risk_categories) + 1    # son dilim: tanımsız risk
+    risk_codes = np.where(risk_codes < 0, n_risks - 1, risk_codes)
+
+    churn = get_churn_mask(df).to_numpy(dtype=bool) if CHURN_COL in df.columns else np.zeros(n, dtype=bool)
+
+    shape = (n_sectors, n_risks, 2)
+    base_cell = (sector_codes * n_risks + risk_codes) * 2 + churn
+    return {
+        "df": df,
+        "projection_store": projection_store,
+        "n": n,
+        "shape": shape,
+        "sectors": sectors,
+        "risk_categories": risk_categories,
+        "sector_codes": sector_codes,
+        "base_cell": base_cell.astype(np.int64),
+        "active": np.ones(n, dtype=bool),
+        "modes": {},
+        "lock": threading.RLock(),
+    }
+
+def _measure_values(df, projection, age_mode):
+    """
+    (n, len(MEASURES)) ölçü matrisi; NaN değerler 0 + ayrı adet kolonu.
+    Regresyon ölçüleri X ve Y'nin ikisi de sonlu olan satırlardan, tüm satırların
+    ortalamasına kaydırılarak alınır (kaydırma miktarları ayrıca döner).
+    """
+    n = len(df)
+    nan = np.full(n, np.nan)
+    stats, exc = projection["stats"], projection["exc"]
+
+    mrr = stats.get(EFFECTIVE_MRR_COL)
+    if mrr is None:
+        mrr = _float_values(df[EFFECTIVE_MRR_COL]) if EFFECTIVE_MRR_COL in df.columns else nan
+    x_exc = exc.get('Exc. License MRR')
+    if x_exc is None:
+        x_exc = _float_values(df['Exc. License MRR']) if 'Exc. License MRR' in df.columns else mrr
+    y = stats.get('MRR Growth (%)')
+    if y is None:
+        y = _float_values(df['MRR Growth (%)']) if 'MRR Growth (%)' in df.columns else nan
+
+    base_col = get_base_mrr_col_for_age_mode({"age_filter_mode": age_mode}, df.columns)
+    base_x = _float_values(df[base_col]) if base_col in df.columns else None
+    upd_col = get_updated_y_col_if_any(df)
+    upd_y = _float_values(df[upd_col]) if upd_col is not None else None
+
+    values = np.zeros((n, len(MEASURES)))
+    values[:, _M["count"]] = 1.0
+    for name, arr in (("mrr", mrr), ("exc", x_exc), ("y", y), ("base_x", base_x), ("upd_y", upd_y)):
+        if arr is None:
+            continue
+        ok = ~np.isnan(arr)
+        values[:, _M[name]] = np.where(ok, arr, 0.0)
+        values[:, _M[name + "_n"]] = ok
+
+    shifts = {}
+    for x_measure, arr in (("mrr", mrr), ("exc", x_exc)):
+        ok = np.isfinite(arr) & np.isfinite(y)
+        x0 = float(arr[ok].mean()) if ok.any() else 0.0
+        y0 = float(y[ok].mean()) if ok.any() else 0.0
+        dx = np.where(ok, arr - x0, 0.0)
+        dy = np.where(ok, y - y0, 0.0)
+        for name, col in (("n", ok), ("x", dx), ("y", dy), ("xy", dx * dy), ("xx", dx * dx), ("yy", dy * dy)):
+            values[:, _M[f"reg_{name}_{x_measure}"]] = col
+        shifts[x_measure] = (x0, y0)
+    return values, {"base_x": base_x is not None, "upd_y": upd_y is not None}, shifts
+
+def _bincount_cells(cells_len, flat, values):
+    out = np.empty((cells_len, values.shape[1]))
+    for k in range(values.shape[1]):
+        out[:, k] = np.bincount(flat, weights=values[:, k], minlength=cells_len)
+    return out
+
+def _rebuild_cells(cube, mode_state):
+    rows = cube["active"] & mode_state["age_ok"]
+    flat = cube["base_cell"][rows]
+    mode_state["cells"] = _bincount_cells(int(np.prod(cube["shape"])), flat, mode_state["values"][rows])
+
+def _get_mode(cube, age_mode):
+    """Yaş modunun hücreleri (yoksa projeksiyondan kurulur)."""
+    state = cube["modes"].get(age_mode)
+    if state is None:
+        df = cube["df"]
+        values, has, shifts = _measure_values(df, get_age_projection(cube["projection_store"], df, age_mode), age_mode)
+        state = {
+            "values": values,
+            "has": has,
+            "reg_shift": shifts,
+            "age_ok": age_keep_mask(df, {"age_filter_mode": age_mode}),
+            "cells": None,
+        }
+        _rebuild_cells(cube, state)
+        cube["modes"][age_mode] = state
+    return state
+
+def _apply_delta(cube, mode_state, cells, rows, sign):
+    """rows (pozisyon dizisi) satırlarının katkısını cells'e ekler (+1) / çıkarır (-1)."""
+    rows = rows[mode_state["age_ok"][rows]]
+    if len(rows):
+        flat = cube["base_cell"][rows]
+        np.add.at(cells, flat, sign * mode_state["values"][rows])
+
+def set_olap_active(cube, keep):
+    """
+    Gizli olmayan satırlar (df'e hizalı bool dizi) değişti: kurulu tüm yaş modlarında
+    sadece durumu değişen satırlar güncellenir.
+    """
+    keep = np.asarray(keep, dtype=bool)
+    with cube["lock"]:
+        changed = np.flatnonzero(keep != cube["active"])
+        if len(changed) == 0:
+            return 0
+        rebuild = len(changed) > cube["n"] * OLAP_REBUILD_RATIO
+        added = changed[keep[changed]]
+        removed = changed[~keep[changed]]
+        cube["active"] = keep.copy()
+        for state in cube["modes"].values():
+            if rebuild:
+                _rebuild_cells(cube, state)
+            else:
+                _apply_delta(cube, state, state["cells"], added, 1.0)
+                _apply_delta(cube, state, state["cells"], removed, -1.0)
+        return len(changed)
+
+def _cells_for(cube, age_mode, keep=None):
+    """
+    Yaş modunun hücreleri. keep küpün aktif satırlarından farklıysa
+    (ör. export'ta regresyonla gizlenenler de düşer) fark satırları kopya üzerinde düzeltilir.
+    """
+    state = _get_mode(cube, age_mode)
+    if keep is None:
+        return state["cells"]
+    keep = np.asarray(keep, dtype=bool)
+    changed = np.flatnonzero(keep != cube["active"])
+    if len(changed) == 0:
+        return state["cells"]
+    if len(changed) > cube["n"] * OLAP_REBUILD_RATIO:
+        rows = keep & state["age_ok"]
+        flat = cube["base_cell"][rows]
+        return _bincount_cells(state["cells"].shape[0], flat, state["values"][rows])
+    cells = state["cells"].copy()
+    _apply_delta(cube, state, cells, changed[keep[changed]], 1.0)
+    _apply_delta(cube, state, cells, changed[~keep[changed]], -1.0)
+    return cells
+
+def churn_axis_filter(settings_state):
+    """Churn Include / Show Only ayarının churn boyutu dilimi: (aktifler, churn)."""
+    if settings_state.get("show_only_churn", False):
+        return (False, True)
+    if not settings_state.get("churn_enabled", True):
+        return (True, False)
+    return (True, True)
+
+def risk_axis_filter(cube, settings_state):
+    """Risk checkbox'larının risk boyutu dilimi (tanımsız risk her zaman görünür)."""
+    return np.append(build_risk_lookup(cube["risk_categories"], settings_state), True)
+
+def _slice(cube, cells, churn_filter=(True, True), risk_allowed=None, sectors=None):
+    """Seçili dilimin toplamları: (sektör, ölçü) dizisi."""
+    s, r, c = cube["shape"]
+    view = cells.reshape(s, r, c, len(MEASURES))
+    if risk_allowed is not None:
+        view = view[:, np.asarray(risk_allowed, dtype=bool)]
+    view = view[:, :, np.asarray(churn_filter, dtype=bool)]
+    out = view.sum(axis=(1, 2))
+    if sectors is not None:
+        keep = np.zeros(s, dtype=bool)
+        index = {sec: i for i, sec in enumerate(cube["sectors"])}
+        keep[[index[sec] for sec in sectors if sec in index]] = True
+        out = out * keep[:, None]
+    return out
+
+def olap_sector_table(cube, age_mode, x_measure="mrr", churn_filter=(True, True), risk_allowed=None,
+                      sectors=None, keep=None):
+    """
+    Dilimin sektör tablosu; sector_stats.build_sector_stats ile aynı kolonlar ve sıra
+    (index sıralı sektörler, sektörü boş satırlar sonda NaN). x_measure: "mrr" / "exc".
+    """
+    with cube["lock"]:
+        has = _get_mode(cube, age_mode)["has"]
+        cells = _cells_for(cube, age_mode, keep)
+        by_sector = _slice(cube, cells, churn_filter, risk_allowed, sectors)
+        churn_part = _slice(cube, cells, (False, churn_filter[1]), risk_allowed, sectors)
+
+    def m(name):
+        return by_sector[:, _M[name]]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_sum, x_n = m(x_measure), m(x_measure + "_n")
+        y_sum, y_n = m("y"), m("y_n")
+        base = (m("base_x"), m("base_x_n")) if has["base_x"] else (x_sum, x_n)
+        upd = (m("upd_y"), m("upd_y_n")) if has["upd_y"] else (y_sum, y_n)
+        table = pd.DataFrame({
+            "count": m("count"),
+            "x_sum": x_sum,
+            "x_mean": x_sum / x_n,
+            "y_sum": y_sum,
+            "y_mean": y_sum / y_n,
+            "mrr_sum": m("mrr"),
+            "churn_count": churn_part[:, _M["count"]],
+            "churned_mrr": churn_part[:, _M["mrr"]],
+            "total_mrr": m("mrr"),
+            "base_x_mean": base[0] / base[1],
+            "updated_y_mean": upd[0] / upd[1],
+        }, index=pd.Index(cube["sectors"] + [np.nan], name=SECTOR_COL))
+    table = table[table["count"] > 0]
+    table["count"] = table["count"].astype(np.int64)
+    table["churn_count"] = table["churn_count"].astype(np.int64)
+    return table[list(SECTOR_TABLE_COLUMNS)]
+
+def olap_totals(cube, age_mode, x_measure="mrr", churn_filter=(True, True), risk_allowed=None,
+                sectors=None, keep=None):
+    """Dilimin genel toplamları: {"count", "x_mean", "y_mean", "mrr_sum"} (merkez çizgileri için)."""
+    with cube["lock"]:
+        tot = _slice(cube, _cells_for(cube, age_mode, keep), churn_filter, risk_allowed, sectors).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "count": int(tot[_M["count"]]),
+            "x_mean": tot[_M[x_measure]] / tot[_M[x_measure + "_n"]],
+            "y_mean": tot[_M["y"]] / tot[_M["y_n"]],
+            "mrr_sum": tot[_M["mrr"]],
+        }
+
+def olap_regression(cube, age_mode, x_measure="mrr", churn_filter=(True, True), risk_allowed=None,
+                    sectors=None, swap_axes=False, keep=None):
+    """
+    Dilimin regresyon doğrusu (Growth ~ X; swap_axes'te X ~ Growth) hücre toplamlarından.
+    Dönüş: analysis.regression_from_sums ile aynı {'m', 'b', 'r2', 'se', 'n'}.
+    """
+    with cube["lock"]:
+        state = _get_mode(cube, age_mode)
+        tot = _slice(cube, _cells_for(cube, age_mode, keep), churn_filter, risk_allowed, sectors).sum(axis=0)
+    return _line_from_sums(tot, state["reg_shift"][x_measure], x_measure, swap_axes)
+
+def olap_sector_regressions(cube, age_mode, x_measure="mrr", churn_filter=(True, True), risk_allowed=None,
+                            swap_axes=False, keep=None):
+    """
+    "All sector trends": dilimdeki her sektörün doğrusu, sektör başına hücre toplamlarından
+    tek seferde (gruplu en küçük kareler). Dönüş: {sektör: {'m', 'b', 'r2', 'se', 'n'}},
+    doğrusu tanımsız sektörler yer almaz.
+    """
+    with cube["lock"]:
+        state = _get_mode(cube, age_mode)
+        per_sector = _slice(cube, _cells_for(cube, age_mode, keep), churn_filter, risk_allowed)
+    # Son dilim (sektörü boş satırlar) trend listesine girmez
+    lines = grouped_regression_from_sums(*_regression_args(per_sector[:-1], state["reg_shift"][x_measure],
+                                                            x_measure, swap_axes))
+    return regression_lines_by_sector(lines, cube["sectors"])
+
+def _regression_args(tot, shift, x_measure, swap_axes):
+    """Toplam dizisinden (n, Σx, Σy, Σxy, Σx², Σy², x0, y0); son eksen ölçü ekseni."""
+    n, sx, sy, sxy, sxx, syy = (tot[..., _M[f"reg_{name}_{x_measure}"]] for name in REGRESSION_SUMS)
+    x0, y0 = shift
+    if swap_axes:
+        # Eksenler yer değiştirince x ve y toplamlarının rolü değişir (Σxy simetrik)
+        sx, sy, sxx, syy, x0, y0 = sy, sx, syy, sxx, y0, x0
+    return np.round(n), sx, sy, sxy, sxx, syy, x0, y0
+
+def _line_from_sums(tot, shift, x_measure, swap_axes):
+    return regression_from_sums(*_regression_args(tot, shift, x_measure, swap_axes))
+
+def olap_sector_rows(cube, keep):
+    """
+    keep (df'e hizalı bool) satırlarının sektör bazlı pozisyonları (df[keep] içinde),
+    build_sector_stats'taki "rows" ile aynı biçim.
+    """
+    codes = cube["sector_codes"][np.asarray(keep, dtype=bool)]
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(cube["sectors"]) + 1))
+    rows = {}
+    for i, sec in enumerate(cube["sectors"]):
+        if bounds[i + 1] > bounds[i]:
+            rows[sec] = order[bounds[i]:bounds[i + 1]]
+    return rows
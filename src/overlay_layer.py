@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Blit tabanlı overlay katmanı.
+
+Hover işaretçisi, seçim halkaları ve arama (neon) parlaması gibi sık değişen
+artistler 'animated' olarak işaretlenir; normal figür çiziminde çizilmezler.
+Her tam çizimden (draw_event) sonra statik arka plan saklanır ve overlay
+artistleri bunun üzerine blit edilir. Böylece mouse hareketi tam figür
+render'ı tetiklemez.
+"""
+
+# Çizim sırası (sonraki üstte kalır)
+OVERLAY_GROUPS = ("selection", "search", "hover")
+
+def create_overlay_layer(ax, canvas, group_lists=None):
+    """
+    Overlay katmanı oluşturur ve canvas'ın draw_event'ine bağlar.
+    group_lists: {grup: liste} - mevcut artist listeleri paylaşılarak kullanılır.
+    """
+    group_lists = group_lists or {}
+    layer = {
+        "ax": ax,
+        "canvas": canvas,
+        "background": None,
+        "view": None,
+        "artists": {name: group_lists.get(name, []) for name in OVERLAY_GROUPS},
+    }
+    canvas.mpl_connect("draw_event", lambda event: _on_full_draw(layer))
+    return layer
+
+def _current_view(layer):
+    """Arka planın geçerliliğini kontrol etmek için eksen ve canvas boyutu."""
+    ax = layer["ax"]
+    return (tuple(ax.viewLim.bounds), layer["canvas"].get_width_height())
+
+def _live_artists(layer):
+    for name in OVERLAY_GROUPS:
+        for art in layer["artists"][name]:
+            # ax.clear() sonrası eksenden düşen artistleri atla
+            if art.axes is not None and art.get_visible():
+                yield art
+
+def _on_full_draw(layer):
+    """Tam çizimden sonra: arka planı sakla ve overlay'leri üstüne çiz."""
+    canvas = layer["canvas"]
+    if not getattr(canvas, "supports_blit", False):
+        return
+    ax = layer["ax"]
+    try:
+        layer["background"] = canvas.copy_from_bbox(ax.figure.bbox)
+        layer["view"] = _current_view(layer)
+        for art in _live_artists(layer):
+            ax.draw_artist(art)
+    except Exception:
+        layer["background"] = None
+
+def invalidate_overlay_background(layer):
+    """Figür değiştiğinde (update_plot, zoom) saklanan arka planı geçersiz kılar."""
+    layer["background"] = None
+
+def blit_overlay(layer):
+    """
+    Saklanan arka planı geri yükleyip sadece overlay artistlerini çizer.
+    Arka plan yoksa veya eski bir görünüme aitse tam çizim istenir.
+    """
+    canvas = layer["canvas"]
+    bg = layer["background"]
+    if (bg is None) or (layer["view"] != _current_view(layer)) or not getattr(canvas, "supports_blit", False):
+        canvas.draw_idle()
+        return
+
+    ax = layer["ax"]
+    canvas.restore_region(bg)
+    for art in _live_artists(layer):
+        ax.draw_artist(art)
+    canvas.blit(ax.figure.bbox)
+
+def add_overlay_artists(layer, group, artists, redraw=True):
+    """Artistleri overlay grubuna ekler (animated yapılır, tam çizime girmez)."""
+    for art in artists:
+        art.set_animated(True)
+    layer["artists"][group].extend(artists)
+    if redraw:
+        blit_overlay(layer)
+
+def clear_overlay_group(layer, group, redraw=True):
+    """Bir overlay grubunu temizler (liste yerinde boşaltılır)."""
+    arts = layer["artists"][group]
+    for art in arts:
+        try:
+            art.remove()
+        except Exception:
+            pass
+    arts.clear()
+    if redraw:
+        blit_overlay(layer)
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Yaş modu / lisans modu projeksiyonlarının önceden hesaplanması.
+
+Her yaş modu (0-Current, 0-1, 0-2, 1-2) için grafiğin kullandığı kolonlar
+(MRR Growth (%), Effective MRR - churn ise Churned MRR -, Exc. License MRR)
+ana df ile hizalı float dizileri olarak bir kere hesaplanır. Lisans modu
+(Inc. / Exc.) bu dizilerden hangisinin X olacağını seçer; ayrı hesap
+gerekmez. Hesap, veri yüklendikten hemen sonra arka planda bir iş parçacığı
+havuzunda yapılır; mod değişimi dizi seçimine iner.
+
+Not: main.py modül seviyesinde çalışan bir betik ( __main__ koruması yok),
+bu yüzden süreç havuzu (spawn ile main'i yeniden import eder) yerine
+ThreadPoolExecutor kullanılır. İşin çoğu NumPy / pandas içinde geçtiği için
+iş parçacıkları yeterli paralellik sağlar.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from data_ops import (
+    EFFECTIVE_MRR_COL, CHURN_COL, CHURNED_MRR_COL,
+    AGE_MODE_0_CURRENT, AGE_MODE_0_1, AGE_MODE_0_2, AGE_MODE_1_2,
+    get_growth_source_col_for_age_mode, get_base_mrr_col_for_age_mode,
+    get_exc_mrr_col_for_age_mode, get_churn_mask,
+)
+
+AGE_MODES = (AGE_MODE_0_CURRENT, AGE_MODE_0_1, AGE_MODE_0_2, AGE_MODE_1_2)
+PROJECTION_WORKERS = 4
+
+def _float_array(series):
+    return series.astype(float).to_numpy(dtype=float, na_value=np.nan)
+
+def build_age_projection(df, age_mode):
+    """
+    Tek yaş modu için update_plot'un kolon yazımını tüm df üzerinde yapar.
+    Dönüş: {"stats": {kolon: dizi}, "exc": {kolon: dizi}}
+    "stats" kolonları istatistik verisine de yazılır, "exc" sadece çizim verisine.
+    """
+    mode_state = {"age_filter_mode": age_mode}
+    stats_cols = {}
+
+    growth_col = get_growth_source_col_for_age_mode(mode_state, df.columns)
+    if growth_col in df.columns:
+        stats_cols['MRR Growth (%)'] = _float_array(df[growth_col]) * 100.0
+
+    base_mrr_col = get_base_mrr_col_for_age_mode(mode_state, df.columns)
+    mrr = _float_array(df[base_mrr_col]) if base_mrr_col in df.columns else None
+
+    # churn ise MRR'i Churned MRR ile değiştir
+    if (CHURN_COL in df.columns) and (CHURNED_MRR_COL in df.columns):
+        if mrr is None:
+            mrr = _float_array(df[EFFECTIVE_MRR_COL]) if EFFECTIVE_MRR_COL in df.columns else np.full(len(df), np.nan)
+        churn = get_churn_mask(df).to_numpy()
+        mrr = mrr.copy()
+        mrr[churn] = _float_array(df.loc[churn, CHURNED_MRR_COL])
+    if mrr is not None:
+        stats_cols[EFFECTIVE_MRR_COL] = mrr
+
+    exc_cols = {}
+    exc_src = get_exc_mrr_col_for_age_mode(mode_state)
+    if exc_src in df.columns:
+        exc_cols['Exc. License MRR'] = _float_array(df[exc_src])
+    return {"stats": stats_cols, "exc": exc_cols}
+
+def start_projection_precompute(df, max_workers=PROJECTION_WORKERS):
+    """
+    Tüm yaş modlarının projeksiyonunu arka planda başlatır (Tk iş parçacığını bloklamaz).
+    Dönüş: {"df_id": id(df), "futures": {yaş_modu: Future}}
+    """
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="projection")
+    futures = {mode: pool.submit(build_age_projection, df, mode) for mode in AGE_MODES}
+    pool.shutdown(wait=False)
+    return {"df_id": id(df), "futures": futures}
+
+def get_age_projection(store, df, age_mode):
+    """
+    Yaş modunun projeksiyonu. Arka plan hesabı bitmemişse beklenir; store bu
+    df'e ait değilse veya mod bilinmiyorsa senkron hesaplanır.
+    """
+    if store is not None and store.get("df_id") == id(df):
+        fut = store["futures"].get(age_mode)
+        if fut is not None:
+            try:
+                return fut.result()
+            except Exception as e:
+                print(f"Projection Error: {e}")
+    return build_age_projection(df, age_mode)
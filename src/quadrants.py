@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Quadrant (çeyrek) hesapları.
+
+Noktaların merkeze (plot_cx, plot_cy) göre hangi çeyrekte olduğu ve risk
+colormap arka planı için çeyrek bazlı ağırlıklı renkler NumPy dizileriyle
+hesaplanır. Export ve overlay aynı fonksiyonları kullanır.
+"""
+import numpy as np
+
+# Sıra: Q1 (+,+), Q2 (-,+), Q3 (-,-), Q4 (+,-)
+QUADRANT_LABELS = ("(+,+)", "(-,+)", "(-,-)", "(+,-)")
+
+def classify_quadrants(px, py, cx, cy):
+    """
+    Plot koordinatlarını çeyrek numarasına (0..3) çevirir.
+    Sınırdaki noktalar sağ / üst çeyreğe sayılır; NaN noktalar (+,-) olur.
+    """
+    px = np.asarray(px, dtype=float)
+    py = np.asarray(py, dtype=float)
+    right, up = px >= cx, py >= cy
+    left, down = px < cx, py < cy
+    return np.select([right & up, left & up, left & down], [0, 1, 2], default=3)
+
+def quadrant_labels(px, py, cx, cy):
+    """Her nokta için "(+,+)" gibi çeyrek etiketi (object dizi)."""
+    return np.asarray(QUADRANT_LABELS, dtype=object)[classify_quadrants(px, py, cx, cy)]
+
+def _norm_dist(delta, span):
+    """Merkeze uzaklığın [0, 1] aralığına oranı (NaN -> 1.0, eski davranış)."""
+    out = np.clip(delta / np.maximum(span, 1e-9), 0.0, 1.0)
+    return np.where(np.isnan(out), 1.0, out)
+
+def quadrant_point_weights(px, py, quads, cx, cy, xlim, ylim, weighted=True, power=1.0):
+    """
+    Noktanın kendi çeyreğinde merkezden uzaklığına göre ağırlığı.
+    Uzaklık, çeyreğin görünür genişliği / yüksekliğine göre normalize edilir.
+    """
+    px = np.asarray(px, dtype=float)
+    py = np.asarray(py, dtype=float)
+    if not weighted:
+        return np.ones(len(px))
+
+    x0, x1 = xlim
+    y0, y1 = ylim
+    is_right = (quads == 0) | (quads == 3)
+    is_up = (quads == 0) | (quads == 1)
+    rx = np.where(is_right, _norm_dist(px - cx, x1 - cx), _norm_dist(cx - px, cx - x0))
+    ry = np.where(is_up, _norm_dist(py - cy, y1 - cy), _norm_dist(cy - py, cy - y0))
+    return (rx * ry) ** float(power)
+
+def weighted_quadrant_colors(px, py, rgb, cx, cy, xlim, ylim, weighted=True, power=1.0):
+    """
+    Çeyrek başına ağırlıklı ortalama renk.
+    rgb: (N, 3) dizi. Dönüş: 4 elemanlı liste, ağırlığı 0 olan çeyrek için None.
+    """
+    quads = classify_quadrants(px, py, cx, cy)
+    w = quadrant_point_weights(px, py, quads, cx, cy, xlim, ylim, weighted, power)
+    rgb = np.asarray(rgb, dtype=float).reshape(-1, 3)
+
+    total_w = np.bincount(quads, weights=w, minlength=4)
+    sums = np.column_stack([np.bincount(quads, weights=rgb[:, ch] * w, minlength=4) for ch in range(3)])
+
+    colors = []
+    for q in range(4):
+        colors.append(tuple(sums[q] / total_w[q]) if total_w[q] > 0 else None)
+    return colors
+
+def quadrant_rects(cx, cy, xlim, ylim):
+    """Görünür alanda her çeyreğin dikdörtgeni: [((x, y), genişlik, yükseklik), ...]"""
+    x0, x1 = xlim
+    y0, y1 = ylim
+    return [
+        ((cx, cy), x1 - cx, y1 - cy),
+        ((x0, cy), cx - x0, y1 - cy),
+        ((x0, y0), cx - x0, cy - y0),
+        ((cx, y0), x1 - cx, cy - y0),
+    ]
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Residual bandı regresyon filtresi penceresi.
+
+Mod (±kσ dışı / içi, residual'a göre en üst / en alt N%) ve k / N kaydırıcıları.
+Residual histogramı görünüm değişince bir kere çizilir; kaydırıcı sürüklenirken
+sadece bar renkleri (görünür / gizli) ve sınır çizgileri güncellenir.
+"""
+import tkinter as tk
+from tkinter import ttk
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+from analysis import residual_band_limits, residual_keep_mask
+from ui_components import center_over_parent
+
+RESIDUAL_HIST_BINS = 40
+RESIDUAL_FILTER_LABELS = {
+    "outside_band": "Outside ±kσ",
+    "inside_band": "Inside ±kσ",
+    "top_pct": "Top N%",
+    "bottom_pct": "Bottom N%",
+}
+KEPT_COLOR = "#6a51a3"
+HIDDEN_COLOR = "#d9d9d9"
+
+def show_residual_filter_window(parent, settings_state, get_residuals, callbacks):
+    """
+    Residual filtresi penceresini açar.
+
+    Parametreler:
+      parent: Ana pencere (root) referansı.
+      settings_state: Global ayar sözlüğü (regression_filter, regression_band_k, regression_band_pct).
+      get_residuals: Güncel görünümün residual dizisini (NaN'sız) döndüren fonksiyon.
+      callbacks: {'set_mode': func(mode), 'apply': func()}
+        set_mode: regresyon filtre modunu ve ⬆ / ⬇ / σ butonlarını günceller.
+        apply: grafiği yeniden çizer (art arda çağrılarda sadece sonuncusu çizilir).
+
+    Dönüş: {"window": Toplevel, "refresh": func()} — görünüm değişince histogramı yeniler.
+    """
+    win = tk.Toplevel(parent)
+    win.title("Residual Filter")
+    win.transient(parent)
+    center_over_parent(win, parent, 480, 460)
+
+    current_mode = settings_state.get("regression_filter", "none")
+    mode_var = tk.StringVar(value=current_mode if current_mode in RESIDUAL_FILTER_LABELS else "none")
+    k_var = tk.DoubleVar(value=settings_state.get("regression_band_k", 1.0))
+    pct_var = tk.DoubleVar(value=settings_state.get("regression_band_pct", 10.0))
+
+    # --- Histogram ---
+    fig = Figure(figsize=(4.6, 2.6), dpi=100)
+    ax = fig.add_subplot(111)
+    fig.subplots_adjust(left=0.14, right=0.97, bottom=0.2, top=0.95)
+    canvas = FigureCanvasTkAgg(fig, master=win)
+    canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=(10, 4))
+
+    hist = {"residuals": np.empty(0), "bars": None, "centers": None, "lines": []}
+
+    def _update_band():
+        """Sürükleme sırasında ucuz güncelleme: bar renkleri ve sınır çizgileri."""
+        for line in hist["lines"]:
+            line.remove()
+        hist["lines"] = []
+
+        mode = mode_var.get()
+        if hist["bars"] is not None:
+            if mode in RESIDUAL_FILTER_LABELS:
+                limits = residual_band_limits(hist["residuals"], settings_state, mode)
+                keep = residual_keep_mask(hist["centers"], limits)
+                for value in limits[:2]:
+                    if np.isfinite(value):
+                        hist["lines"].append(ax.axvline(value, color="crimson", linestyle="--", linewidth=1.2))
+            else:
+                keep = np.ones(len(hist["centers"]), dtype=bool)
+            for bar, kept in zip(hist["bars"], keep):
+                bar.set_facecolor(KEPT_COLOR if kept else HIDDEN_COLOR)
+        canvas.draw_idle()
+
+    def refresh(force=False):
+        """Görünümün residual'ları değiştiyse histogramı baştan çizer."""
+        residuals = np.asarray(get_residuals(), dtype=float)
+        if not force and np.array_equal(residuals, hist["residuals"]):
+            return
+        hist["residuals"] = residuals
+        ax.clear()
+        hist["lines"] = []
+        if len(residuals) == 0:
+            hist["bars"] = None
+            ax.text(0.5, 0.5, "No regression line in this view", ha="center", va="center",
+                    transform=ax.transAxes, color="gray")
+        else:
+            counts, edges = np.histogram(residuals, bins=RESIDUAL_HIST_BINS)
+            hist["bars"] = ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge", edgecolor="white")
+            hist["centers"] = (edges[:-1] + edges[1:]) / 2.0
+            ax.axvline(0, color="black", linewidth=0.8)
+        ax.set_xlabel("Residual", fontsize=9)
+        ax.set_ylabel("Count", fontsize=9)
+        ax.tick_params(labelsize=8)
+        _update_band()
+
+    # --- Kontroller ---
+    controls = ttk.Frame(win, padding=(10, 4))
+    controls.pack(fill="x")
+
+    def _on_mode():
+        callbacks["set_mode"](mode_var.get())
+        _update_band()
+        _update_scale_state()
+        callbacks["apply"]()
+
+    modes_row = ttk.Frame(controls)
+    modes_row.pack(fill="x", pady=(0, 6))
+    ttk.Radiobutton(modes_row, text="Off", value="none", variable=mode_var, command=_on_mode).pack(side="left")
+    for mode, label in RESIDUAL_FILTER_LABELS.items():
+        ttk.Radiobutton(modes_row, text=label, value=mode, variable=mode_var, command=_on_mode).pack(side="left", padx=(8, 0))
+
+    def _on_slide(*_):
+        settings_state["regression_band_k"] = round(float(k_var.get()), 2)
+        settings_state["regression_band_pct"] = round(float(pct_var.get()), 1)
+        _update_band()
+        if mode_var.get() in RESIDUAL_FILTER_LABELS:
+            callbacks["apply"]()
+
+    k_row = ttk.Frame(controls)
+    k_row.pack(fill="x")
+    ttk.Label(k_row, text="k (σ):", width=8).pack(side="left")
+    k_scale = tk.Scale(k_row, from_=0.1, to=4.0, resolution=0.1, orient="horizontal",
+                       variable=k_var, command=_on_slide, showvalue=True)
+    k_scale.pack(side="left", fill="x", expand=True)
+
+    pct_row = ttk.Frame(controls)
+    pct_row.pack(fill="x")
+    ttk.Label(pct_row, text="N (%):", width=8).pack(side="left")
+    pct_scale = tk.Scale(pct_row, from_=1, to=50, resolution=1, orient="horizontal",
+                         variable=pct_var, command=_on_slide, showvalue=True)
+    pct_scale.pack(side="left", fill="x", expand=True)
+
+    def _update_scale_state():
+        mode = mode_var.get()
+        k_scale.configure(state=(tk.NORMAL if mode in ("outside_band", "inside_band") else tk.DISABLED))
+        pct_scale.configure(state=(tk.NORMAL if mode in ("top_pct", "bottom_pct") else tk.DISABLED))
+
+    ttk.Button(win, text="Close", command=win.destroy).pack(anchor="e", padx=10, pady=(4, 10))
+
+    _update_scale_state()
+    refresh(force=True)
+    return {"window": win, "refresh": refresh}
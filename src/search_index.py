@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+Arama kutusu için önek (prefix) indeksi.
+
+Müşteri ve "<Sektör> Avg" isimleri veri yüklenince bir kere Türkçe uyumlu
+küçük harfe (search_fold) çevrilip sıralanır. Önek sorgusu iki ikili arama
+(bisect) ile sıralı dizide bir aralık bulur; aralıktaki satır pozisyonları
+görünürlük maskesiyle kesiştirilir. Her tuşta DataFrame taranmaz.
+
+Substring ve fuzzy (yazım hatası toleranslı) modlar için aynı isimlerden bir
+trigram (3'lü karakter) ters indeksi kurulur. Sonuçlar sorgu trigramlarının
+isimde geçme oranına, eşitlikte MRR'a göre sıralanır.
+"""
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+from data_ops import search_fold, SECTOR_COL, EFFECTIVE_MRR_COL
+
+SEARCH_MODES = ("prefix", "substring", "fuzzy")
+# Fuzzy modda sonuca girmek için sorgu trigramlarının isimde geçmesi gereken en düşük oranı
+FUZZY_MIN_SIMILARITY = 0.5
+# Bu kadar adaydan fazlası tek tek değil, toplu kod noktası taramasıyla doğrulanır
+SUBSTRING_SCAN_MIN = 256
+# Trigram dolgusu (isimde geçmeyen bir karakter; boşluk gerçek isimlerde var)
+_PAD = "\x01"
+_CP_BITS = 21   # Unicode kod noktası için yeterli bit
+
+def _build_name_index(names):
+    """names (str listesi) -> {"keys": sıralı küçük harf isimler, "pos": orijinal sıraları}"""
+    keys = [search_fold(n) for n in names]
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    return {
+        "keys": [keys[i] for i in order],
+        "pos": np.asarray(order, dtype=np.int64),
+    }
+
+def build_search_index(df, name_col="Customer", mrr_col=EFFECTIVE_MRR_COL):
+    """
+    df için arama indeksi. Müşteri pozisyonları df satır sırasıdır (iloc).
+    Dönüş: {"names", "customers", "sector_names", "sectors", "sector_codes"}
+    """
+    if name_col in df.columns:
+        raw = df[name_col]
+        valid = raw.notna().to_numpy()
+        names = raw.astype(str).tolist()
+    else:
+        valid = np.zeros(len(df), dtype=bool)
+        names = [""] * len(df)
+
+    rows = np.flatnonzero(valid)
+    customers = _build_name_index([names[i] for i in rows])
+    customers["pos"] = rows[customers["pos"]]
+    customers["trigrams"] = _build_trigram_index(customers["keys"])
+    if mrr_col in df.columns:
+        mrr = df[mrr_col].to_numpy(dtype=float, na_value=np.nan)[customers["pos"]]
+        mrr = np.nan_to_num(mrr, nan=0.0)
+    else:
+        mrr = np.zeros(len(customers["pos"]))
+    # Sıralamada eşitlik bozucu: MRR'a göre azalan isim sırası (bir kere)
+    customers["mrr_order"] = np.argsort(-mrr, kind="stable")
+
+    # Satır -> sektör kodu (sector_names sırası; sektörü boş satırlar -1)
+    sector_names = []
+    sector_codes = np.full(len(df), -1, dtype=np.int64)
+    if SECTOR_COL in df.columns:
+        sector_codes, uniques = pd.factorize(df[SECTOR_COL])
+        sector_names = [f"{sec} Avg" for sec in uniques]
+
+    return {
+        "names": names,
+        "customers": customers,
+        "sector_names": sector_names,
+        "sectors": _build_name_index(sector_names),
+        "sector_codes": np.asarray(sector_codes, dtype=np.int64),
+    }
+
+def _prefix_range(keys, prefix):
+    """Sıralı keys içinde prefix ile başlayanların [lo, hi) aralığı."""
+    lo = bisect_left(keys, prefix)
+    if not prefix:
+        return lo, len(keys)
+    # Önekin son karakterini bir artırınca, önekle başlayan her şeyin üst sınırı olur
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return lo, bisect_left(keys, upper, lo)
+
+def prefix_positions(name_index, prefix):
+    """Önekle eşleşen orijinal pozisyonlar, orijinal sırada (sıralı int dizi)."""
+    lo, hi = _prefix_range(name_index["keys"], search_fold(prefix))
+    return np.sort(name_index["pos"][lo:hi])
+
+def search_customer_rows(index, prefix, visible_mask=None, mode="prefix"):
+    """
+    Aramayla eşleşen müşterilerin df satır pozisyonları.
+    prefix modunda df sırasında, substring / fuzzy modlarında benzerlik ve
+    MRR'a göre sıralı döner. visible_mask (df'e hizalı bool dizi) verilirse
+    sadece görünür satırlar kalır.
+    """
+    customers = index["customers"]
+    if mode in ("substring", "fuzzy"):
+        order = _ranked_matches(customers, search_fold(prefix), fuzzy=(mode == "fuzzy"))
+        pos = customers["pos"][order]
+    else:
+        pos = prefix_positions(customers, prefix)
+    if visible_mask is not None:
+        pos = pos[np.asarray(visible_mask, dtype=bool)[pos]]
+    return pos
+
+def search_sector_names(index, prefix, mode="prefix"):
+    """Aramayla eşleşen "<Sektör> Avg" isimleri (prefix: veri sırası, diğerleri: benzerlik sırası)."""
+    names = index["sector_names"]
+    if mode not in ("substring", "fuzzy"):
+        return [names[i] for i in prefix_positions(index["sectors"], prefix)]
+
+    # Sektör sayısı küçük: indeks yerine doğrudan karşılaştırma
+    query = search_fold(prefix)
+    q_tris = _inner_trigrams(query)
+    scored = []
+    for name in names:
+        key = search_fold(name)
+        sim = len(np.intersect1d(q_tris, _inner_trigrams(key))) / len(q_tris) if len(q_tris) else 0.0
+        if (query in key) or (mode == "fuzzy" and len(q_tris) and sim >= FUZZY_MIN_SIMILARITY):
+            scored.append((query not in key, -sim, name))
+    return [name for *_, name in sorted(scored)]
+
+def search_row_mask(index, prefix, mode="prefix", by_sector=False):
+    """
+    Aramayla eşleşen satırlar için df'e hizalı bool maske (hold-to-focus).
+    by_sector=True ise satırın "<Sektör> Avg" ismi aranır (Sector Avg görünümü).
+    """
+    if by_sector:
+        names = index["sector_names"]
+        matched = set(search_sector_names(index, prefix, mode=mode))
+        codes = [i for i, name in enumerate(names) if name in matched]
+        return np.isin(index["sector_codes"], codes)
+    mask = np.zeros(len(index["names"]), dtype=bool)
+    mask[search_customer_rows(index, prefix, mode=mode)] = True
+    return mask
+
+# ------------------------------ Trigram indeksi ------------------------------
+def _codepoints(text):
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+
+def _trigram_codes(cp):
+    """Ardışık kod noktası dizisinden trigram kodları (tek int64)."""
+    return (cp[:-2] << (2 * _CP_BITS)) | (cp[1:-1] << _CP_BITS) | cp[2:]
+
+def _inner_trigrams(text):
+    """Dolgusuz metnin benzersiz trigram kodları (3 karakterden kısaysa boş)."""
+    if len(text) < 3:
+        return np.empty(0, dtype=np.int64)
+    return np.unique(_trigram_codes(_codepoints(text)))
+
+def _build_trigram_index(keys):
+    """
+    Sıralı isimler (keys) için trigram -> isim ters indeksi (CSR biçiminde).
+    Tüm isimler tek bir kod noktası dizisine dökülüp NumPy ile hesaplanır.
+    Dönüş: {"tri": sıralı benzersiz trigramlar, "start": dilim başları, "ids": isim sıraları,
+            "count": isim başına benzersiz trigram sayısı,
+            "cp": dolgulu isimlerin kod noktaları, "ends": isimlerin cp içindeki bitişleri,
+            "char_freq": karakter -> adet}
+    """
+    n = len(keys)
+    if n == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return {"tri": empty, "start": np.zeros(1, dtype=np.int64), "ids": empty, "count": empty,
+                "cp": np.empty(0, dtype=np.uint32), "ends": empty, "char_freq": {}}
+
+    lengths = np.fromiter((len(k) + 4 for k in keys), dtype=np.int64, count=n)
+    cp = _codepoints("".join(_PAD * 2 + k + _PAD * 2 for k in keys))
+    ends = np.cumsum(lengths)
+
+    tri = _trigram_codes(cp)
+    # İsim sınırını aşan trigramlar (her ismin son iki pozisyonu) atılır
+    valid = np.ones(len(tri), dtype=bool)
+    valid[ends[:-1] - 1] = False
+    valid[ends[:-1] - 2] = False
+    owner = np.repeat(np.arange(n, dtype=np.int64), lengths)[:len(tri)]
+    tri, owner = tri[valid], owner[valid]
+
+    # (trigram, isim) çiftlerini tekilleştir ve trigram'a göre grupla
+    order = np.lexsort((owner, tri))
+    tri, owner = tri[order], owner[order]
+    keep = np.ones(len(tri), dtype=bool)
+    keep[1:] = (tri[1:] != tri[:-1]) | (owner[1:] != owner[:-1])
+    tri, owner = tri[keep], owner[keep]
+
+    uniq, start = np.unique(tri, return_index=True)
+    return {
+        "tri": uniq,
+        "start": np.append(start, len(tri)).astype(np.int64),
+        "ids": owner,
+        "count": np.bincount(owner, minlength=n),
+        # Büyük aday kümelerinde substring doğrulaması için (isim başına değil, toplu tarama)
+        "cp": cp.astype(np.uint32),
+        "ends": ends,
+        "char_freq": dict(zip(*(a.tolist() for a in np.unique(cp, return_counts=True)))),
+    }
+
+def _posting_counts(tindex, codes, n):
+    """codes trigramlarının her isimde kaç tanesinin geçtiği (bincount)."""
+    loc = np.searchsorted(tindex["tri"], codes)
+    loc = loc[(loc < len(tindex["tri"])) & (tindex["tri"][np.minimum(loc, len(tindex["tri"]) - 1)] == codes)]
+    if len(loc) == 0:
+        return np.zeros(n, dtype=np.int64)
+    parts = [tindex["ids"][tindex["start"][i]:tindex["start"][i + 1]] for i in loc]
+    return np.bincount(np.concatenate(parts), minlength=n)
+
+def _short_substring_ids(tindex, query, n):
+    """
+    1-2 karakterlik sorgu: query ile başlayan tüm (dolgulu) trigramların isimleri.
+    Trigram kodları sıralı olduğu için bunlar tek bir aralıktır.
+    """
+    cp = _codepoints(query)
+    shift = _CP_BITS * (3 - len(cp))
+    base = 0
+    for c in cp:
+        base = (base << _CP_BITS) | int(c)
+    lo = np.searchsorted(tindex["tri"], base << shift)
+    hi = np.searchsorted(tindex["tri"], (base + 1) << shift)
+    hit = np.zeros(n, dtype=bool)
+    hit[tindex["ids"][tindex["start"][lo]:tindex["start"][hi]]] = True
+    return hit
+
+def _substring_ids(tindex, query, n):
+    """
+    query'nin geçtiği isimler (bool dizi): tüm isimlerin kod noktası dizisinde
+    ilk karakterin geçtiği yerlerden başlayıp sonraki karakterlerle daraltılır.
+    """
+    cp = tindex["cp"]
+    q = _codepoints(query)
+    # En nadir karakterden başla, diğerlerini nadirden sıka doğru kontrol et
+    freq = tindex["char_freq"]
+    order = sorted(range(len(q)), key=lambda k: freq.get(int(q[k]), 0))
+    first = order[0]
+    pos = np.flatnonzero(cp == q[first]) - first
+    pos = pos[(pos >= 0) & (pos <= len(cp) - len(q))]
+    for k in order[1:]:
+        pos = pos[cp[pos + k] == q[k]]
+    hit = np.zeros(n, dtype=bool)
+    hit[np.searchsorted(tindex["ends"], pos, side="right")] = True
+    return hit
+
+def _verified_substrings(tindex, keys, query, has_all, n):
+    """
+    Trigramların hepsinin geçmesi bitişikliği garanti etmez: has_all adayları
+    query'nin gerçekten geçtiği isimlere daraltılır (bool dizi).
+    """
+    cand = np.flatnonzero(has_all)
+    if len(cand) > SUBSTRING_SCAN_MIN:
+        return _substring_ids(tindex, query, n)
+    exact = np.zeros(n, dtype=bool)
+    exact[cand] = np.fromiter((query in keys[i] for i in cand), dtype=bool, count=len(cand))
+    return exact
+
+def _ranked_matches(customers, query, fuzzy=False):
+    """
+    Substring / fuzzy eşleşmelerin isim sıraları.
+    Benzerlik: sorgunun iç trigramlarından kaçının isimde geçtiği (oran).
+    substring: query ismin içinde geçmeli. fuzzy: oranı FUZZY_MIN_SIMILARITY
+    ve üstü olanlar da (yazım hatası toleransı) sonuca girer.
+    Sıra: tam substring eşleşmesi önce, sonra benzerlik, eşitlikte MRR (azalan).
+    """
+    tindex = customers["trigrams"]
+    keys = customers["keys"]
+    n = len(keys)
+    if n == 0 or not query:
+        return np.empty(0, dtype=np.int64)
+
+    by_mrr = customers["mrr_order"]
+    if len(query) < 3:
+        # Kısa sorguda trigram benzerliği anlamsız; substring + MRR sırası
+        hit = _short_substring_ids(tindex, query, n)
+        return by_mrr[hit[by_mrr]]
+
+    inner = _inner_trigrams(query)
+    shared = _posting_counts(tindex, inner, n)
+    has_all = shared == len(inner)
+    # Tek trigramlık sorguda (3 karakter) trigramın geçmesi substring demektir
+    exact = has_all if len(inner) == 1 else _verified_substrings(tindex, keys, query, has_all, n)
+    if fuzzy:
+        match = exact | (shared >= FUZZY_MIN_SIMILARITY * len(inner))
+    else:
+        match = exact
+
+    ranked = by_mrr[match[by_mrr]]
+    if fuzzy and len(ranked):
+        # Küçük tamsayı anahtarla kararlı sıralama (radix): MRR sırası eşitlikte korunur.
+        # Anahtar: substring 0, diğerleri 1 + eksik trigram sayısı (bitişik olmayan tam kümeler dahil)
+        score = np.where(exact[ranked], 0, 1 + len(inner) - shared[ranked]).astype(np.int16)
+        ranked = ranked[np.argsort(score, kind="stable")]
+    return ranked
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Sektör bazlı ön-toplam (pre-aggregated) tablo.
+
+Sector Avg noktaları, fit limitleri, yan paneldeki sektör / churn listeleri ve
+Avg tooltip'leri aynı sektör toplamlarını kullanır. Bunlar her çizimde ayrı
+ayrı groupby / maske ile hesaplanmak yerine görünür veri için tek bir groupby
+geçişinde bir kere hesaplanır. Tablo filtre hattının bir aşaması olarak
+saklanır; görünür satırlar değişmedikçe yeniden hesaplanmaz.
+"""
+import numpy as np
+import pandas as pd
+
+from data_ops import (
+    SECTOR_COL, EFFECTIVE_MRR_COL, CHURNED_MRR_COL, get_churn_mask,
+)
+
+GROWTH_COL = 'MRR Growth (%)'
+
+# Tablo kolonları (index: sektör, groupby sırası)
+SECTOR_TABLE_COLUMNS = (
+    "count",            # satır sayısı
+    "x_sum", "x_mean",  # X (MRR) toplam / ortalama
+    "y_sum", "y_mean",  # Y (Growth) toplam / ortalama
+    "mrr_sum",          # Effective MRR toplamı
+    "churn_count",      # churn satır sayısı
+    "churned_mrr",      # churn MRR (calculate_churn_stats ile aynı kaynak)
+    "total_mrr",        # aktif + churn MRR
+    "base_x_mean",      # okların başlangıcı: yaş moduna göre baz MRR ortalaması
+    "updated_y_mean",   # okların bitişi: güncellenmiş Growth ortalaması (yoksa y_mean)
+)
+
+def _float_col(frame, col):
+    if col is None or col not in frame.columns:
+        return None
+    return pd.to_numeric(frame[col], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+def build_sector_stats(frame, x_col, base_col=None, updated_y_col=None):
+    """
+    frame için sektör bazlı toplamlar (tek groupby geçişi).
+    Ortalamalar Series.mean() gibi NaN'ları atlar; x_col yoksa Effective MRR kullanılır.
+    Dönüş: {"table": index'i sektör olan DataFrame (SECTOR_TABLE_COLUMNS),
+            "rows": sektör -> frame içindeki satır pozisyonları}
+    """
+    n = len(frame)
+    if n == 0 or SECTOR_COL not in frame.columns:
+        return {"table": pd.DataFrame(columns=list(SECTOR_TABLE_COLUMNS), dtype=float), "rows": {}}
+
+    nan = np.full(n, np.nan)
+    x = _float_col(frame, x_col)
+    if x is None:
+        x = _float_col(frame, EFFECTIVE_MRR_COL)
+    y = _float_col(frame, GROWTH_COL)
+    mrr = _float_col(frame, EFFECTIVE_MRR_COL)
+    base_x = _float_col(frame, base_col)
+    upd_y = _float_col(frame, updated_y_col)
+
+    churn = get_churn_mask(frame).to_numpy(dtype=bool)
+    churned_src = _float_col(frame, CHURNED_MRR_COL)
+    if churned_src is None:
+        churned_src = mrr if mrr is not None else nan
+    mrr = mrr if mrr is not None else nan
+
+    work = pd.DataFrame({
+        "x": x if x is not None else nan,
+        "y": y if y is not None else nan,
+        "mrr": mrr,
+        "churn": churn.astype(np.int64),
+        "churned": np.where(churn, churned_src, np.nan),
+        "active": np.where(churn, np.nan, mrr),
+        "base_x": base_x if base_x is not None else (x if x is not None else nan),
+        "upd_y": upd_y if upd_y is not None else (y if y is not None else nan),
+    })
+
+    # Sektörü boş satırlar da bir grup olur (NaN index): "All" toplamları eksiksiz kalsın
+    grouped = work.groupby(frame[SECTOR_COL].to_numpy(), sort=True, dropna=False)
+    sums = grouped.sum(min_count=0)
+    valid = grouped.count()
+
+    table = pd.DataFrame(index=sums.index)
+    table.index.name = SECTOR_COL
+    table["count"] = grouped.size()
+    table["x_sum"] = sums["x"]
+    table["x_mean"] = sums["x"] / valid["x"]
+    table["y_sum"] = sums["y"]
+    table["y_mean"] = sums["y"] / valid["y"]
+    table["mrr_sum"] = sums["mrr"]
+    table["churn_count"] = sums["churn"]
+    table["churned_mrr"] = sums["churned"]
+    table["total_mrr"] = sums["active"] + sums["churned"]
+    table["base_x_mean"] = sums["base_x"] / valid["base_x"]
+    table["updated_y_mean"] = sums["upd_y"] / valid["upd_y"]
+    return {"table": table, "rows": grouped.indices}
+
+def sector_frame(stats, frame, sector):
+    """Sektörün frame içindeki satırları (groupby'ı tekrarlamadan)."""
+    return frame.iloc[stats["rows"].get(sector, [])]
+
+def named_sectors(table):
+    """Sektörü boş olmayan satırlar (Sector Avg noktaları / listeler için)."""
+    return table[table.index.notna()]
+
+def churn_totals(table, sectors=None):
+    """
+    Tablodaki (veya verilen sektörlerdeki) satırların churn özeti,
+    calculate_churn_stats ile aynı biçimde: (churned_mrr, total_mrr, ratio_pct, churn_count)
+    """
+    if sectors is not None:
+        table = table[table.index.isin(list(sectors))]
+    if len(table) == 0:
+        return 0.0, 0.0, 0.0, 0
+    churned = float(table["churned_mrr"].sum())
+    total = float(table["total_mrr"].sum())
+    ratio = (churned / total * 100.0) if total > 0 else 0.0
+    return churned, total, ratio, int(table["churn_count"].sum())
+
+def sector_churn_row(table, sector):
+    """Tek sektörün churn özeti (tabloda yoksa sıfırlar)."""
+    if sector not in table.index:
+        return 0.0, 0.0, 0.0, 0
+    return churn_totals(table.loc[[sector]])
@@ -70,10 +70,14 @@ def show_settings_window(parent, settings_state, undo_stack, current_regression_
     risk_cmap_weighted_var = tk.BooleanVar(value=settings_state.get("risk_cmap_weighted", True))
     risk_cmap_power_var = tk.StringVar(value=str(settings_state.get("risk_cmap_weight_power", 1.0)))
     search_box_var = tk.BooleanVar(value=settings_state.get("activate_search_box", False))
+    search_mode_labels = {"prefix": "Prefix", "substring": "Substring", "fuzzy": "Fuzzy"}
+    search_mode_var = tk.StringVar(value=search_mode_labels.get(settings_state.get("search_mode", "prefix"), "Prefix"))
+    lod_threshold_var = tk.StringVar(value=str(settings_state.get("lod_point_threshold", 20000)))
     regression_var = tk.BooleanVar(value=settings_state.get("show_regression_line", False))
     
     # Fix Regression Değişkeni
     fix_reg_var = tk.BooleanVar(value=settings_state.get("fix_regression_line", False))
+    sector_trends_var = tk.BooleanVar(value=settings_state.get("show_sector_trends", False))
 
     # Hata mesajı hedefi (Graph sekmesi için)
     nonlocal_error_target = {"label": None, "var": None}
@@ -118,6 +122,20 @@ def show_settings_window(parent, settings_state, undo_stack, current_regression_
         else:
             val = settings_state.get("risk_cmap_weight_power", 1.0)
 
+        # Validasyon (Density / LOD eşiği)
+        entered_lod = (lod_threshold_var.get() or "").strip()
+        if entered_lod == "":
+            lod_threshold = settings_state.get("lod_point_threshold", 20000)
+        else:
+            try:
+                lod_threshold = int(parse_number_entry(entered_lod))
+            except Exception:
+                lod_threshold = -1
+        if lod_threshold < 0:
+            if nonlocal_error_target["var"] is not None:
+                nonlocal_error_target["var"].set("Enter a valid point count (0 = off)")
+            return
+
         # Undo Stack
         undo_stack.append(('LIMIT', settings_state.copy()))
 
@@ -172,11 +190,15 @@ def show_settings_window(parent, settings_state, undo_stack, current_regression_
         settings_state["risk_cmap_weighted"] = bool(risk_cmap_weighted_var.get())
         settings_state["risk_cmap_weight_power"] = float(val)
         settings_state["activate_search_box"] = bool(search_box_var.get())
+        settings_state["search_mode"] = next(
+            (k for k, v in search_mode_labels.items() if v == search_mode_var.get()), "prefix")
+        settings_state["lod_point_threshold"] = int(lod_threshold)
         
         # Regresyon Settings
         settings_state["show_regression_line"] = bool(regression_var.get())
         is_fixed_now = bool(fix_reg_var.get())
         settings_state["fix_regression_line"] = is_fixed_now
+        settings_state["show_sector_trends"] = bool(sector_trends_var.get())
 
         if is_fixed_now:
             # Eğer sabitleme açıksa ve parametre varsa koru
@@ -398,6 +420,9 @@ def show_settings_window(parent, settings_state, undo_stack, current_regression_
 
     chk_search_box = ttk.Checkbutton(graph_inner, text="Activate search box", variable=search_box_var)
     chk_search_box.grid(row=5, column=0, sticky="w", padx=2, pady=cb_pad_y)
+    search_mode_combo = ttk.Combobox(graph_inner, width=10, textvariable=search_mode_var, state="readonly",
+                                     values=list(search_mode_labels.values()))
+    search_mode_combo.grid(row=5, column=0, sticky="e", padx=8, pady=cb_pad_y)
 
     chk_regression = ttk.Checkbutton(graph_inner, text="Show regression line", variable=regression_var)
     chk_regression.grid(row=6, column=0, sticky="w", padx=2, pady=cb_pad_y)
@@ -405,6 +430,9 @@ def show_settings_window(parent, settings_state, undo_stack, current_regression_
     chk_fix_reg = ttk.Checkbutton(graph_inner, text="Fix Regression Line", variable=fix_reg_var)
     chk_fix_reg.grid(row=7, column=0, sticky="w", padx=2, pady=6)
 
+    chk_sector_trends = ttk.Checkbutton(graph_inner, text="Show all sector trends", variable=sector_trends_var)
+    chk_sector_trends.grid(row=7, column=0, sticky="e", padx=8, pady=6)
+
     def _toggle_fix_reg_state(*_):
         if regression_var.get():
             chk_fix_reg.state(["!disabled"])
@@ -413,6 +441,11 @@ def show_settings_window(parent, settings_state, undo_stack, current_regression_
     regression_var.trace_add("write", _toggle_fix_reg_state)
     _toggle_fix_reg_state()
 
+    lod_label = ttk.Label(graph_inner, text="Density view above N visible points (0 = off):")
+    lod_label.grid(row=8, column=0, sticky="w", padx=2, pady=cb_pad_y)
+    lod_entry = ttk.Entry(graph_inner, width=8, textvariable=lod_threshold_var, justify="center", validate="key", validatecommand=vcmd)
+    lod_entry.grid(row=8, column=0, sticky="e", padx=8, pady=cb_pad_y)
+
     graph_err_var = tk.StringVar(value="")
     graph_err_lbl = ttk.Label(tab_graph, textvariable=graph_err_var, foreground="red", anchor="center")
     graph_err_lbl.grid(row=1, column=0, sticky="ew", padx=10, pady=(0, 6))
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Çizili noktalar için uzamsal indeks (hover, tık, sağ tık ve kutu seçimi).
+
+İndeks, scatter_points içindeki scatter'ların son plot koordinatlarından
+(offsets) kurulur ve sadece çizilen nokta kümesi değişince yeniden kurulur.
+Zoom / pan'da indeks aynen kalır; piksel toleransı sorgu anında o anki
+eksen dönüşümüyle veri birimine çevrilir.
+scipy varsa cKDTree, yoksa X'e göre sıralı dizi + searchsorted kullanılır.
+"""
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+    _HAS_SCIPY = True
+except ImportError:
+    _HAS_SCIPY = False
+
+# Matplotlib Collection.contains varsayılan toleransı (piksel)
+PICK_RADIUS_PX = 5.0
+
+def build_spatial_index(scatter_points, use_kdtree=True):
+    """
+    scatter_points [(scatter, sub_df), ...] listesinden indeks kurar.
+    Her nokta için: plot koordinatı, hangi scatter (sc_pos), scatter içindeki
+    sıra (row_pos) ve marker yarıçapı (point cinsinden) saklanır.
+    """
+    xy_parts, sc_parts, row_parts, rad_parts = [], [], [], []
+    avg_flags = []
+
+    for sc_pos, (sc, _) in enumerate(scatter_points):
+        offsets = np.asarray(sc.get_offsets(), dtype=float)
+        avg_flags.append((sc.get_label() or "").endswith(" Avg"))
+        if offsets.ndim != 2 or len(offsets) == 0:
+            continue
+
+        sizes = np.asarray(sc.get_sizes(), dtype=float)
+        if len(sizes) == 0:
+            sizes = np.array([36.0])
+        sizes = np.resize(sizes, len(offsets))
+
+        # NaN koordinatlı noktalar çizilmez, indekse de girmez
+        ok = np.isfinite(offsets).all(axis=1)
+        rows = np.flatnonzero(ok)
+        xy_parts.append(offsets[ok])
+        sc_parts.append(np.full(len(rows), sc_pos, dtype=int))
+        row_parts.append(rows)
+        rad_parts.append(np.sqrt(sizes[ok]) / 2.0)
+
+    if xy_parts:
+        xy = np.concatenate(xy_parts)
+        sc_pos_arr = np.concatenate(sc_parts)
+        row_pos_arr = np.concatenate(row_parts)
+        radius_pt = np.concatenate(rad_parts)
+    else:
+        xy = np.empty((0, 2))
+        sc_pos_arr = np.empty(0, dtype=int)
+        row_pos_arr = np.empty(0, dtype=int)
+        radius_pt = np.empty(0)
+
+    index = {
+        "xy": xy,
+        "sc_pos": sc_pos_arr,
+        "row_pos": row_pos_arr,
+        "radius_pt": radius_pt,
+        "is_avg": np.asarray(avg_flags, dtype=bool),
+        "tree": None,
+        "scale": (1.0, 1.0),
+        "order": None,
+    }
+
+    if len(xy) == 0:
+        return index
+
+    if _HAS_SCIPY and use_kdtree:
+        # Eksenler çok farklı ölçekte (MRR vs %), ağaç normalize koordinatta kurulur
+        span = np.ptp(xy, axis=0)
+        scale = (float(span[0]) or 1.0, float(span[1]) or 1.0)
+        index["scale"] = scale
+        index["tree"] = cKDTree(xy / np.array(scale))
+    else:
+        index["order"] = np.argsort(xy[:, 0], kind="mergesort")
+    return index
+
+def query_rect(index, x_min, x_max, y_min, y_max):
+    """Plot koordinatında dikdörtgen içindeki noktaların indeks pozisyonları."""
+    xy = index["xy"]
+    if len(xy) == 0:
+        return np.empty(0, dtype=int)
+
+    if index["tree"] is not None:
+        sx, sy = index["scale"]
+        center = ((x_min + x_max) / 2.0 / sx, (y_min + y_max) / 2.0 / sy)
+        r = max((x_max - x_min) / 2.0 / sx, (y_max - y_min) / 2.0 / sy)
+        cand = np.asarray(index["tree"].query_ball_point(center, r, p=np.inf), dtype=int)
+    else:
+        xs_sorted = xy[index["order"], 0]
+        lo = np.searchsorted(xs_sorted, x_min, side="left")
+        hi = np.searchsorted(xs_sorted, x_max, side="right")
+        cand = index["order"][lo:hi]
+
+    if len(cand) == 0:
+        return cand
+    px, py = xy[cand, 0], xy[cand, 1]
+    inside = (x_min <= px) & (px <= x_max) & (y_min <= py) & (py <= y_max)
+    return np.sort(cand[inside])
+
+def query_hit(index, ax, x_px, y_px, avg_only=False):
+    """
+    Ekran pikselindeki (event.x, event.y) noktaya çarpan çizili noktayı bulur.
+    scatter_points sırasına göre ilk scatter, onun içinde en yakın nokta seçilir.
+    Dönüş: (sc_pos, row_pos) veya None
+    """
+    xy = index["xy"]
+    if len(xy) == 0:
+        return None
+
+    # Piksel toleransını (en büyük marker + pick radius) veri birimine çevir
+    dpi_scale = ax.figure.dpi / 72.0
+    max_r_px = float(index["radius_pt"].max()) * dpi_scale + PICK_RADIUS_PX
+    inv = ax.transData.inverted()
+    (x0, y0), (x1, y1) = inv.transform([(x_px - max_r_px, y_px - max_r_px),
+                                        (x_px + max_r_px, y_px + max_r_px)])
+    cand = query_rect(index, min(x0, x1), max(x0, x1), min(y0, y1), max(y0, y1))
+    if avg_only and len(cand):
+        cand = cand[index["is_avg"][index["sc_pos"][cand]]]
+    if len(cand) == 0:
+        return None
+
+    # Kesin kontrol piksel uzayında: mesafe <= marker yarıçapı + tolerans
+    disp = ax.transData.transform(xy[cand])
+    dist = np.hypot(disp[:, 0] - x_px, disp[:, 1] - y_px)
+    hit = dist <= index["radius_pt"][cand] * dpi_scale + PICK_RADIUS_PX
+    if not hit.any():
+        return None
+
+    cand, dist = cand[hit], dist[hit]
+    first_sc = index["sc_pos"][cand].min()
+    same = index["sc_pos"][cand] == first_sc
+    best = cand[same][np.argmin(dist[same])]
+    return int(index["sc_pos"][best]), int(index["row_pos"][best])
@@ -224,6 +224,14 @@ def get_banner_text(settings_state):
         active_items.append("Filter: Above Trend")
     elif reg_filt == "below":
         active_items.append("Filter: Below Trend")
+    elif reg_filt in ("outside_band", "inside_band"):
+        k_val = settings_state.get("regression_band_k", 1.0)
+        side = "Outside" if reg_filt == "outside_band" else "Inside"
+        active_items.append(f"Filter: {side} ±{k_val:g}σ")
+    elif reg_filt in ("top_pct", "bottom_pct"):
+        pct_val = settings_state.get("regression_band_pct", 10.0)
+        side = "Top" if reg_filt == "top_pct" else "Bottom"
+        active_items.append(f"Filter: {side} {pct_val:g}% Residual")
 
     # 6. Regresyon Durumu
     if settings_state.get("show_regression_line", False):
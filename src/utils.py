@@ -258,16 +258,26 @@ def to_plot_coords(x_mrr, y_growth, swap_axes=False):
         return (y_growth, x_mrr)
     return (x_mrr, y_growth)    
 
-def compute_fit_limits(selected_sector, x_col, visible_df, sectors_list, pad_ratio=0.1, eff_center=None, extra_points=None, swap_axes=False):
+def compute_fit_limits(selected_sector, x_col, visible_df, sectors_list, pad_ratio=0.1, eff_center=None, extra_points=None, swap_axes=False, sector_table=None):
     """
     Grafiğin zoom limitlerini hesaplar.
+    sector_table (sector_stats tablosu) verilirse Sector Avg ortalamaları ondan okunur.
     """
     # to_plot_coords fonksiyonunu kullanabilmek için
     # Eğer to_plot_coords bu dosyanın (utils.py) yukarısındaysa sorun yok.
     # Değilse burada tanımlı olduğundan emin ol.
     
     xs = []; ys = []
-    if selected_sector == "Sector Avg":
+    if selected_sector == "Sector Avg" and sector_table is not None:
+        # Ön-toplam tablo: sektör başına maske / ortalama hesabı yok
+        for sector in sectors_list:
+            if sector not in sector_table.index:
+                continue
+            avg_x = float(sector_table.at[sector, "x_mean"])
+            avg_y = float(sector_table.at[sector, "y_mean"])
+            px, py = (avg_y, avg_x) if swap_axes else (avg_x, avg_y)
+            xs.append(px); ys.append(py)
+    elif selected_sector == "Sector Avg":
         for sector in sectors_list:
             sd = visible_df[visible_df['Company Sector'] == sector]
             if len(sd) == 0: